@@ -1,8 +1,10 @@
 """
 Переиспользуемые UI компоненты
 """
+import asyncio
 import flet as ft
 from typing import Callable, Optional
+from page_updates import request_update
 
 
 class ConfirmDialog(ft.AlertDialog):
@@ -24,13 +26,13 @@ class ConfirmDialog(ft.AlertDialog):
     
     def close(self):
         self.open = False
-        self.page.update()
+        request_update(self.page)
     
     def confirm_and_close(self, on_confirm: Callable):
         on_confirm(True)  # Передаем True как параметр confirmed
         self.close()
         if self.page:
-            self.page.update()
+            request_update(self.page)
 
 
 class InfoCard(ft.Container):
@@ -143,12 +145,19 @@ class DataTable(ft.Container):
 
 
 class SearchBar(ft.Container):
-    """Строка поиска"""
+    """Строка поиска (on_search может быть корутиной)"""
     def __init__(self, on_search: Callable, placeholder: str = "Поиск..."):
+        if asyncio.iscoroutinefunction(on_search):
+            async def handle_change(e):
+                await on_search(e.control.value)
+        else:
+            def handle_change(e):
+                on_search(e.control.value)
+        
         self.search_field = ft.TextField(
             hint_text=placeholder,
             prefix_icon=ft.Icons.SEARCH,
-            on_change=lambda e: on_search(e.control.value),
+            on_change=handle_change,
             expand=True,
         )
         
@@ -156,3 +165,215 @@ class SearchBar(ft.Container):
             content=self.search_field,
             padding=10,
         )
+
+
+class LoadingBar(ft.ProgressBar):
+    """
+    Индикатор загрузки для асинхронных запросов.
+    
+    Используется как контекстный менеджер вокруг await: полоса видна,
+    пока выполняется хотя бы один запрос, в том числе отмененный.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(visible=False, **kwargs)
+        self.active = 0
+    
+    def __enter__(self):
+        self.active += 1
+        self._show(True)
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.active -= 1
+        if not self.active:
+            self._show(False)
+    
+    def _show(self, visible: bool):
+        if self.visible != visible:
+            self.visible = visible
+            if self.page:
+                request_update(self.page, self)
+
+
+class RecycledList(ft.ListView):
+    """
+    Список страницы с переиспользуемыми строками.
+    
+    Строки (ListTile) создаются один раз и хранятся в пуле; при смене
+    страницы у них меняются только текст и data, а лишние строки
+    скрываются. Flet отправляет клиенту изменения свойств вместо новых
+    поддеревьев элементов.
+    
+    describe(item) возвращает {'title': ..., 'subtitle': ...}; обработчики
+    on_open(item) и on_delete(item) получают запись, привязанную к строке.
+    """
+    def __init__(self, describe: Callable[[dict], dict], on_open: Callable = None,
+                 on_delete: Optional[Callable] = None, leading_icon: str = None,
+                 title_weight: Optional[ft.FontWeight] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.describe = describe
+        self.on_open = on_open
+        self.on_delete = on_delete
+        self.leading_icon = leading_icon
+        self.title_weight = title_weight
+        self.items = []
+    
+    def show(self, items: list):
+        """Показать записи страницы, переиспользуя строки пула"""
+        self.items = list(items)
+        while len(self.controls) < len(self.items):
+            self.controls.append(self._create_tile())
+        for tile, item in zip(self.controls, self.items):
+            self._bind(tile, item)
+        for tile in self.controls[len(self.items):]:
+            tile.visible = False
+            tile.data = None
+            if tile.trailing:
+                tile.trailing.data = None
+    
+    def _create_tile(self) -> ft.ListTile:
+        return ft.ListTile(
+            leading=ft.Icon(self.leading_icon) if self.leading_icon else None,
+            title=ft.Text("", weight=self.title_weight),
+            subtitle=ft.Text(""),
+            on_click=self._handle_open,
+            trailing=ft.IconButton(
+                icon=ft.Icons.DELETE,
+                tooltip="Удалить",
+                on_click=self._handle_delete
+            ) if self.on_delete else None
+        )
+    
+    def _bind(self, tile: ft.ListTile, item: dict):
+        """Привязать запись к строке: меняются только свойства"""
+        description = self.describe(item)
+        tile.visible = True
+        tile.data = item
+        tile.title.value = description['title']
+        tile.subtitle.value = description['subtitle']
+        if tile.trailing:
+            tile.trailing.data = item
+    
+    def _handle_open(self, e):
+        if self.on_open and e.control.data is not None:
+            self.on_open(e.control.data)
+    
+    def _handle_delete(self, e):
+        if self.on_delete and e.control.data is not None:
+            self.on_delete(e.control.data)
+
+
+class SearchPicker(ft.Container):
+    """
+    Выбор нескольких записей с поиском и постраничной загрузкой.
+    
+    Страницы запрашиваются через fetch_page(search_term, offset, limit) только при
+    листании или поиске, а выбор хранится в множестве selected и не зависит
+    от того, какая страница сейчас показана.
+    """
+    def __init__(self, fetch_page: Callable, id_key: str, label: Callable, selected=None,
+                 page_size: int = 10, detail_label: str = None, detail_hint: str = None,
+                 details: dict = None, width: int = 400, height: int = 350):
+        self.fetch_page = fetch_page
+        self.id_key = id_key
+        self.label = label
+        self.selected = set(selected or ())
+        self.page_size = page_size
+        self.detail_label = detail_label
+        self.detail_hint = detail_hint
+        self.details = dict(details or {})
+        self.search_term = ""
+        self.page_offset = 0
+        
+        self.search_field = ft.TextField(
+            hint_text="Поиск...",
+            prefix_icon=ft.Icons.SEARCH,
+            on_change=self.on_search,
+        )
+        self.rows_column = ft.Column([], scroll=ft.ScrollMode.AUTO, expand=True)
+        self.page_text = ft.Text("", size=14)
+        self.prev_button = ft.IconButton(icon=ft.Icons.ARROW_BACK, on_click=self.prev_page)
+        self.next_button = ft.IconButton(icon=ft.Icons.ARROW_FORWARD, on_click=self.next_page)
+        
+        super().__init__(
+            content=ft.Column([
+                self.search_field,
+                ft.Container(content=self.rows_column, expand=True),
+                ft.Row([self.prev_button, self.page_text, self.next_button],
+                       alignment=ft.MainAxisAlignment.CENTER),
+            ], spacing=10),
+            width=width,
+            height=height,
+        )
+        self.load_page()
+    
+    def load_page(self):
+        """Загрузить текущую страницу (запрашивается на одну запись больше, чтобы знать о следующей)"""
+        items = self.fetch_page(self.search_term, self.page_offset, self.page_size + 1)
+        has_next = len(items) > self.page_size
+        self.rows_column.controls = [self._create_row(item) for item in items[:self.page_size]]
+        
+        self.page_text.value = str(self.page_offset // self.page_size + 1)
+        self.prev_button.disabled = self.page_offset == 0
+        self.next_button.disabled = not has_next
+    
+    def _create_row(self, item):
+        """Создать строку выбора для записи"""
+        item_id = item[self.id_key]
+        checkbox = ft.Checkbox(
+            label=self.label(item),
+            value=item_id in self.selected,
+            data=item_id,
+            on_change=self._on_check,
+        )
+        if self.detail_label is None:
+            return checkbox
+        
+        detail_field = ft.TextField(
+            label=self.detail_label,
+            value=self.details.get(item_id, ""),
+            width=150,
+            hint_text=self.detail_hint,
+            data=item_id,
+            on_change=self._on_detail_change,
+        )
+        return ft.Row([checkbox, detail_field], spacing=10)
+    
+    def _on_check(self, e):
+        if e.control.value:
+            self.selected.add(e.control.data)
+        else:
+            self.selected.discard(e.control.data)
+    
+    def _on_detail_change(self, e):
+        self.details[e.control.data] = e.control.value
+    
+    def _refresh(self):
+        self.load_page()
+        if self.page:
+            self.update()
+    
+    def reload(self):
+        """Перезагрузить с первой страницы (например, после смены внешнего фильтра)"""
+        self.page_offset = 0
+        self._refresh()
+    
+    def on_search(self, e):
+        """Обработка поиска: начинаем с первой страницы"""
+        self.search_term = e.control.value or ""
+        self.reload()
+    
+    def prev_page(self, e):
+        """Предыдущая страница"""
+        if self.page_offset > 0:
+            self.page_offset = max(0, self.page_offset - self.page_size)
+            self._refresh()
+    
+    def next_page(self, e):
+        """Следующая страница"""
+        self.page_offset += self.page_size
+        self._refresh()
+    
+    def get_selected_details(self, default: str = "") -> dict:
+        """Выбранные записи с дополнительным значением: {id: значение или default}"""
+        return {item_id: self.details.get(item_id) or default for item_id in self.selected}
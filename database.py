@@ -1,9 +1,73 @@
+import threading
 from peewee import *
-from datetime import datetime
+from playhouse.pool import PooledSqliteDatabase
+from datetime import datetime, date, timedelta
+from functools import cached_property
+from operator import attrgetter
 from typing import List, Optional
+from settings.config import DB_MAX_CONNECTIONS, DB_POOL_TIMEOUT, DB_STALE_TIMEOUT, DB_BUSY_TIMEOUT
+from settings.write_executor import WriteExecutor
 
-# Инициализация базы данных
-db = SqliteDatabase(None)
+# Общий для всех сессий пул соединений. Соединения привязаны к потоку:
+# обработчик события Flet получает соединение своего потока из пула.
+# Транзакции сразу берут блокировку записи (BEGIN IMMEDIATE), чтобы ожидание
+# busy_timeout работало и не возникало взаимной блокировки при повышении чтения до записи.
+db = PooledSqliteDatabase(None, lock_type='IMMEDIATE')
+
+# Очередь записи: изменения из всех сессий выполняются по одному
+write_executor = WriteExecutor(db)
+
+_init_lock = threading.Lock()
+_schema_ready = set()
+
+
+def init_database(db_path: str):
+    """
+    Инициализировать пул соединений для файла базы данных
+    
+    Вызывается из каждой сессии, но пул настраивается один раз на процесс:
+    повторный вызов с тем же путем ничего не делает и не мешает
+    соединениям других сессий.
+    """
+    with _init_lock:
+        if db.database == db_path:
+            return
+        if db.database is not None:
+            db.close_all()
+        db.init(
+            db_path,
+            max_connections=DB_MAX_CONNECTIONS,
+            timeout=DB_POOL_TIMEOUT,
+            stale_timeout=DB_STALE_TIMEOUT,
+            # Соединение из пула может достаться другому потоку
+            check_same_thread=False,
+            # WAL: чтение в одних сессиях не блокирует запись в других.
+            # timeout выше — ожидание пула, ожидание блокировки SQLite задает busy_timeout.
+            # foreign_keys: удаление записи каскадно удаляет или обнуляет ссылки на нее
+            pragmas={'journal_mode': 'wal', 'busy_timeout': DB_BUSY_TIMEOUT, 'foreign_keys': 1}
+        )
+
+
+def run_with_connection(func, *args, **kwargs):
+    """Выполнить функцию в фоновом потоке и вернуть соединение потока в пул"""
+    with db.connection_context():
+        return func(*args, **kwargs)
+
+
+def release_handler_connections(page):
+    """
+    Возвращать соединение в пул после каждого синхронного обработчика сессии
+
+    Flet выполняет синхронные обработчики через page.run_thread в общем пуле
+    потоков; без этого каждый поток пула держал бы свое соединение до конца
+    процесса, и при числе потоков больше DB_MAX_CONNECTIONS пул исчерпался бы.
+    """
+    run_thread = page.run_thread
+
+    def run_thread_with_connection(handler, *args, **kwargs):
+        run_thread(run_with_connection, handler, *args, **kwargs)
+
+    page.run_thread = run_thread_with_connection
 
 
 class BaseModel(Model):
@@ -20,7 +84,7 @@ class Teacher(BaseModel):
     middle_name = CharField(null=True)
     phone = CharField(null=True)
     email = CharField(null=True)
-    birth_date = CharField(null=True)
+    birth_date = DateField(null=True)
     address = TextField(null=True)
     education = TextField(null=True)
     experience = IntegerField(null=True)
@@ -35,7 +99,7 @@ class Group(BaseModel):
     group_id = AutoField(primary_key=True)
     group_name = CharField(null=False)
     age_category = CharField(null=False)
-    teacher = ForeignKeyField(Teacher, backref='groups', null=True, column_name='teacher_id')
+    teacher = ForeignKeyField(Teacher, backref='groups', null=True, column_name='teacher_id', on_delete='SET NULL')
     created_at = DateTimeField(default=datetime.now)
     
     class Meta:
@@ -65,7 +129,7 @@ class Child(BaseModel):
     middle_name = CharField(null=True)
     birth_date = DateField(null=False)
     gender = CharField(null=False, constraints=[Check("gender IN ('М', 'Ж')")])
-    group = ForeignKeyField(Group, backref='children', null=True, column_name='group_id')
+    group = ForeignKeyField(Group, backref='children', null=True, column_name='group_id', on_delete='SET NULL')
     enrollment_date = DateField(null=False)
     locker_symbol = CharField(null=True)  # Символ шкафчика
     created_at = DateTimeField(default=datetime.now)
@@ -79,8 +143,8 @@ class Child(BaseModel):
 
 class ParentChild(BaseModel):
     """Модель связи родителя и ребенка"""
-    parent = ForeignKeyField(Parent, backref='parent_children', column_name='parent_id')
-    child = ForeignKeyField(Child, backref='child_parents', column_name='child_id')
+    parent = ForeignKeyField(Parent, backref='parent_children', column_name='parent_id', on_delete='CASCADE')
+    child = ForeignKeyField(Child, backref='child_parents', column_name='child_id', on_delete='CASCADE')
     relationship = CharField(null=False)  # Мама, Папа, Опекун и т.д.
     created_at = DateTimeField(default=datetime.now)
     
@@ -91,8 +155,8 @@ class ParentChild(BaseModel):
 
 class GroupTeacher(BaseModel):
     """Модель связи группы и воспитателя"""
-    group = ForeignKeyField(Group, backref='group_teachers', column_name='group_id')
-    teacher = ForeignKeyField(Teacher, backref='teacher_groups', column_name='teacher_id')
+    group = ForeignKeyField(Group, backref='group_teachers', column_name='group_id', on_delete='CASCADE')
+    teacher = ForeignKeyField(Teacher, backref='teacher_groups', column_name='teacher_id', on_delete='CASCADE')
     created_at = DateTimeField(default=datetime.now)
     
     class Meta:
@@ -103,7 +167,7 @@ class GroupTeacher(BaseModel):
 class AttendanceRecord(BaseModel):
     """Модель записи в журнале посещаемости"""
     record_id = AutoField(primary_key=True)
-    child = ForeignKeyField(Child, backref='attendance_records', column_name='child_id')
+    child = ForeignKeyField(Child, backref='attendance_records', column_name='child_id', on_delete='CASCADE')
     date = DateField(null=False)
     status = CharField(null=False)  # Присутствует, Отсутствует, Болеет
     notes = TextField(null=True)  # Примечания
@@ -120,7 +184,8 @@ class AttendanceRecord(BaseModel):
 class MedicalRecord(BaseModel):
     """Модель медицинской карты ребёнка"""
     record_id = AutoField(primary_key=True)
-    child = ForeignKeyField(Child, backref='medical_records', column_name='child_id')
+    child = ForeignKeyField(Child, backref='medical_records', column_name='child_id', unique=True,
+                            on_delete='CASCADE')
     blood_type = CharField(null=True)  # Группа крови
     allergies = TextField(null=True)  # Аллергии
     chronic_diseases = TextField(null=True)  # Хронические заболевания
@@ -137,13 +202,40 @@ class MedicalRecord(BaseModel):
         table_name = 'medical_records'
 
 
+class Allergy(BaseModel):
+    """Аллерген ребёнка (разобранное поле MedicalRecord.allergies)"""
+    child = ForeignKeyField(Child, backref='allergy_items', column_name='child_id', on_delete='CASCADE')
+    allergen = CharField(null=False)  # Название в нижнем регистре
+    
+    class Meta:
+        table_name = 'child_allergies'
+        primary_key = CompositeKey('child', 'allergen')
+        indexes = (
+            (('allergen', 'child'), True),
+        )
+
+
+class Vaccination(BaseModel):
+    """Прививка ребёнка (разобранное поле MedicalRecord.vaccinations)"""
+    child = ForeignKeyField(Child, backref='vaccination_items', column_name='child_id', on_delete='CASCADE')
+    vaccine = CharField(null=False)  # Название в нижнем регистре
+    
+    class Meta:
+        table_name = 'child_vaccinations'
+        primary_key = CompositeKey('child', 'vaccine')
+        indexes = (
+            (('vaccine', 'child'), True),
+        )
+
+
 class User(BaseModel):
     """Модель пользователя"""
     user_id = AutoField(primary_key=True)
     username = CharField(unique=True, null=False)
     password = CharField(null=False)  # Хеш пароля
     role = CharField(default='admin')  # Роль пользователя
-    group = ForeignKeyField(Group, backref='users', null=True, column_name='group_id')  # Группа для воспитателя
+    group = ForeignKeyField(Group, backref='users', null=True, column_name='group_id',
+                            on_delete='SET NULL')  # Группа для воспитателя
     created_at = DateTimeField(default=datetime.now)
     
     class Meta:
@@ -152,7 +244,7 @@ class User(BaseModel):
 
 class UserPermission(BaseModel):
     """Модель прав доступа пользователя"""
-    user = ForeignKeyField(User, backref='permissions', column_name='user_id')
+    user = ForeignKeyField(User, backref='permissions', column_name='user_id', on_delete='CASCADE')
     page_name = CharField(null=False)  # Название страницы
     can_access = BooleanField(default=True)
     
@@ -173,34 +265,90 @@ class KindergartenDB:
         """
         self.db_path = db_path
         self.connection = None
+    
+    # Классы настроек импортируются и создаются при первом обращении,
+    # чтобы экран входа не загружал модули, которые ему не нужны
+    
+    @cached_property
+    def _children_settings(self):
         from settings.children_settings import ChildrenSettings
+        return ChildrenSettings()
+    
+    @cached_property
+    def _teachers_settings(self):
         from settings.teachers_settings import TeachersSettings
+        return TeachersSettings()
+    
+    @cached_property
+    def _parents_settings(self):
         from settings.parents_settings import ParentsSettings
+        return ParentsSettings()
+    
+    @cached_property
+    def _groups_settings(self):
         from settings.groups_settings import GroupsSettings
+        return GroupsSettings()
+    
+    @cached_property
+    def _attendance_settings(self):
         from settings.attendance_settings import AttendanceSettings
+        return AttendanceSettings()
+    
+    @cached_property
+    def _attendance_archive(self):
+        from settings.attendance_archive import AttendanceArchive
+        return AttendanceArchive()
+    
+    @cached_property
+    def _medical_card_settings(self):
         from settings.medical_card_settings import MedicalCardSettings
-        self._children_settings = ChildrenSettings()
-        self._teachers_settings = TeachersSettings()
-        self._parents_settings = ParentsSettings()
-        self._groups_settings = GroupsSettings()
-        self._attendance_settings = AttendanceSettings()
-        self._medical_card_settings = MedicalCardSettings()
+        return MedicalCardSettings()
+    
+    @cached_property
+    def _locker_settings(self):
+        from settings.locker_settings import LockerSettings
+        return LockerSettings()
+    
+    @cached_property
+    def _statistics(self):
+        from kindergarten_stats import StatisticsSummaries
+        return StatisticsSummaries()
+    
+    @cached_property
+    def _users_settings(self):
+        from settings.users_settings import UsersSettings
+        return UsersSettings()
+    
+    @cached_property
+    def aio(self):
+        """Асинхронный фасад: await db.aio.<метод>(...) выполняет запрос в пуле потоков"""
+        from settings.async_db import AsyncDB
+        return AsyncDB(self)
     
     def connect(self):
         """Установить соединение с базой данных"""
-        db.init(self.db_path)
-        db.connect()
+        init_database(self.db_path)
+        db.connect(reuse_if_open=True)
         self.connection = db
         return self.connection
     
     def close(self):
-        """Закрыть соединение с базой данных"""
+        """Вернуть соединение текущего потока в пул"""
         if db and not db.is_closed():
             db.close()
     
     def create_tables(self):
-        """Создать таблицы в базе данных"""
-        db.create_tables([Teacher, Group, Parent, Child, ParentChild, GroupTeacher, AttendanceRecord, MedicalRecord, User, UserPermission])
+        """Создать таблицы и выполнить миграции (один раз на процесс для файла базы)"""
+        with _init_lock:
+            if self.db_path in _schema_ready:
+                return
+            write_executor.run(self._create_tables)
+            if self.db_path != ':memory:':
+                _schema_ready.add(self.db_path)
+    
+    def _create_tables(self):
+        db.create_tables([Teacher, Group, Parent, Child, ParentChild, GroupTeacher, AttendanceRecord, MedicalRecord,
+                          Allergy, Vaccination, User, UserPermission])
         
         # Миграция: добавляем колонку group_id если её нет
         try:
@@ -214,59 +362,106 @@ class KindergartenDB:
         except:
             pass  # Колонка уже существует
         
-        # Создаем администратора по умолчанию
-        try:
-            User.get(User.username == 'admin')
-        except:
-            import hashlib
-            password_hash = hashlib.sha256('admin'.encode()).hexdigest()
-            User.create(username='admin', password=password_hash, role='admin', group=None)
-        print("Tables created successfully")
-    
-    def __getattr__(self, name):
-        """Динамическое делегирование методов к соответствующим настройкам"""
-        # Методы для работы с воспитателями
-        teacher_methods = ['add_teacher', 'get_all_teachers', 'get_teacher_by_id', 'update_teacher', 'delete_teacher', 'search_teachers']
-        if name in teacher_methods:
-            return getattr(self._teachers_settings, name)
+        # Миграция: внешние ключи с ON DELETE (таблицы пересобираются, «сироты» очищаются)
+        from settings.integrity import ensure_foreign_keys
+        ensure_foreign_keys()
         
-        # Методы для работы с родителями
-        parent_methods = ['add_parent', 'get_all_parents', 'get_parent_by_id', 'update_parent', 'delete_parent', 'search_parents']
-        if name in parent_methods:
-            return getattr(self._parents_settings, name)
+        # Миграция: все даты в ISO (гггг-мм-дд) и индексы для поиска по диапазону дат
+        from settings.date_migration import normalize_dates, ensure_date_indexes
+        normalize_dates()
+        ensure_date_indexes()
         
-        # Методы для работы с группами
-        group_methods = ['add_group', 'get_all_groups', 'get_group_by_id', 'update_group', 'delete_group']
-        if name in group_methods:
-            return getattr(self._groups_settings, name)
+        # Миграция: символ шкафчика уникален в пределах группы
+        self._locker_settings.ensure_locker_constraint()
         
-        # Методы для работы с детьми
-        child_methods = ['add_child', 'get_all_children', 'get_child_by_id', 'get_children_by_group', 'search_children', 
-                        'update_child', 'delete_child', 'transfer_child_to_group', 'bulk_transfer_children', 'get_children_without_group',
-                        'get_used_locker_symbols_in_group']
-        if name in child_methods:
-            return getattr(self._children_settings, name)
+        # Миграция: одна медкарта на ребенка (нужно для upsert)
+        self._medical_card_settings.ensure_child_unique()
         
-        # Методы для работы с посещаемостью
-        attendance_methods = ['add_attendance_record', 'update_attendance_record']
-        if name in attendance_methods:
-            return getattr(self._attendance_settings, name)
+        # Миграция: разобрать текстовые поля аллергий и прививок в таблицы
+        self._medical_card_settings.backfill_health_items()
         
-        # Методы для работы с медицинскими картами
-        medical_methods = ['get_medical_record', 'create_or_update_medical_record']
-        if name in medical_methods:
-            return getattr(self._medical_card_settings, name)
+        # Учет учебных лет, перенесенных в архив (нужен до пересчета сводок)
+        self._attendance_archive.ensure_archive_table()
         
-        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+        # Сводные таблицы статистики и триггеры, которые их поддерживают
+        self._statistics.ensure_summaries()
+        
+        # auto_vacuum = INCREMENTAL включает планировщик очистки в фоне (полный VACUUM
+        # большой базы задержал бы первую сессию), см. settings.retention
+        
+        # Создаем администратора по умолчанию
+        try:
+            User.get(User.username == 'admin')
+        except:
+            from settings.credentials import password_hasher
+            User.create(username='admin', password=password_hasher.hash('admin'), role='admin', group=None)
+        print("Tables created successfully")
     
+    @write_executor
     def add_parent_child_relation(self, parent_id: int, child_id: int, relationship: str):
         """Добавить связь родитель-ребенок"""
         ParentChild.create(parent=parent_id, child=child_id, relationship=relationship)
     
+    @write_executor
     def remove_parent_child_relation(self, parent_id: int, child_id: int):
         """Удалить связь родитель-ребенок"""
         ParentChild.delete().where((ParentChild.parent == parent_id) & (ParentChild.child == child_id)).execute()
     
+    @write_executor
+    def set_child_parents(self, child_id: int, relationships: dict):
+        """
+        Установить родителей ребенка, применив только изменения
+        
+        Args:
+            child_id: ID ребенка
+            relationships: итоговый набор {parent_id: степень родства}
+        """
+        self._sync_parent_child(ParentChild.child, child_id, ParentChild.parent, relationships)
+    
+    @write_executor
+    def set_parent_children(self, parent_id: int, relationships: dict):
+        """
+        Установить детей родителя, применив только изменения
+        
+        Args:
+            parent_id: ID родителя
+            relationships: итоговый набор {child_id: степень родства}
+        """
+        self._sync_parent_child(ParentChild.parent, parent_id, ParentChild.child, relationships)
+    
+    def _sync_parent_child(self, owner_field, owner_id: int, other_field, relationships: dict):
+        """Привести связи родитель-ребенок владельца к заданному набору одной транзакцией"""
+        current = dict(ParentChild
+                      .select(other_field, ParentChild.relationship)
+                      .where(owner_field == owner_id)
+                      .tuples())
+        
+        to_remove = [other_id for other_id in current if other_id not in relationships]
+        to_add = [other_id for other_id in relationships if other_id not in current]
+        
+        # Изменившиеся степени родства группируем по новому значению: одно UPDATE на значение
+        to_update = {}
+        for other_id, relationship in relationships.items():
+            if other_id in current and current[other_id] != relationship:
+                to_update.setdefault(relationship, []).append(other_id)
+        
+        with db.atomic():
+            if to_remove:
+                (ParentChild
+                 .delete()
+                 .where((owner_field == owner_id) & other_field.in_(to_remove))
+                 .execute())
+            if to_add:
+                ParentChild.insert_many([
+                    {owner_field: owner_id, other_field: other_id, ParentChild.relationship: relationships[other_id]}
+                    for other_id in to_add
+                ]).execute()
+            for relationship, other_ids in to_update.items():
+                (ParentChild
+                 .update(relationship=relationship)
+                 .where((owner_field == owner_id) & other_field.in_(other_ids))
+                 .execute())
+    
     def get_children_by_parent(self, parent_id: int):
         """Получить детей родителя"""
         relations = (ParentChild.select(ParentChild, Child, Group).join(Child).join(Group, JOIN.LEFT_OUTER).where(ParentChild.parent == parent_id))
@@ -287,55 +482,107 @@ class KindergartenDB:
             result.append(parent_data)
         return result
     
+    def get_child_bundle(self, child_id: int, attendance_days: int = 30) -> Optional[dict]:
+        """
+        Получить все данные для карточки ребенка за минимальное число запросов
+        
+        Ребенок с группой, родители со степенью родства и медкарта загружаются
+        через prefetch, сводка посещаемости — одним агрегирующим запросом.
+        
+        Args:
+            child_id: ID ребенка
+            attendance_days: за сколько последних дней считать посещаемость
+        
+        Returns:
+            словарь с ключами child, group, parents, medical_record, attendance
+            или None, если ребенок не найден
+        """
+        children = (Child
+                   .select(Child, Group, Teacher)
+                   .join(Group, JOIN.LEFT_OUTER)
+                   .join(Teacher, JOIN.LEFT_OUTER)
+                   .where(Child.child_id == child_id))
+        parent_links = ParentChild.select(ParentChild, Parent).join(Parent)
+        medical_records = MedicalRecord.select()
+        
+        found = prefetch(children, parent_links, medical_records)
+        if not found:
+            return None
+        child = found[0]
+        
+        parents = []
+        for relation in child.child_parents:
+            parent_data = self._parents_settings._parent_to_dict(relation.parent)
+            parent_data['relationship'] = relation.relationship
+            parents.append(parent_data)
+        
+        medical_record = None
+        if child.medical_records:
+            medical_record = self._medical_card_settings._record_to_dict(child.medical_records[0])
+        
+        since = date.today() - timedelta(days=attendance_days)
+        status_counts = (AttendanceRecord
+                        .select(AttendanceRecord.status, fn.COUNT(AttendanceRecord.record_id))
+                        .where((AttendanceRecord.child == child_id) &
+                               (AttendanceRecord.date >= since.strftime("%Y-%m-%d")))
+                        .group_by(AttendanceRecord.status)
+                        .tuples())
+        counts = dict(status_counts)
+        # Начало периода может попасть в учебный год, перенесенный в архив
+        from settings.attendance_archive import archived_rows
+        for (status,) in archived_rows(since.isoformat(), date.today().isoformat(), 'status',
+                                       'child_id = ?', (child_id,)):
+            counts[status] = counts.get(status, 0) + 1
+        
+        return {
+            'child': self._children_settings._child_to_dict(child),
+            'group': self._groups_settings._group_to_dict(child.group) if child.group else None,
+            'parents': parents,
+            'medical_record': medical_record,
+            'attendance': {
+                'since': since.strftime("%Y-%m-%d"),
+                'days': attendance_days,
+                'counts': counts,
+                'total': sum(counts.values())
+            }
+        }
+    
     def get_attendance_by_group_and_date(self, group_id: int, date: str):
         return self._attendance_settings.get_attendance_by_group_and_date(group_id, date, self._children_settings)
     
     def authenticate_user(self, username: str, password: str):
-        """Проверка авторизации пользователя"""
-        import hashlib
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        try:
-            user = User.get((User.username == username) & (User.password == password_hash))
-            return {'user_id': user.user_id, 'username': user.username, 'role': user.role}
-        except:
-            return None
-    
-    def get_user_permissions(self, user_id: int):
-        """Получить права доступа пользователя"""
-        permissions = UserPermission.select().where(UserPermission.user == user_id)
-        return {p.page_name: p.can_access for p in permissions}
-    
-    def set_user_permission(self, user_id: int, page_name: str, can_access: bool):
-        """Установить право доступа"""
-        UserPermission.replace(user=user_id, page_name=page_name, can_access=can_access).execute()
-    
-    def get_all_users(self):
-        """Получить всех пользователей"""
-        users = User.select(User, Group).join(Group, JOIN.LEFT_OUTER)
-        return [{
-            'user_id': u.user_id, 
-            'username': u.username, 
-            'role': u.role,
-            'group_id': u.group.group_id if u.group else None,
-            'group_name': u.group.group_name if u.group else None
-        } for u in users]
-    
-    def set_user_group(self, user_id: int, group_id: int = None):
-        """Установить группу для пользователя"""
-        user = User.get_by_id(user_id)
-        user.group = group_id
-        user.save()
-    
-    def get_user_group(self, user_id: int):
-        """Получить группу пользователя"""
-        try:
-            user = User.select(User, Group).join(Group, JOIN.LEFT_OUTER).where(User.user_id == user_id).get()
-            if user.group:
-                return {'group_id': user.group.group_id, 'group_name': user.group.group_name}
+        """
+        Проверка авторизации пользователя
+        
+        Пользователь ищется по уникальному логину, пароль сверяется с хешем за
+        постоянное время. Хеши старого формата (sha256 без соли) и хеши с
+        устаревшей стоимостью пересчитываются при успешном входе.
+        Вычисление хеша занимает заметное время — вызывать из рабочего потока.
+        """
+        from settings.credentials import password_hasher
+        user = User.get_or_none(User.username == username)
+        if user is None:
+            password_hasher.verify_dummy(password)
             return None
-        except:
+        if not password_hasher.verify(password, user.password):
             return None
-    
+        
+        if password_hasher.needs_rehash(user.password):
+            self.set_user_password(user.user_id, password)
+        return {'user_id': user.user_id, 'username': user.username, 'role': user.role}
+    
+    def set_user_password(self, user_id: int, password: str):
+        """Установить пароль пользователя (сохраняется только соленый хеш)"""
+        from settings.credentials import password_hasher
+        # Хеш вычисляется до постановки в очередь записи, чтобы не задерживать другие сессии
+        query = User.update(password=password_hasher.hash(password)).where(User.user_id == user_id)
+        write_executor.run(query.execute)
+    
+    def get_write_stats(self) -> dict:
+        """Счетчики очереди записи: записи, повторы при блокировках, ошибки и время ожидания"""
+        return write_executor.stats()
+    
+    @write_executor
     def add_group_teacher_relation(self, group_id: int, teacher_id: int):
         """Добавить связь группа-воспитатель"""
         try:
@@ -343,10 +590,40 @@ class KindergartenDB:
         except:
             pass  # Связь уже существует
     
+    @write_executor
     def remove_group_teacher_relation(self, group_id: int, teacher_id: int):
         """Удалить связь группа-воспитатель"""
         GroupTeacher.delete().where((GroupTeacher.group == group_id) & (GroupTeacher.teacher == teacher_id)).execute()
     
+    @write_executor
+    def set_group_teachers(self, group_id: int, teacher_ids):
+        """
+        Установить воспитателей группы, применив только изменения
+        
+        Args:
+            group_id: ID группы
+            teacher_ids: итоговый набор ID воспитателей
+        """
+        teacher_ids = set(teacher_ids)
+        current = {teacher_id for (teacher_id,) in (GroupTeacher
+                                                    .select(GroupTeacher.teacher)
+                                                    .where(GroupTeacher.group == group_id)
+                                                    .tuples())}
+        to_remove = current - teacher_ids
+        to_add = teacher_ids - current
+        
+        with db.atomic():
+            if to_remove:
+                (GroupTeacher
+                 .delete()
+                 .where((GroupTeacher.group == group_id) & GroupTeacher.teacher.in_(list(to_remove)))
+                 .execute())
+            if to_add:
+                GroupTeacher.insert_many([
+                    {GroupTeacher.group: group_id, GroupTeacher.teacher: teacher_id}
+                    for teacher_id in to_add
+                ]).execute()
+    
     def get_teachers_by_group(self, group_id: int):
         """Получить воспитателей группы"""
         relations = GroupTeacher.select(GroupTeacher, Teacher).join(Teacher).where(GroupTeacher.group == group_id)
@@ -373,3 +650,86 @@ class KindergartenDB:
     
 
     
+
+
+# Таблица делегирования: атрибут с классом настроек -> методы, которые
+# KindergartenDB предоставляет от его имени
+SETTINGS_DELEGATES = {
+    # Методы для работы с воспитателями
+    '_teachers_settings': ('add_teacher', 'get_all_teachers', 'get_teacher_by_id', 'update_teacher',
+                           'delete_teacher', 'search_teachers'),
+    # Методы для работы с родителями
+    '_parents_settings': ('add_parent', 'get_all_parents', 'get_parent_by_id', 'update_parent',
+                          'delete_parent', 'search_parents'),
+    # Методы для работы с группами
+    '_groups_settings': ('add_group', 'get_all_groups', 'get_group_by_id', 'update_group', 'delete_group'),
+    # Методы для работы с детьми
+    '_children_settings': ('add_child', 'get_all_children', 'get_child_by_id', 'get_children_by_group',
+                           'search_children', 'update_child', 'delete_child', 'transfer_child_to_group',
+                           'bulk_transfer_children', 'get_children_without_group',
+                           'get_group_candidates', 'update_group_membership', 'get_children_by_age',
+                           'get_children_page',
+                           'get_used_locker_symbols_in_group'),
+    # Методы для работы с посещаемостью
+    '_attendance_settings': ('add_attendance_record', 'update_attendance_record',
+                             'get_group_attendance_statuses'),
+    # Методы для работы с архивом посещаемости (перенос идет порциями через очередь записи)
+    '_attendance_archive': ('get_archived_years', 'get_closed_years', 'archive_attendance', 'archive_year'),
+    # Методы для работы с медицинскими картами
+    '_medical_card_settings': ('get_medical_record', 'create_or_update_medical_record',
+                               'get_children_with_allergies', 'get_children_with_chronic_diseases',
+                               'get_overdue_checkups', 'get_health_summary',
+                               'get_children_with_allergen', 'get_children_with_vaccine',
+                               'get_children_without_vaccine', 'get_allergies_by_groups'),
+    # Методы для работы со шкафчиками
+    '_locker_settings': ('get_locker_index', 'save_locker_assignments', 'auto_assign_lockers'),
+    # Методы для работы со сводной статистикой
+    '_statistics': ('rebuild_statistics', 'snapshot_headcount', 'get_attendance_rollup',
+                    'get_group_composition', 'get_headcount_history', 'get_present_count'),
+    # Методы для работы с пользователями и правами доступа
+    '_users_settings': ('get_user_context', 'invalidate_user_context', 'get_user_permissions',
+                        'set_user_permission', 'set_user_permissions', 'get_all_users',
+                        'set_user_group', 'get_user_group', 'delete_user'),
+}
+
+# Делегаты, изменяющие данные: выполняются через очередь записи
+WRITE_DELEGATES = frozenset({
+    'add_teacher', 'update_teacher', 'delete_teacher',
+    'add_parent', 'update_parent', 'delete_parent',
+    'add_group', 'update_group', 'delete_group',
+    'add_child', 'update_child', 'delete_child', 'transfer_child_to_group', 'bulk_transfer_children',
+    'update_group_membership',
+    'add_attendance_record', 'update_attendance_record',
+    'create_or_update_medical_record',
+    'save_locker_assignments', 'auto_assign_lockers',
+    'rebuild_statistics', 'snapshot_headcount',
+    'set_user_permission', 'set_user_permissions', 'set_user_group', 'delete_user',
+})
+
+
+def _make_delegate(settings_attr: str, method_name: str):
+    """Создать метод KindergartenDB, вызывающий одноименный метод класса настроек"""
+    get_method = attrgetter(f"{settings_attr}.{method_name}")
+    
+    if method_name in WRITE_DELEGATES:
+        def delegate(self, *args, **kwargs):
+            return write_executor.run(get_method(self), *args, **kwargs)
+    else:
+        def delegate(self, *args, **kwargs):
+            return get_method(self)(*args, **kwargs)
+    
+    delegate.__name__ = method_name
+    delegate.__qualname__ = f"{KindergartenDB.__name__}.{method_name}"
+    delegate.__doc__ = f"Делегирует вызов к {settings_attr}.{method_name}"
+    return delegate
+
+
+# Методы создаются один раз при загрузке модуля, а не при каждом обращении
+for _settings_attr, _method_names in SETTINGS_DELEGATES.items():
+    for _method_name in _method_names:
+        if _method_name in vars(KindergartenDB):
+            raise TypeError(f"KindergartenDB.{_method_name} уже определен")
+        setattr(KindergartenDB, _method_name, _make_delegate(_settings_attr, _method_name))
+if WRITE_DELEGATES - {name for names in SETTINGS_DELEGATES.values() for name in names}:
+    raise TypeError("WRITE_DELEGATES содержит методы, которых нет в SETTINGS_DELEGATES")
+del _settings_attr, _method_names, _method_name
@@ -0,0 +1,86 @@
+"""
+Микробенчмарк: накладные расходы вызова метода KindergartenDB
+
+Сравнивает прежнюю диспетчеризацию через __getattr__ (списки методов
+строятся при каждом промахе, поиск линейный) с делегатами, созданными
+при загрузке модуля по SETTINGS_DELEGATES, и с прямым вызовом метода
+класса настроек. Методы настроек заменяются пустыми, поэтому измеряется
+только стоимость вызова. Делегат метода записи (WRITE_DELEGATES) включает
+очередь записи, которой в прежнем пути не было, — это видно в отчете.
+
+Пример:
+    python delegate_benchmark.py --calls 1000000
+"""
+import argparse
+import timeit
+
+from database import KindergartenDB, SETTINGS_DELEGATES, WRITE_DELEGATES
+
+
+class LegacyDispatch:
+    """Прежний фасад: метод ищется в __getattr__ при каждом обращении"""
+
+    def __init__(self, kindergarten_db):
+        self._db = kindergarten_db
+
+    def __getattr__(self, name):
+        # Как в прежнем коде: список методов каждой группы создается заново при каждом промахе
+        for settings_attr, method_names in SETTINGS_DELEGATES.items():
+            methods = [method_name for method_name in method_names]
+            if name in methods:
+                return getattr(getattr(self._db, settings_attr), name)
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+
+def _settings_attr(method_name: str) -> str:
+    return next(attr for attr, names in SETTINGS_DELEGATES.items() if method_name in names)
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+def measure(method_name: str, calls: int) -> dict:
+    """
+    Время одного вызова метода разными способами, нс
+
+    Returns:
+        {'__getattr__': нс, 'делегат': нс, 'напрямую': нс}
+    """
+    kdb = KindergartenDB(':memory:')
+    kdb.connect()
+    settings = getattr(kdb, _settings_attr(method_name))
+    setattr(settings, method_name, _noop)
+    legacy = LegacyDispatch(kdb)
+
+    variants = {
+        '__getattr__': lambda: getattr(legacy, method_name)(1),
+        'делегат': lambda: getattr(kdb, method_name)(1),
+        'напрямую': lambda: getattr(settings, method_name)(1),
+    }
+    # Стоимость самого lambda и getattr вычитается
+    baseline = min(timeit.repeat(lambda: getattr(_noop, '__call__')(1), number=calls, repeat=3))
+    return {name: max(0.0, min(timeit.repeat(call, number=calls, repeat=3)) - baseline) / calls * 1e9
+            for name, call in variants.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Накладные расходы вызова методов KindergartenDB")
+    parser.add_argument('--calls', type=int, default=1_000_000, help="число вызовов в замере")
+    parser.add_argument('--methods', nargs='+',
+                        default=['update_attendance_record', 'get_teacher_by_id', 'get_user_group'],
+                        help="методы для замера: отметка посещаемости, первый и последний в SETTINGS_DELEGATES")
+    args = parser.parse_args()
+
+    print(f"Вызовов в замере: {args.calls}, нс на вызов сверх пустого вызова")
+    print(f"{'метод':<28}{'__getattr__':>12}{'делегат':>10}{'напрямую':>10}")
+    for method_name in args.methods:
+        result = measure(method_name, args.calls)
+        name = f"{method_name}*" if method_name in WRITE_DELEGATES else method_name
+        print(f"{name:<28}{result['__getattr__']:>12.0f}{result['делегат']:>10.0f}{result['напрямую']:>10.0f}")
+    if any(method_name in WRITE_DELEGATES for method_name in args.methods):
+        print("* метод записи: делегат выполняет вызов через очередь записи (write_executor.run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Длительный тест диалогов: тысячи открытий и закрытий в одной сессии
+
+Диалоги показываются так же, как в представлениях: каждый раз с новым
+содержимым, по нескольким типам, плюс элемент оверлея без ключа (как выбор
+даты). Страница Flet подключена к соединению без клиента, поэтому меряются
+размер page.overlay, число элементов в дереве страницы (page.index — зеркало
+дерева клиента) и память Python. С --legacy диалоги открываются старым
+способом (новый AlertDialog в page.overlay на каждый показ) для сравнения.
+
+Тест завершается с кодом 1, если оверлей, дерево или память растут.
+
+Пример:
+    python dialog_soak_test.py --cycles 5000
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+import flet as ft
+from dialogs import get_dialog_manager, show_dialog, open_dialog, close_dialog
+from list_update_benchmark import MeasuringConnection
+
+DIALOG_TYPES = 6
+PICKER_EVERY = 5  # Каждый PICKER_EVERY-й цикл открывается элемент без ключа
+MEMORY_GROWTH_LIMIT = 256 * 1024  # байт между серединой и концом теста
+
+
+def _dialog_props(page, n: int, close):
+    return dict(
+        modal=True,
+        title=ft.Text(f"Диалог {n}"),
+        content=ft.Column([ft.Text(f"Строка {i} диалога {n}") for i in range(5)], tight=True),
+        actions=[ft.ElevatedButton("Сохранить", on_click=lambda e: close()),
+                 ft.TextButton("Отмена", on_click=lambda e: close())]
+    )
+
+
+def _cycle_managed(page, n: int):
+    dialog = None
+
+    def close():
+        close_dialog(page, dialog)
+
+    dialog = show_dialog(page, f"soak.type{n % DIALOG_TYPES}", **_dialog_props(page, n, close))
+    close()
+    if n % PICKER_EVERY == 0:
+        picker = ft.AlertDialog(title=ft.Text(f"Выбор {n}"))
+        open_dialog(page, picker)
+        close_dialog(page, picker)
+
+
+def _cycle_legacy(page, n: int):
+    dialog = None
+
+    def close():
+        page.close(dialog)
+
+    dialog = ft.AlertDialog(**_dialog_props(page, n, close))
+    page.overlay.append(dialog)
+    dialog.open = True
+    page.update()
+    close()
+    if n % PICKER_EVERY == 0:
+        picker = ft.AlertDialog(title=ft.Text(f"Выбор {n}"))
+        page.open(picker)
+        page.close(picker)
+
+
+def _snapshot(page):
+    gc.collect()
+    return {'overlay': len(page.overlay), 'controls': len(page.index),
+            'memory': tracemalloc.get_traced_memory()[0]}
+
+
+def run_soak_test(cycles: int, legacy: bool = False):
+    """Выполнить cycles циклов открытия/закрытия; вернуть снимки (начало, середина, конец)"""
+    conn = MeasuringConnection()
+    page = ft.Page(conn, "soak", asyncio.new_event_loop())
+    page.add(ft.Text("Главная"))
+    cycle = _cycle_legacy if legacy else _cycle_managed
+
+    tracemalloc.start()
+    # Прогрев: кеш диалогов заполняется, дальше размеры меняться не должны
+    for n in range(DIALOG_TYPES * PICKER_EVERY):
+        cycle(page, n)
+    start = _snapshot(page)
+    for n in range(cycles // 2):
+        cycle(page, n)
+    middle = _snapshot(page)
+    for n in range(cycles // 2, cycles):
+        cycle(page, n)
+    end = _snapshot(page)
+    tracemalloc.stop()
+
+    manager = get_dialog_manager(page)
+    return start, middle, end, manager.stats(), conn.sent_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Длительный тест открытия и закрытия диалогов")
+    parser.add_argument('--cycles', type=int, default=5000, help="число циклов открытия/закрытия")
+    parser.add_argument('--legacy', action='store_true', help="старый способ: новый диалог в overlay")
+    args = parser.parse_args()
+
+    start, middle, end, stats, sent = run_soak_test(args.cycles, args.legacy)
+    print(f"Циклов: {args.cycles}{' (legacy)' if args.legacy else ''}")
+    print(f"{'':<10} {'оверлей':>8} {'элементов':>10} {'память, КБ':>11}")
+    for name, snap in (('начало', start), ('середина', middle), ('конец', end)):
+        print(f"{name:<10} {snap['overlay']:>8} {snap['controls']:>10} {snap['memory'] / 1024:>11.0f}")
+    print(f"Отправлено клиенту: {sent / 1024:.0f} КБ")
+    if not args.legacy:
+        print(f"Диалоги: {stats}")
+
+    problems = []
+    if end['overlay'] > start['overlay'] or end['controls'] > start['controls']:
+        problems.append("оверлей или дерево элементов растет")
+    if end['memory'] - middle['memory'] > MEMORY_GROWTH_LIMIT:
+        problems.append(f"память выросла на {(end['memory'] - middle['memory']) / 1024:.0f} КБ")
+    if problems:
+        print("ОШИБКА: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK: размер оверлея, дерева и память стабильны")
+
+
+if __name__ == "__main__":
+    main()
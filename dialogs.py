@@ -1,4 +1,136 @@
+"""
+Диалоги и управление оверлеями страницы
+"""
+import threading
+from collections import OrderedDict
 import flet as ft
+from page_updates import request_update
+from settings.config import MAX_CACHED_DIALOGS
+
+
+class DialogManager:
+    """
+    Жизненный цикл диалогов одной сессии.
+
+    page.open() добавляет элемент в page.overlay и никогда его не удаляет, поэтому
+    каждый показанный диалог оставался в оверлее и в дереве элементов клиента.
+    Менеджер хранит по одному экземпляру диалога на ключ (тип диалога) и при
+    повторном показе только меняет его свойства; закрытые диалоги без ключа
+    удаляются из оверлея. Не более max_cached закешированных диалогов остаются
+    в оверлее — давно не использованные закрытые вытесняются.
+    """
+
+    def __init__(self, page, max_cached: int = MAX_CACHED_DIALOGS):
+        self.page = page
+        self.max_cached = max_cached
+        self._lock = threading.RLock()
+        self._cached = OrderedDict()  # ключ -> диалог, в порядке последнего показа
+        self.reset_stats()
+
+    def dialog(self, key: str, factory=ft.AlertDialog, **props):
+        """Вернуть диалог для ключа key, создав его или обновив свойства"""
+        with self._lock:
+            control = self._cached.get(key)
+            if control is None or not isinstance(control, factory):
+                if control is not None:
+                    self._remove(control)
+                control = factory(**props)
+                self.created += 1
+            else:
+                for name, value in props.items():
+                    setattr(control, name, value)
+                self.reused += 1
+            self._cached[key] = control
+            self._cached.move_to_end(key)
+            self._evict()
+            return control
+
+    def show(self, key: str, factory=ft.AlertDialog, **props):
+        """Показать диалог типа key с указанными свойствами"""
+        control = self.dialog(key, factory, **props)
+        self.open(control)
+        return control
+
+    def open(self, control):
+        """Показать диалог (или другой элемент оверлея с атрибутом open)"""
+        with self._lock:
+            self._prune(keep=control)
+            if control not in self.page.overlay:
+                self.page.overlay.append(control)
+            control.open = True
+            self.opened += 1
+        request_update(self.page)
+
+    def close(self, control):
+        """Закрыть диалог; диалог без ключа будет удален из оверлея"""
+        with self._lock:
+            control.open = False
+            self.closed += 1
+            # Удаляем уже закрытые ранее: только что закрытый должен успеть
+            # получить open=False на клиенте
+            self._prune(keep=control)
+        request_update(self.page)
+
+    def stats(self) -> dict:
+        """Размер оверлея и счетчики показов, переиспользований и удалений"""
+        with self._lock:
+            return {'overlay': len(self.page.overlay), 'cached': len(self._cached),
+                    'opened': self.opened, 'closed': self.closed, 'created': self.created,
+                    'reused': self.reused, 'removed': self.removed}
+
+    def reset_stats(self):
+        self.opened = 0
+        self.closed = 0
+        self.created = 0
+        self.reused = 0
+        self.removed = 0
+
+    def _prune(self, keep=None):
+        """Удалить из оверлея закрытые диалоги, которых нет в кеше"""
+        cached = set(map(id, self._cached.values()))
+        for control in list(self.page.overlay):
+            if (control is not keep and id(control) not in cached
+                    and getattr(control, 'open', None) is False):
+                self._remove(control)
+
+    def _evict(self):
+        """Вытеснить давно не использованные закрытые диалоги сверх max_cached"""
+        for key in list(self._cached):
+            if len(self._cached) <= self.max_cached:
+                break
+            control = self._cached[key]
+            if not getattr(control, 'open', False):
+                del self._cached[key]
+                self._remove(control)
+
+    def _remove(self, control):
+        if control in self.page.overlay:
+            self.page.overlay.remove(control)
+            self.removed += 1
+
+
+def get_dialog_manager(page) -> DialogManager:
+    """Менеджер диалогов сессии (создается при первом обращении)"""
+    manager = getattr(page, 'dialog_manager', None)
+    if manager is None:
+        manager = page.dialog_manager = DialogManager(page)
+    return manager
+
+
+def show_dialog(page, key: str, factory=ft.AlertDialog, **props):
+    """Показать диалог типа key, переиспользуя его экземпляр"""
+    return get_dialog_manager(page).show(key, factory, **props)
+
+
+def open_dialog(page, control):
+    """Показать уже созданный диалог или элемент оверлея"""
+    get_dialog_manager(page).open(control)
+
+
+def close_dialog(page, control):
+    """Закрыть диалог, открытый через менеджер"""
+    get_dialog_manager(page).close(control)
+
 
 def show_confirm_dialog(page, title, content, on_yes, on_no=None, adaptive=True):
     """
@@ -11,11 +143,11 @@ def show_confirm_dialog(page, title, content, on_yes, on_no=None, adaptive=True)
     :param adaptive: использовать ли adaptive-режим
     """
     def handle_yes(e):
-        page.close(dialog)
+        close_dialog(page, dialog)
         if on_yes:
             on_yes(e)
     def handle_no(e):
-        page.close(dialog)
+        close_dialog(page, dialog)
         if on_no:
             on_no(e)
 
@@ -44,10 +176,10 @@ def show_confirm_dialog(page, title, content, on_yes, on_no=None, adaptive=True)
     else:
         actions = material_actions
 
-    dialog = ft.AlertDialog(
+    dialog = show_dialog(
+        page, "confirm",
         adaptive=adaptive,
         title=ft.Text(title),
         content=ft.Text(content),
         actions=actions,
     )
-    page.open(dialog)
@@ -0,0 +1,76 @@
+"""
+Проверка времени запуска: импорт main и отложенная загрузка представлений
+
+Импортирует main в отдельном процессе с python -X importtime, суммирует
+накопленное время модулей верхнего уровня и проверяет, что при запуске
+из представлений загружается только view.login_view — остальные
+импортируются при первом открытии экрана.
+
+Пример:
+    python import_time_check.py --budget 1.0
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Допустимое время импорта main, секунд
+IMPORT_TIME_BUDGET = 1.0
+
+# Представления, которые можно импортировать при запуске
+ALLOWED_VIEWS = {'view', 'view.login_view'}
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure_imports(module: str = 'main') -> list:
+    """
+    Импортировать модуль в новом процессе и разобрать вывод -X importtime
+
+    Returns:
+        [(модуль, собственное время мкс, накопленное время мкс, уровень вложенности)]
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=root, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {module}:\n{result.stderr}")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            imports.append((name, int(own), int(cumulative), (len(indent) - 1) // 2))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка времени импорта main")
+    parser.add_argument('--budget', type=float, default=IMPORT_TIME_BUDGET, help="допустимое время, секунд")
+    parser.add_argument('--top', type=int, default=10, help="сколько самых медленных модулей показать")
+    args = parser.parse_args()
+
+    imports = measure_imports()
+    total = sum(cumulative for _, _, cumulative, level in imports if level == 0) / 1e6
+    views = sorted(name for name, *_ in imports
+                   if (name == 'view' or name.startswith('view.')) and name not in ALLOWED_VIEWS)
+
+    print(f"Модулей: {len(imports)}, время импорта: {total:.3f} с (допустимо {args.budget:.3f} с)")
+    print(f"{'модуль':<40}{'свое, мс':>10}{'всего, мс':>11}")
+    for name, own, cumulative, _ in sorted(imports, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<40}{own / 1000:>10.1f}{cumulative / 1000:>11.1f}")
+
+    problems = []
+    if views:
+        problems.append(f"при запуске импортируются представления: {', '.join(views)}")
+    if total > args.budget:
+        problems.append(f"время импорта {total:.3f} с больше {args.budget:.3f} с")
+    if problems:
+        print("ОШИБКА: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK: импортируется только view.login_view, время в пределах бюджета")
+
+
+if __name__ == "__main__":
+    main()
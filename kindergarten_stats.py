@@ -1,14 +1,12 @@
 """
 Модуль для работы со статистикой детского сада
 """
-from typing import List
-from peewee import fn, Case, JOIN
-
-
-# Импортируем модели локально чтобы избежать циклических зависимостей
-def get_models():
-    from database import Child, Group, Teacher
-    return Child, Group, Teacher
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+from peewee import fn, Case, JOIN, SQL, CharField, IntegerField, CompositeKey
+from database import BaseModel, AttendanceRecord, Child, Group, Teacher, db
+from settings.children_settings import age_between
+from settings.models import calculate_age
 
 
 class KindergartenStatistics:
@@ -17,7 +15,6 @@ class KindergartenStatistics:
     @staticmethod
     def get_group_statistics() -> List[dict]:
         """Получить статистику по группам"""
-        Child, Group, Teacher = get_models()
         query = (Group
                 .select(
                     Group.group_id,
@@ -55,17 +52,11 @@ class KindergartenStatistics:
         Returns:
             список детей
         """
-        Child, Group, Teacher = get_models()
-        # Вычисляем возраст через SQL функцию
-        age_expr = fn.CAST(
-            (fn.julianday('now') - fn.julianday(Child.birth_date)) / 365.25,
-            'INTEGER'
-        )
-        
+        # Возраст переводится в диапазон дат рождения — поиск по индексу
         children = (Child
-                   .select(Child, Group, age_expr.alias('age'))
+                   .select(Child, Group)
                    .join(Group, JOIN.LEFT_OUTER)
-                   .where(age_expr.between(min_age, max_age))
+                   .where(age_between(min_age, max_age))
                    .order_by(Child.birth_date.desc()))
         
         result = []
@@ -79,7 +70,7 @@ class KindergartenStatistics:
                 'gender': child.gender,
                 'group_id': child.group_id if child.group else None,
                 'enrollment_date': child.enrollment_date.isoformat() if hasattr(child.enrollment_date, 'isoformat') else str(child.enrollment_date),
-                'age': child.age
+                'age': calculate_age(str(child.birth_date))
             }
             
             if hasattr(child, 'group') and child.group:
@@ -93,15 +84,19 @@ class KindergartenStatistics:
     @staticmethod
     def get_general_statistics() -> dict:
         """Получить общую статистику"""
-        Child, Group, Teacher = get_models()
-        # Оптимизированный запрос для получения всей статистики за один запрос
-        age_expr = (fn.julianday('now') - fn.julianday(Child.birth_date)) / 365.25
+        # Число детей и средний возраст — по сводке состава: дата рождения
+        # разбирается один раз на строку сводки (дата, группа, пол), а не на ребенка
+        count = GroupCompositionStat.count
+        born = fn.julianday(GroupCompositionStat.birth_date)
+        dated = fn.SUM(Case(None, [(born.is_null(False), count)], 0))
+        age_expr = (fn.julianday('now') - fn.SUM(count * born) / fn.NULLIF(dated, 0)) / 365.25
         
-        stats = (Child
+        stats = (GroupCompositionStat
                 .select(
-                    fn.COUNT(Child.child_id).alias('total_children'),
-                    fn.AVG(age_expr).alias('average_age')
+                    fn.SUM(count).alias('total_children'),
+                    age_expr.alias('average_age')
                 )
+                .where(count > 0)
                 .scalar(as_tuple=True))
         
         total_children, average_age = stats if stats[0] else (0, 0)
@@ -115,4 +110,305 @@ class KindergartenStatistics:
             'total_groups': total_groups,
             'total_teachers': total_teachers,
             'average_age': round(average_age or 0, 1)
-        }
\ No newline at end of file
+        }
+
+class AttendanceDailyStat(BaseModel):
+    """Число отметок посещаемости за день по группе и статусу"""
+    day = CharField()
+    group_id = IntegerField()  # 0 — дети без группы
+    status = CharField()
+    count = IntegerField(default=0)
+    
+    class Meta:
+        table_name = 'stats_attendance_daily'
+        primary_key = CompositeKey('day', 'group_id', 'status')
+        without_rowid = True
+        indexes = (
+            (('group_id', 'day'), False),
+        )
+
+
+class GroupCompositionStat(BaseModel):
+    """Текущий состав групп: число детей по полу и дате рождения"""
+    group_id = IntegerField()  # 0 — дети без группы
+    gender = CharField()
+    birth_date = CharField()  # ISO
+    count = IntegerField(default=0)
+    
+    class Meta:
+        table_name = 'stats_group_composition'
+        primary_key = CompositeKey('group_id', 'gender', 'birth_date')
+        without_rowid = True
+
+
+class GroupHeadcountStat(BaseModel):
+    """Снимок численности группы на день"""
+    day = CharField()
+    group_id = IntegerField()
+    headcount = IntegerField(default=0)
+    boys = IntegerField(default=0)
+    girls = IntegerField(default=0)
+    
+    class Meta:
+        table_name = 'stats_group_headcount'
+        primary_key = CompositeKey('day', 'group_id')
+        without_rowid = True
+
+
+SUMMARY_MODELS = [AttendanceDailyStat, GroupCompositionStat, GroupHeadcountStat]
+
+CHILD_GROUP_SQL = "COALESCE((SELECT group_id FROM children WHERE child_id = {0}), 0)"
+
+
+def _add_attendance_sql(row: str, sign: int) -> str:
+    """Изменить счетчик посещаемости для записи NEW/OLD на sign"""
+    return (f"INSERT INTO stats_attendance_daily (day, group_id, status, count) "
+            f"VALUES ({row}.date, {CHILD_GROUP_SQL.format(row + '.child_id')}, {row}.status, {sign}) "
+            f"ON CONFLICT (day, group_id, status) DO UPDATE SET count = count + excluded.count;")
+
+
+def _move_attendance_sql(child_id: str, group_id: str, sign: int) -> str:
+    """Перенести все отметки ребенка в счетчики группы group_id со знаком sign"""
+    return (f"INSERT INTO stats_attendance_daily (day, group_id, status, count) "
+            f"SELECT date, COALESCE({group_id}, 0), status, {sign} * COUNT(*) FROM attendance_records "
+            f"WHERE child_id = {child_id} GROUP BY date, status "
+            f"ON CONFLICT (day, group_id, status) DO UPDATE SET count = count + excluded.count;")
+
+
+def _add_composition_sql(row: str, sign: int) -> str:
+    """Изменить счетчик состава группы для ребенка NEW/OLD на sign"""
+    return (f"INSERT INTO stats_group_composition (group_id, gender, birth_date, count) "
+            f"VALUES (COALESCE({row}.group_id, 0), COALESCE({row}.gender, ''), "
+            f"COALESCE({row}.birth_date, ''), {sign}) "
+            f"ON CONFLICT (group_id, gender, birth_date) DO UPDATE SET count = count + excluded.count;")
+
+
+# Триггеры поддерживают сводные таблицы при любой записи в attendance_records и children.
+# Посещаемость относится к текущей группе ребенка — как в отчетах по join с children,
+# поэтому при переводе ребенка его отметки переносятся в счетчики новой группы.
+SUMMARY_TRIGGERS = {
+    'stats_attendance_insert': (
+        "AFTER INSERT ON attendance_records",
+        _add_attendance_sql('NEW', 1)),
+    'stats_attendance_delete': (
+        "AFTER DELETE ON attendance_records",
+        _add_attendance_sql('OLD', -1)),
+    'stats_attendance_update': (
+        "AFTER UPDATE OF date, status, child_id ON attendance_records",
+        _add_attendance_sql('OLD', -1) + _add_attendance_sql('NEW', 1)),
+    'stats_child_insert': (
+        "AFTER INSERT ON children",
+        _add_composition_sql('NEW', 1)),
+    # Отметки удаляемого ребенка переносятся в группу 0 до удаления: каскад внешнего
+    # ключа удаляет их раньше AFTER-триггеров, и stats_attendance_delete вычитает их из группы 0
+    'stats_child_before_delete': (
+        "BEFORE DELETE ON children",
+        _move_attendance_sql('OLD.child_id', 'OLD.group_id', -1) +
+        _move_attendance_sql('OLD.child_id', '0', 1)),
+    'stats_child_delete': (
+        "AFTER DELETE ON children",
+        _add_composition_sql('OLD', -1)),
+    'stats_child_update': (
+        "AFTER UPDATE OF group_id, gender, birth_date ON children",
+        _add_composition_sql('OLD', -1) + _add_composition_sql('NEW', 1)),
+    'stats_child_transfer': (
+        "AFTER UPDATE OF group_id ON children WHEN OLD.group_id IS NOT NEW.group_id",
+        _move_attendance_sql('OLD.child_id', 'OLD.group_id', -1) +
+        _move_attendance_sql('NEW.child_id', 'NEW.group_id', 1)),
+}
+
+
+class StatisticsSummaries:
+    """
+    Сводные таблицы статистики и запросы к ним.
+    
+    Посещаемость по дням/группам/статусам и состав групп поддерживаются
+    триггерами SQLite, поэтому отчеты за любой период читают несколько
+    сотен строк сводок вместо всей истории посещаемости.
+    """
+    
+    # Измерения для группировки посещаемости
+    ATTENDANCE_DIMENSIONS = {
+        'day': AttendanceDailyStat.day,
+        'month': fn.SUBSTR(AttendanceDailyStat.day, 1, 7),
+        'year': fn.SUBSTR(AttendanceDailyStat.day, 1, 4),
+        'group_id': AttendanceDailyStat.group_id,
+        'status': AttendanceDailyStat.status,
+    }
+    
+    def ensure_summaries(self):
+        """Создать сводные таблицы и триггеры; при первом запуске заполнить их"""
+        db.create_tables(SUMMARY_MODELS)
+        # Триггеры пересоздаются, чтобы их тела соответствовали текущему коду
+        with db.atomic():
+            for name, (event, body) in SUMMARY_TRIGGERS.items():
+                db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+                db.execute_sql(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+        
+        if not GroupCompositionStat.select().exists() and Child.select().exists():
+            self.rebuild_statistics()
+        self.snapshot_headcount()
+    
+    def rebuild_statistics(self):
+        """Пересчитать сводки посещаемости и состава групп по исходным таблицам и архиву"""
+        from settings.attendance_archive import archived_years, attached
+        group_id = fn.COALESCE(Child.group, 0)
+        with attached(archived_years()) as archives, db.atomic():
+            AttendanceDailyStat.delete().execute()
+            GroupCompositionStat.delete().execute()
+            
+            attendance = (AttendanceRecord
+                          .select(AttendanceRecord.date, group_id, AttendanceRecord.status, fn.COUNT(SQL('*')))
+                          .join(Child, JOIN.LEFT_OUTER, on=(AttendanceRecord.child == Child.child_id))
+                          .group_by(AttendanceRecord.date, group_id, AttendanceRecord.status))
+            AttendanceDailyStat.insert_from(
+                attendance,
+                [AttendanceDailyStat.day, AttendanceDailyStat.group_id,
+                 AttendanceDailyStat.status, AttendanceDailyStat.count]).execute()
+            # Архивные отметки относятся к группе ребенка на момент переноса
+            for alias in archives.values():
+                db.execute_sql(
+                    f"INSERT INTO stats_attendance_daily (day, group_id, status, count) "
+                    f"SELECT date, group_id, status, COUNT(*) FROM {alias}.attendance_records "
+                    f"GROUP BY date, group_id, status "
+                    f"ON CONFLICT (day, group_id, status) DO UPDATE SET count = count + excluded.count")
+            
+            composition = (Child
+                           .select(group_id, fn.COALESCE(Child.gender, ''), fn.COALESCE(Child.birth_date, ''),
+                                   fn.COUNT(SQL('*')))
+                           .group_by(group_id, Child.gender, Child.birth_date))
+            GroupCompositionStat.insert_from(
+                composition,
+                [GroupCompositionStat.group_id, GroupCompositionStat.gender,
+                 GroupCompositionStat.birth_date, GroupCompositionStat.count]).execute()
+    
+    @staticmethod
+    def _headcount_query(day: str):
+        """Численность групп на день по сводке состава: (день, группа, всего, мальчиков, девочек)"""
+        return (GroupCompositionStat
+                .select(SQL(f"'{day}'"), GroupCompositionStat.group_id,
+                        fn.SUM(GroupCompositionStat.count),
+                        fn.SUM(Case(None, [(GroupCompositionStat.gender == 'М', GroupCompositionStat.count)], 0)),
+                        fn.SUM(Case(None, [(GroupCompositionStat.gender == 'Ж', GroupCompositionStat.count)], 0)))
+                .where(GroupCompositionStat.count > 0)
+                .group_by(GroupCompositionStat.group_id))
+    
+    def snapshot_headcount(self, day: date = None):
+        """Записать численность групп на день (по умолчанию сегодня) из сводки состава"""
+        day = (day or date.today()).isoformat()
+        with db.atomic():
+            GroupHeadcountStat.delete().where(GroupHeadcountStat.day == day).execute()
+            GroupHeadcountStat.insert_from(
+                self._headcount_query(day),
+                [GroupHeadcountStat.day, GroupHeadcountStat.group_id, GroupHeadcountStat.headcount,
+                 GroupHeadcountStat.boys, GroupHeadcountStat.girls]).execute()
+    
+    def get_attendance_rollup(self, start: str, end: str, group_ids: Iterable[int] = None,
+                              by: Iterable[str] = ('group_id', 'status')) -> List[dict]:
+        """
+        Свод отметок посещаемости за период
+        
+        Args:
+            start, end: границы периода в ISO (включительно)
+            group_ids: ограничить группами (None — все)
+            by: измерения группировки из ATTENDANCE_DIMENSIONS
+        
+        Returns:
+            [{измерение: значение, ..., 'count': число отметок}]
+        """
+        dimensions = [self.ATTENDANCE_DIMENSIONS[name].alias(name) for name in by]
+        query = (AttendanceDailyStat
+                 .select(*dimensions, fn.SUM(AttendanceDailyStat.count).alias('count'))
+                 .where(AttendanceDailyStat.day.between(start, end) & (AttendanceDailyStat.count != 0)))
+        if group_ids is not None:
+            query = query.where(AttendanceDailyStat.group_id.in_(list(group_ids)))
+        if dimensions:
+            query = query.group_by(*[SQL(f'"{name}"') for name in by]).order_by(*[SQL(f'"{name}"') for name in by])
+        return list(query.dicts())
+    
+    def get_group_composition(self, group_ids: Iterable[int] = None) -> Dict[int, dict]:
+        """Текущий состав групп: численность, мальчики/девочки и распределение по возрасту"""
+        from settings.models import calculate_age
+        
+        query = GroupCompositionStat.select().where(GroupCompositionStat.count > 0)
+        if group_ids is not None:
+            query = query.where(GroupCompositionStat.group_id.in_(list(group_ids)))
+        
+        composition = {}
+        for row in query:
+            group = composition.setdefault(row.group_id, {'headcount': 0, 'boys': 0, 'girls': 0, 'ages': {}})
+            group['headcount'] += row.count
+            if row.gender == 'М':
+                group['boys'] += row.count
+            elif row.gender == 'Ж':
+                group['girls'] += row.count
+            age = calculate_age(row.birth_date)
+            group['ages'][age] = group['ages'].get(age, 0) + row.count
+        return composition
+    
+    def get_headcount_history(self, start: str, end: str, group_ids: Iterable[int] = None) -> List[dict]:
+        """
+        Численность групп по дням периода
+        
+        Снимки записывает планировщик (settings.retention) в дни работы
+        приложения; для дней без снимка берется последний предыдущий.
+        Сегодняшняя численность без снимка берется из сводки состава —
+        метод только читает базу. Читаются снимки периода и один
+        последний снимок до его начала.
+        """
+        today = date.today().isoformat()
+        query = GroupHeadcountStat.select()
+        if group_ids is not None:
+            query = query.where(GroupHeadcountStat.group_id.in_(list(group_ids)))
+        first_day = (query.select(fn.MAX(GroupHeadcountStat.day))
+                     .where(GroupHeadcountStat.day <= start).scalar()) or start
+        query = (query
+                 .where((GroupHeadcountStat.day >= first_day) & (GroupHeadcountStat.day <= end))
+                 .order_by(GroupHeadcountStat.day))
+        
+        snapshots = {}
+        for row in query.tuples():
+            snapshots.setdefault(row[0], {})[row[1]] = row
+        if start <= today <= end and today not in snapshots:
+            rows = self._headcount_query(today)
+            if group_ids is not None:
+                rows = rows.where(GroupCompositionStat.group_id.in_(list(group_ids)))
+            snapshots[today] = {row[1]: row for row in rows.tuples()}
+        
+        history = []
+        current = {}
+        day, last_day = date.fromisoformat(start), date.fromisoformat(end)
+        days = sorted(snapshots)
+        index = 0
+        while day <= last_day:
+            iso_day = day.isoformat()
+            while index < len(days) and days[index] <= iso_day:
+                current = snapshots[days[index]]
+                index += 1
+            history.extend({'day': iso_day, 'group_id': group_id, 'headcount': headcount,
+                            'boys': boys, 'girls': girls}
+                           for _, group_id, headcount, boys, girls in current.values())
+            day += timedelta(days=1)
+        return history
+    
+    def get_present_count(self, day: str = None, group_ids: Iterable[int] = None) -> int:
+        """
+        Число присутствующих детей в группах на день
+        
+        Отметка по умолчанию — «Присутствует», поэтому считаются дети групп
+        за вычетом отметок с другими статусами.
+        """
+        day = day or date.today().isoformat()
+        headcount = (GroupCompositionStat
+                     .select(fn.COALESCE(fn.SUM(GroupCompositionStat.count), 0))
+                     .where(GroupCompositionStat.group_id != 0))
+        absent = (AttendanceDailyStat
+                  .select(fn.COALESCE(fn.SUM(AttendanceDailyStat.count), 0))
+                  .where((AttendanceDailyStat.day == day) &
+                         (AttendanceDailyStat.group_id != 0) &
+                         (AttendanceDailyStat.status != 'Присутствует')))
+        if group_ids is not None:
+            group_ids = list(group_ids)
+            headcount = headcount.where(GroupCompositionStat.group_id.in_(group_ids))
+            absent = absent.where(AttendanceDailyStat.group_id.in_(group_ids))
+        return headcount.scalar() - absent.scalar()
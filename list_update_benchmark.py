@@ -0,0 +1,117 @@
+"""
+Микробенчмарк: размер обновлений при листании списка
+
+Сравнивает пересоздание строк ListTile на каждой странице (как раньше)
+с RecycledList, который переиспользует строки и меняет только их свойства.
+Страница Flet подключается к соединению, которое сериализует сообщения так же,
+как сервер Flet, и считает отправленные байты.
+
+Пример:
+    python list_update_benchmark.py --items 200 --page-size 8
+"""
+import argparse
+import asyncio
+import json
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import CommandEncoder, PageCommandsBatchResponsePayload
+from components import RecycledList
+
+
+class MeasuringConnection(LocalConnection):
+    """Соединение без клиента: считает размер сериализованных сообщений"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent_bytes = 0
+        self.sent_commands = 0
+
+    def send_commands(self, session_id, commands):
+        results = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ("add", "get"):
+                results.append(result)
+            if message:
+                self.sent_commands += 1
+                self.sent_bytes += len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def reset(self):
+        self.sent_bytes = 0
+        self.sent_commands = 0
+
+
+def make_items(count: int):
+    return [{'child_id': i, 'title': f"Фамилия{i} Имя{i} Отчество{i}",
+             'subtitle': f"ДР: 01-0{i % 9 + 1}-2020 | {i % 6 + 1} лет | Мальчик | Группа {i % 10}"}
+            for i in range(count)]
+
+
+def describe(item):
+    return {'title': item['title'], 'subtitle': item['subtitle']}
+
+
+def create_tile(item):
+    """Строка так, как ее строили представления до RecycledList"""
+    return ft.ListTile(
+        title=ft.Text(item['title'], weight=ft.FontWeight.BOLD),
+        subtitle=ft.Text(item['subtitle']),
+        on_click=lambda _, cid=item['child_id']: None,
+        trailing=ft.IconButton(icon=ft.Icons.DELETE, tooltip="Удалить",
+                               on_click=lambda _, cid=item['child_id']: None)
+    )
+
+
+def flip_pages(page, conn, show_page, pages):
+    """Пролистать страницы и вернуть (байт, сообщений) на одну смену страницы"""
+    show_page(pages[0])
+    page.update()
+    conn.reset()
+    for items in pages[1:]:
+        show_page(items)
+        page.update()
+    flips = len(pages) - 1
+    return conn.sent_bytes / flips, conn.sent_commands / flips
+
+
+def run_benchmark(item_count: int, page_size: int):
+    items = make_items(item_count)
+    pages = [items[i:i + page_size] for i in range(0, len(items), page_size)]
+    results = {}
+
+    conn = MeasuringConnection()
+    page = ft.Page(conn, "bench", asyncio.new_event_loop())
+    rebuilt = ft.ListView()
+    page.add(rebuilt)
+
+    def rebuild(page_items):
+        rebuilt.controls = [create_tile(item) for item in page_items]
+
+    results['пересоздание'] = flip_pages(page, conn, rebuild, pages)
+
+    conn = MeasuringConnection()
+    page = ft.Page(conn, "bench", asyncio.new_event_loop())
+    recycled = RecycledList(describe=describe, on_open=lambda item: None, on_delete=lambda item: None,
+                            title_weight=ft.FontWeight.BOLD)
+    page.add(recycled)
+    results['RecycledList'] = flip_pages(page, conn, recycled.show, pages)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Размер обновлений при листании списка")
+    parser.add_argument('--items', type=int, default=200, help="число записей")
+    parser.add_argument('--page-size', type=int, default=8, help="записей на странице")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.items, args.page_size)
+    print(f"Записей: {args.items}, на странице: {args.page_size}")
+    for name, (size, messages) in results.items():
+        print(f"{name:<14} {size:>8.0f} байт и {messages:.1f} сообщений на смену страницы")
+    before, after = results['пересоздание'][0], results['RecycledList'][0]
+    print(f"Уменьшение: в {before / after:.1f} раза")
+
+
+if __name__ == "__main__":
+    main()
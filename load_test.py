@@ -0,0 +1,216 @@
+"""
+Нагрузочный тест: N одновременных сессий работают с одной базой данных
+
+Каждая сессия выполняется в своем потоке так же, как сессия веб-версии:
+создает свой KindergartenDB, входит в систему и в течение заданного
+времени выполняет типичные операции экранов. По итогам выводится
+пропускная способность, задержки по операциям и ошибки.
+
+С --handlers N шаги всех сессий выполняются как обработчики событий Flet:
+в общем пуле из N потоков, соединение возвращается в пул после каждого шага.
+--over-pool запускает вдвое больше сессий, чем DB_MAX_CONNECTIONS, и
+завершается с ошибкой, если пул соединений исчерпан.
+
+Пример:
+    python load_test.py --sessions 20 --duration 30
+    python load_test.py --over-pool
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from database import KindergartenDB, db, write_executor, init_database, run_with_connection
+from settings.config import DATABASE_NAME, DB_MAX_CONNECTIONS, FLET_HANDLER_WORKERS
+
+
+def _list_children(kdb, ctx):
+    kdb.get_all_children()
+
+
+def _search_parents(kdb, ctx):
+    kdb.search_parents(random.choice(ctx['terms']), limit=10, offset=0)
+
+
+def _child_bundle(kdb, ctx):
+    kdb.get_child_bundle(random.choice(ctx['child_ids']))
+
+
+def _group_candidates(kdb, ctx):
+    kdb.get_group_candidates(random.choice(ctx['group_ids']), limit=10)
+
+
+def _mark_attendance(kdb, ctx):
+    kdb.update_attendance_record(random.choice(ctx['child_ids']), date.today().isoformat(),
+                                 random.choice(['Присутствует', 'Отсутствует', 'Болеет']))
+
+
+def _attendance_rollup(kdb, ctx):
+    kdb.get_attendance_rollup('2000-01-01', date.today().isoformat(), by=('group_id', 'status'))
+
+
+def _user_context(kdb, ctx):
+    kdb.get_user_context(ctx['user_id'])
+
+
+# Операции сессии и их относительная частота
+OPERATIONS = [
+    (_list_children, 5),
+    (_search_parents, 4),
+    (_child_bundle, 4),
+    (_group_candidates, 2),
+    (_mark_attendance, 3),
+    (_attendance_rollup, 2),
+    (_user_context, 5),
+]
+
+
+class LoadStats:
+    """Потокобезопасный сбор задержек и ошибок"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            self.latencies[name].append(seconds)
+
+    def error(self, name: str, ex: Exception):
+        with self.lock:
+            self.errors[f"{name}: {type(ex).__name__}: {ex}"] += 1
+
+
+def simulate_session(db_path: str, username: str, password: str, deadline: float, stats: LoadStats,
+                     handlers: ThreadPoolExecutor = None):
+    """
+    Одна сессия: вход и случайные операции до истечения времени
+
+    Args:
+        handlers: общий пул потоков обработчиков; без него сессия все время
+            держит соединение своего потока
+    """
+    kdb = KindergartenDB(db_path)
+
+    def handle(func, *args):
+        if handlers is None:
+            return func(*args)
+        return handlers.submit(run_with_connection, func, *args).result()
+
+    try:
+        handle(kdb.connect)
+        handle(kdb.create_tables)
+
+        started = time.perf_counter()
+        user = handle(kdb.authenticate_user, username, password)
+        stats.record('login', time.perf_counter() - started)
+        if not user:
+            stats.error('login', ValueError("неверный логин или пароль"))
+            return
+
+        ctx = {
+            'user_id': user['user_id'],
+            'child_ids': [c['child_id'] for c in handle(kdb.get_all_children)] or [0],
+            'group_ids': [g['group_id'] for g in handle(kdb.get_all_groups)] or [0],
+            'terms': ['', 'а', 'ов', 'ин', 'е'],
+        }
+        operations, weights = zip(*OPERATIONS)
+        while time.perf_counter() < deadline:
+            operation = random.choices(operations, weights)[0]
+            name = operation.__name__.lstrip('_')
+            started = time.perf_counter()
+            try:
+                handle(operation, kdb, ctx)
+                stats.record(name, time.perf_counter() - started)
+            except Exception as ex:
+                stats.error(name, ex)
+    except Exception as ex:
+        stats.error('session', ex)
+    finally:
+        kdb.close()
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_load_test(sessions: int, duration: float, db_path: str, username: str, password: str,
+                  handlers: int = 0) -> LoadStats:
+    """
+    Запустить sessions одновременных сессий на duration секунд
+
+    Args:
+        handlers: размер общего пула потоков обработчиков (0 — без пула)
+    """
+    stats = LoadStats()
+    init_database(db_path)
+    pool = ThreadPoolExecutor(max_workers=handlers, thread_name_prefix='handler') if handlers else None
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=simulate_session,
+                                args=(db_path, username, password, deadline, stats, pool))
+               for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if pool is not None:
+        pool.shutdown()
+    return stats
+
+
+def print_report(stats: LoadStats, sessions: int, duration: float):
+    total = sum(len(values) for name, values in stats.latencies.items() if name != 'login')
+    errors = sum(stats.errors.values())
+    print(f"Сессий: {sessions}, длительность: {duration:.0f} с")
+    print(f"Операций: {total}, пропускная способность: {total / duration:.1f} оп/с, ошибок: {errors}")
+    print(f"Соединений в пуле: {len(db._connections)} свободных, {len(db._in_use)} занято "
+          f"(не больше {DB_MAX_CONNECTIONS})")
+    print(f"{'операция':<20}{'кол-во':>8}{'p50, мс':>10}{'p95, мс':>10}")
+    for name, values in sorted(stats.latencies.items()):
+        print(f"{name:<20}{len(values):>8}{percentile(values, 0.5) * 1000:>10.1f}{percentile(values, 0.95) * 1000:>10.1f}")
+    write_stats = write_executor.stats()
+    print(f"Записей: {write_stats['writes']}, повторов: {write_stats['retries']}, ошибок записи: {write_stats['failures']}, "
+          f"ожидание очереди: {write_stats['queue_wait']:.1f} с (макс. {write_stats['max_queue_wait'] * 1000:.0f} мс), "
+          f"паузы повторов: {write_stats['retry_wait']:.1f} с")
+    for message, count in stats.errors.most_common():
+        print(f"ОШИБКА x{count}: {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест одновременных сессий")
+    parser.add_argument('--sessions', type=int, default=10, help="число одновременных сессий")
+    parser.add_argument('--duration', type=float, default=10, help="длительность, секунд")
+    parser.add_argument('--db', default=None, help="файл базы (по умолчанию — копия рабочей базы)")
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--handlers', type=int, default=FLET_HANDLER_WORKERS,
+                        help="потоков обработчиков, как у Flet (0 — соединение на сессию)")
+    parser.add_argument('--over-pool', action='store_true',
+                        help=f"сессий вдвое больше DB_MAX_CONNECTIONS ({DB_MAX_CONNECTIONS})")
+    args = parser.parse_args()
+    if args.over_pool:
+        args.sessions = DB_MAX_CONNECTIONS * 2
+
+    db_path = args.db
+    if db_path is None:
+        # Тест пишет в базу, поэтому по умолчанию работаем с копией
+        db_path = os.path.join(tempfile.mkdtemp(), 'kindergarten_load.db')
+        shutil.copy(DATABASE_NAME, db_path)
+
+    stats = run_load_test(args.sessions, args.duration, db_path, args.username, args.password, args.handlers)
+    print_report(stats, args.sessions, args.duration)
+    if args.over_pool and stats.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,20 @@
 """
 import flet as ft
 import os
-from database import KindergartenDB
-from view.children_view import ChildrenView
-from view.groups_view import GroupsView
-from view.teachers_view import TeachersView
-from view.parents_view import ParentsView
-from view.attendance_view import AttendanceView
-from view.electronic_journal_view import ElectronicJournalView
-from view.events_view import EventsView
-from view.settings_view import SettingsView
-from view.home_view import HomeView
+import importlib
+from functools import partial
+from database import KindergartenDB, run_with_connection, release_handler_connections
 from view.login_view import LoginView
-from view.users_view import UsersView
-from view.logs_view import LogsView
-from navigation_drawer import AppNavigationDrawer
-from settings.config import APP_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT, DATABASE_NAME
-from settings.logger import app_logger
+from settings.config import APP_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT, DATABASE_NAME, RESIZE_UPDATE_INTERVAL
+from page_updates import install_update_scheduler, request_update
+from dialogs import get_dialog_manager
+from settings.retention import start_retention_scheduler
 
 
+def load_view_class(module_name: str, class_name: str):
+    """Импортировать класс представления при первом обращении к нему"""
+    return getattr(importlib.import_module(module_name), class_name)
+
 def main(page: ft.Page):
     """Главная функция приложения"""
     import sys
@@ -39,15 +35,38 @@ def main(page: ft.Page):
     page.window.height = WINDOW_HEIGHT
     page.padding = 0
     
-    # Обработчик изменения размера окна
+    # Обновления страницы объединяются: одно отправление на кадр
+    update_scheduler = install_update_scheduler(page)
+    # Диалоги переиспользуются по типу, закрытые удаляются из оверлея
+    dialog_manager = get_dialog_manager(page)
+    
+    # Обработчик изменения размера окна: не чаще раза за RESIZE_UPDATE_INTERVAL
     def on_resize(e):
-        try:
-            page.update()
-        except:
-            pass
+        request_update(page, delay=RESIZE_UPDATE_INTERVAL)
     
     page.on_resized = on_resize
     
+    # Соединение потока возвращается в пул после каждого обработчика событий
+    release_handler_connections(page)
+    
+    # Один объект доступа к данным на сессию: пул соединений общий для процесса,
+    # а кеши (контекст пользователя) принадлежат только этой сессии
+    db = KindergartenDB(DATABASE_NAME)
+    db.connect()
+    db.create_tables()
+    # Очистка устаревших данных в фоне: один поток на процесс для всех сессий
+    start_retention_scheduler()
+    
+    def end_session(e):
+        """Освободить ресурсы сессии при отключении клиента"""
+        from settings.logger import app_logger
+        update_scheduler.close()
+        app_logger.log_to_file(f"Session closed: page updates {update_scheduler.stats()}")
+        app_logger.log_to_file(f"Session closed: dialogs {dialog_manager.stats()}")
+    
+    page.on_disconnect = end_session
+    page.on_close = end_session
+    
     # Загружаем сохраненную тему
     saved_theme = page.client_storage.get("app_theme")
     if saved_theme == "dark":
@@ -57,10 +76,14 @@ def main(page: ft.Page):
 
     def logout():
         """Выход из системы"""
+        from settings.logger import app_logger
         username = page.client_storage.get("username")
         app_logger.log('LOGOUT', username)
+        user_id = page.client_storage.get("user_id")
         page.client_storage.remove("is_logged_in")
         page.client_storage.remove("username")
+        if user_id:
+            db.invalidate_user_context(user_id)
         show_login()
     
     # Текст с именем пользователя
@@ -98,7 +121,7 @@ def main(page: ft.Page):
         theme_value = "dark" if page.theme_mode == ft.ThemeMode.DARK else "light"
         page.client_storage.set("app_theme", theme_value)
         
-        page.update()
+        request_update(page)
 
     theme_switch = ft.Switch(
         label="Тема приложения",
@@ -109,15 +132,10 @@ def main(page: ft.Page):
     
     def show_login():
         """Показать экран авторизации"""
-        # Инициализируем базу данных для авторизации
-        db = KindergartenDB(DATABASE_NAME)
-        db.connect()
-        db.create_tables()
-        
         page.controls.clear()
         login_view = LoginView(show_main_app, db, page)
         page.add(login_view)
-        page.update()
+        request_update(page)
     
     def show_main_app():
         """Показать основное приложение"""
@@ -126,40 +144,36 @@ def main(page: ft.Page):
         username_text.value = f"Пользователь: {username}" if username else ""
         
         page.controls.clear()
-        init_main_app(page, header_container, theme_switch)
-        page.update()
+        init_main_app(page, header_container, theme_switch, db)
+        request_update(page)
     
     # Всегда показываем экран авторизации при запуске
     show_login()
 
-def init_main_app(page, header_container, theme_switch):
+def init_main_app(page, header_container, theme_switch, db):
     """Инициализация основного приложения"""
     try:
-        # Инициализация базы данных
-        db = KindergartenDB(DATABASE_NAME)
-        db.connect()
-        db.create_tables()
-        
-        # Проверяем роль пользователя
-        user_role = page.client_storage.get("user_role")
+        # Пользователь, его группа и права доступа загружаются одним запросом
+        # и кешируются для всех сессий до изменения группы или прав
         user_id = page.client_storage.get("user_id")
-        is_admin = user_role == "admin"
+        user_context = db.get_user_context(user_id) if user_id else None
+        if user_context:
+            is_admin = user_context.is_admin
+        else:
+            is_admin = page.client_storage.get("user_role") == "admin"
         
-        # Получаем группу пользователя
-        user_group = db.get_user_group(user_id) if user_id and not is_admin else None
-        user_group_id = user_group['group_id'] if user_group else None
+        user_group_id = user_context.group_id if user_context and not is_admin else None
         
         print(f"DEBUG: user_id={user_id}, is_admin={is_admin}, user_group_id={user_group_id}")
         
-        # Получаем права доступа пользователя
-        user_permissions = db.get_user_permissions(user_id) if user_id and not is_admin else {}
+        user_permissions = dict(user_context.permissions) if user_context and not is_admin else {}
     except Exception as ex:
         print(f"ERROR in init_main_app: {ex}")
         import traceback
         traceback.print_exc()
         page.snack_bar = ft.SnackBar(content=ft.Text(f"Ошибка инициализации: {str(ex)}"), bgcolor=ft.Colors.ERROR)
         page.snack_bar.open = True
-        page.update()
+        request_update(page)
         return
     
     # Контейнер для текущего представления
@@ -168,138 +182,118 @@ def init_main_app(page, header_container, theme_switch):
     # Добавляем ссылку на контейнер в page для доступа из представлений
     page.content_area = content_container
     
-    # Создаем представления
-    try:
-        home_view = HomeView(db, lambda: refresh_current_view(), page, user_group_id)
-        children_view = ChildrenView(db, lambda: refresh_current_view(), page, user_group_id)
-        groups_view = GroupsView(db, lambda: refresh_current_view(), page, user_group_id)
-        teachers_view = TeachersView(db, lambda: refresh_current_view(), page, user_group_id)
-        parents_view = ParentsView(db, lambda: refresh_current_view(), page, user_group_id)
-        attendance_view = AttendanceView(db, lambda: refresh_current_view(), page, user_group_id)
-        events_view = EventsView(db, lambda: refresh_current_view(), page, user_group_id)
-        settings_view = SettingsView(page, theme_switch, db)
-        users_view = UsersView(db, lambda: refresh_current_view(), page) if is_admin else None
-        logs_view = LogsView(page) if is_admin else None
-        print("DEBUG: All views created successfully")
-    except Exception as ex:
-        print(f"ERROR creating views: {ex}")
-        import traceback
-        traceback.print_exc()
-        page.snack_bar = ft.SnackBar(content=ft.Text(f"Ошибка создания представлений: {str(ex)}"), bgcolor=ft.Colors.ERROR)
-        page.snack_bar.open = True
-        page.update()
-        return
+    # Фабрики представлений: каждое представление создается при первом переходе
+    # на него и затем переиспользуется
+    view_factories = {
+        "home": lambda: load_view_class("view.home_view", "HomeView")(db, lambda: refresh_current_view(), page, user_group_id),
+        "children": lambda: load_view_class("view.children_view", "ChildrenView")(db, lambda: refresh_current_view(), page, user_group_id),
+        "groups": lambda: load_view_class("view.groups_view", "GroupsView")(db, lambda: refresh_current_view(), page, user_group_id),
+        "teachers": lambda: load_view_class("view.teachers_view", "TeachersView")(db, lambda: refresh_current_view(), page, user_group_id),
+        "parents": lambda: load_view_class("view.parents_view", "ParentsView")(db, lambda: refresh_current_view(), page, user_group_id),
+        "attendance": lambda: load_view_class("view.attendance_view", "AttendanceView")(db, lambda: refresh_current_view(), page, user_group_id),
+        "electronic_journal": lambda: load_view_class("view.electronic_journal_view", "ElectronicJournalView")(db, lambda: refresh_current_view(), page),
+        "events": lambda: load_view_class("view.events_view", "EventsView")(db, lambda: refresh_current_view(), page, user_group_id),
+        "settings": lambda: load_view_class("view.settings_view", "SettingsView")(page, theme_switch, db),
+        "users": (lambda: load_view_class("view.users_view", "UsersView")(db, lambda: refresh_current_view(), page)) if is_admin else None,
+        "logs": (lambda: load_view_class("view.logs_view", "LogsView")(page)) if is_admin else None,
+    }
+    
+    # Методы загрузки данных для каждого представления
+    # (асинхронные загрузчики запускаются задачей в цикле событий сессии)
+    view_loaders = {
+        "home": lambda v: v.load_home(),
+        "children": lambda v: page.run_task(v.load_children),
+        "groups": lambda v: v.load_groups(),
+        "teachers": lambda v: v.load_teachers(),
+        "parents": lambda v: v.load_parents(),
+        "attendance": lambda v: page.run_task(v.load_attendance),
+        "electronic_journal": lambda v: page.run_task(v.build_journal),
+        "events": lambda v: v.load_events(),
+        "settings": lambda v: v.load_settings(),
+        "users": lambda v: v.load_users(),
+        "logs": lambda v: page.run_task(v.load_logs),
+    }
+    
+    # Уже созданные представления
+    views = {}
     
-    # Создаем electronic_journal_view после добавления страницы
-    electronic_journal_view = None
+    def get_view(view_name):
+        """Получить представление, создав его при первом обращении"""
+        if view_name in views:
+            return views[view_name]
+        factory = view_factories.get(view_name)
+        if not factory:
+            return None
+        try:
+            view = factory()
+        except Exception as ex:
+            print(f"ERROR creating view {view_name}: {ex}")
+            import traceback
+            traceback.print_exc()
+            page.snack_bar = ft.SnackBar(content=ft.Text(f"Ошибка создания представления: {str(ex)}"), bgcolor=ft.Colors.ERROR)
+            page.snack_bar.open = True
+            request_update(page)
+            return None
+        views[view_name] = view
+        return view
     
-    # Текущее представление
-    current_view = [home_view]
+    # Имя текущего представления
+    current_view = [None]
     
     def refresh_current_view():
         """Обновить текущее представление"""
-        if current_view[0] == home_view:
-            home_view.load_home()
-        elif current_view[0] == children_view:
-            children_view.load_children()
-        elif current_view[0] == groups_view:
-            groups_view.load_groups()
-        elif current_view[0] == teachers_view:
-            teachers_view.load_teachers()
-        elif current_view[0] == parents_view:
-            parents_view.load_parents()
-        elif current_view[0] == attendance_view:
-            attendance_view.load_attendance()
-        elif current_view[0] == electronic_journal_view:
-            if hasattr(electronic_journal_view, 'build_journal'):
-                electronic_journal_view.build_journal()
-        elif current_view[0] == settings_view:
-            settings_view.load_settings()
-        elif current_view[0] == users_view:
-            if users_view:
-                users_view.load_users()
-        elif current_view[0] == logs_view:
-            if logs_view:
-                logs_view.load_logs()
+        view_name = current_view[0]
+        view = views.get(view_name)
+        if view is not None:
+            view_loaders[view_name](view)
     
-    def switch_view(view_name, e=None):
+    def switch_view(view_name, e=None, load=True):
         """Переключить представление"""
         # Проверяем права доступа (кроме settings, users и logs)
         if not is_admin and view_name not in ["settings", "users", "logs"]:
-            if not user_permissions.get(view_name, True):
+            context = db.get_user_context(user_id) if user_id else None
+            if context and (context.group_id != user_group_id or context.permissions != user_permissions):
+                # Администратор изменил группу или права: представления и меню
+                # созданы для прежних, поэтому приложение собирается заново
+                page.controls.clear()
+                init_main_app(page, header_container, theme_switch, db)
+                request_update(page)
+                return
+            if context and not context.can_access(view_name):
                 page.snack_bar = ft.SnackBar(
                     content=ft.Text("У вас нет доступа к этой странице"),
                     bgcolor=ft.Colors.ERROR
                 )
                 page.snack_bar.open = True
-                page.update()
+                request_update(page)
                 return
         
-        view_map = {
-            "home": home_view,
-            "children": children_view,
-            "groups": groups_view,
-            "teachers": teachers_view,
-            "parents": parents_view,
-            "attendance": attendance_view,
-            "electronic_journal": electronic_journal_view,
-            "events": events_view,
-            "settings": settings_view,
-            "users": users_view,
-            "logs": logs_view
-        }
-        
-        view = view_map.get(view_name)
+        view = get_view(view_name)
         if not view:
             return
             
-        current_view[0] = view
+        current_view[0] = view_name
         content_container.content = view
         
         # Загрузить данные для представления
-        if view == home_view:
-            home_view.load_home()
-        elif view == children_view:
-            children_view.load_children()
-        elif view == groups_view:
-            groups_view.load_groups()
-        elif view == teachers_view:
-            teachers_view.load_teachers()
-        elif view == parents_view:
-            parents_view.load_parents()
-        elif view == attendance_view:
-            attendance_view.load_attendance()
-        elif view == electronic_journal_view:
-            electronic_journal_view.page = page
-            if hasattr(electronic_journal_view, 'build_journal'):
-                electronic_journal_view.build_journal()
-        elif view == events_view:
-            events_view.load_events()
-        elif view == settings_view:
-            settings_view.load_settings()
-        elif view == users_view:
-            if users_view:
-                users_view.load_users()
-        elif view == logs_view:
-            if logs_view:
-                logs_view.load_logs()
+        if load:
+            view_loaders[view_name](view)
         
         page.drawer.open = False
-        page.update()
-
-
+        request_update(page)
 
+    from navigation_drawer import AppNavigationDrawer
     page.drawer = AppNavigationDrawer(switch_view, is_admin, user_permissions)
     
     # Добавляем элементы на страницу
     page.add(header_container, ft.Divider(), content_container)
     
-    # Создаем electronic_journal_view после инициализации страницы
-    electronic_journal_view = ElectronicJournalView(db, lambda: refresh_current_view(), page)
-    
-    # Загружаем начальное представление
-    switch_view("home")
+    # Показываем домашнюю страницу сразу, а статистику загружаем после первой отрисовки
+    switch_view("home", load=False)
+    if current_view[0] == "home":
+        page.run_thread(views["home"].load_statistics)
 
 
 if __name__ == "__main__":
-    ft.app(target=main)
+    # Запуск сессии тоже выполняется в пуле потоков Flet: соединение возвращается по его окончании
+    ft.app(target=partial(run_with_connection, main))
@@ -3,6 +3,7 @@
 """
 import flet as ft
 from typing import Callable
+from page_updates import request_update
 
 
 class AppNavigationDrawer(ft.NavigationDrawer):
@@ -82,4 +83,4 @@ class AppNavigationDrawer(ft.NavigationDrawer):
         """Обработчик изменения состояния drawer"""
         self.open = False
         if self.page:
-            self.page.update()
\ No newline at end of file
+            request_update(self.page)
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Объединение обновлений страницы: одно page.update() на кадр вместо нескольких за действие
+"""
+import threading
+from settings.config import UPDATE_FRAME_INTERVAL
+
+
+class UpdateScheduler:
+    """
+    Планировщик обновлений страницы одной сессии.
+
+    request() только отмечает страницу или отдельные элементы как измененные
+    и планирует отправку через UPDATE_FRAME_INTERVAL секунд в цикле событий
+    сессии. Все запросы, пришедшие до отправки, объединяются в один diff,
+    поэтому цепочка «сохранить → перезагрузить список → обновить экран»
+    отправляет клиенту одно обновление. Запрос с большей задержкой (например,
+    при изменении размера окна) работает как ограничитель частоты.
+    """
+
+    def __init__(self, page, interval: float = UPDATE_FRAME_INTERVAL):
+        self.page = page
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._page_dirty = False
+        self._dirty_controls = []
+        self._scheduled = False
+        self._handle = None
+        self._closed = False
+        self.reset_stats()
+
+    def request(self, *controls, delay: float = None):
+        """Отметить страницу (или только переданные элементы) для обновления"""
+        with self._lock:
+            if self._closed:
+                return
+            self.requests += 1
+            if controls:
+                self._dirty_controls.extend(c for c in controls if c not in self._dirty_controls)
+            else:
+                self._page_dirty = True
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        loop = self.page.loop
+        if loop is None or loop.is_closed():
+            self.flush()
+        else:
+            loop.call_soon_threadsafe(self._schedule, self.interval if delay is None else delay)
+
+    def flush(self):
+        """Отправить накопленные изменения одним обновлением"""
+        with self._lock:
+            self._scheduled = False
+            self._handle = None
+            page_dirty, controls = self._page_dirty, self._dirty_controls
+            self._page_dirty, self._dirty_controls = False, []
+            if self._closed:
+                return
+            # Обновление страницы включает все ее элементы; отдельные элементы —
+            # только те, что еще на странице
+            controls = [] if page_dirty else [c for c in controls if c.page is not None]
+            if not page_dirty and not controls:
+                return
+            self.flushes += 1
+
+        try:
+            self.page.update(*controls)
+        except Exception as ex:
+            print(f"Ошибка обновления страницы: {ex}")
+
+    def close(self):
+        """Отменить запланированное обновление (сессия закрыта)"""
+        with self._lock:
+            self._closed = True
+            handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.cancel()
+
+    def stats(self) -> dict:
+        """Запрошено обновлений, отправлено diff'ов и сколько запросов объединено"""
+        with self._lock:
+            return {'requests': self.requests, 'flushes': self.flushes,
+                    'coalesced': self.requests - self.flushes}
+
+    def reset_stats(self):
+        self.requests = 0
+        self.flushes = 0
+
+    def _schedule(self, delay: float):
+        """Запланировать отправку (выполняется в цикле событий сессии)"""
+        with self._lock:
+            if self._closed or not self._scheduled or self._handle is not None:
+                return
+            self._handle = self.page.loop.call_later(delay, self.flush)
+
+
+def install_update_scheduler(page, interval: float = UPDATE_FRAME_INTERVAL) -> UpdateScheduler:
+    """Создать планировщик обновлений сессии и сохранить его в page.update_scheduler"""
+    page.update_scheduler = UpdateScheduler(page, interval)
+    return page.update_scheduler
+
+
+def request_update(page, *controls, delay: float = None):
+    """
+    Запросить обновление страницы или отдельных элементов
+
+    Если планировщик не установлен (например, до входа в приложение),
+    обновление отправляется сразу.
+    """
+    if page is None:
+        return
+    scheduler = getattr(page, 'update_scheduler', None)
+    if scheduler is None:
+        page.update(*controls)
+    else:
+        scheduler.request(*controls, delay=delay)
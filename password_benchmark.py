@@ -0,0 +1,63 @@
+"""
+Микробенчмарк: время хеширования и проверки паролей
+
+Для каждой схемы из PASSWORD_COST с ее параметрами измеряет
+PasswordHasher.hash и verify, а также проверку старого несоленого
+sha256. Выводятся медиана и максимум по всем повторам: по ним видно,
+сколько длится вход в систему и регистрация пользователя.
+
+Пример:
+    python password_benchmark.py --repeat 20
+"""
+import argparse
+import hashlib
+import statistics
+import time
+
+from settings.config import PASSWORD_SCHEME, PASSWORD_COST
+from settings.credentials import PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def _timings(func, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def measure(repeat: int) -> list:
+    """
+    Returns:
+        [(название, операция, [время вызова, с])]
+    """
+    results = []
+    for scheme, cost in PASSWORD_COST.items():
+        hasher = PasswordHasher(scheme, cost)
+        stored = hasher.hash(PASSWORD)
+        name = f"{scheme} ({hasher._format_params(cost)})"
+        results.append((name, 'hash', _timings(lambda: hasher.hash(PASSWORD), repeat)))
+        results.append((name, 'verify', _timings(lambda: hasher.verify(PASSWORD, stored), repeat)))
+
+    legacy = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    hasher = PasswordHasher()
+    results.append(("sha256 (старый формат)", 'verify', _timings(lambda: hasher.verify(PASSWORD, legacy), repeat)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время хеширования и проверки паролей")
+    parser.add_argument('--repeat', type=int, default=10, help="повторов каждой операции")
+    args = parser.parse_args()
+
+    print(f"Схема по умолчанию: {PASSWORD_SCHEME}, повторов: {args.repeat}")
+    print(f"{'схема':<40}{'операция':>10}{'медиана, мс':>13}{'макс, мс':>10}")
+    for name, operation, timings in measure(args.repeat):
+        print(f"{name:<40}{operation:>10}{statistics.median(timings) * 1000:>13.2f}{max(timings) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Микробенчмарк: списки детей словарями и компактными записями
+
+Заполняет базу в памяти N детьми и сравнивает прежний путь (модели
+peewee и _child_to_dict на каждую строку) с ChildRecord, который строится
+прямо из курсора. Для каждого пути выводится время построения списка
+и по tracemalloc — память, занятая списком, и пик во время построения.
+
+Пример:
+    python records_benchmark.py --children 10000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from database import KindergartenDB, Child, Group, JOIN, db
+from settings.children_settings import ChildrenSettings
+
+
+def fill_database(children: int, groups: int):
+    """Создать группы и детей одной транзакцией"""
+    with db.atomic():
+        group_ids = [Group.create(group_name=f"Группа {i + 1}", age_category="3-4 года").group_id
+                     for i in range(groups)]
+        start = date(2018, 1, 1)
+        rows = [{
+            'last_name': f"Фамилия{i}",
+            'first_name': random.choice(["Анна", "Иван", "Мария", "Петр", "Ольга"]),
+            'middle_name': random.choice(["Ивановна", "Петрович", None]),
+            'birth_date': (start + timedelta(days=random.randrange(2000))).isoformat(),
+            'gender': random.choice("МЖ"),
+            # Часть детей без группы: в записи нет group_name и age_category
+            'group': random.choice(group_ids + [None]),
+            'enrollment_date': '2023-09-01',
+        } for i in range(children)]
+        for offset in range(0, len(rows), 500):
+            Child.insert_many(rows[offset:offset + 500]).execute()
+
+
+def dict_path(settings: ChildrenSettings) -> list:
+    """Прежний путь: модели peewee и словарь на каждую строку"""
+    children = (Child
+                .select(Child, Group)
+                .join(Group, JOIN.LEFT_OUTER)
+                .order_by(Child.last_name, Child.first_name))
+    return [settings._child_to_dict(child) for child in children]
+
+
+def record_path(settings: ChildrenSettings) -> list:
+    """Текущий путь: ChildRecord из строк курсора"""
+    return settings.get_all_children()
+
+
+def measure(build, settings: ChildrenSettings, repeat: int) -> dict:
+    """
+    Returns:
+        {'time': лучшее время, с, 'retained': байт занимает список, 'peak': пик, байт}
+    """
+    best = min(_timed(build, settings) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        rows = build(settings)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'time': best, 'retained': retained, 'peak': peak, 'rows': len(rows)}
+
+
+def _timed(build, settings) -> float:
+    started = time.perf_counter()
+    build(settings)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Списки детей: словари и компактные записи")
+    parser.add_argument('--children', type=int, default=10000, help="число детей")
+    parser.add_argument('--groups', type=int, default=12, help="число групп")
+    parser.add_argument('--repeat', type=int, default=5, help="повторов замера времени")
+    args = parser.parse_args()
+
+    random.seed(1)
+    kdb = KindergartenDB(':memory:')
+    kdb.connect()
+    kdb.create_tables()
+    fill_database(args.children, args.groups)
+    settings = ChildrenSettings()
+
+    results = {'словари': measure(dict_path, settings, args.repeat),
+               'записи': measure(record_path, settings, args.repeat)}
+    kdb.close()
+
+    print(f"Детей: {args.children}, групп: {args.groups}")
+    print(f"{'путь':<10}{'строк':>8}{'время, мс':>11}{'список, МБ':>12}{'пик, МБ':>10}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['rows']:>8}{result['time'] * 1000:>11.1f}"
+              f"{result['retained'] / 2 ** 20:>12.1f}{result['peak'] / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Асинхронный доступ к базе данных для асинхронных обработчиков Flet
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from operator import attrgetter
+from database import run_with_connection, SETTINGS_DELEGATES, WRITE_DELEGATES
+from settings.config import DB_ASYNC_WORKERS
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Общий для всех сессий пул потоков запросов (создается при первом запросе)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DB_ASYNC_WORKERS, thread_name_prefix='db')
+        return _executor
+
+
+async def run_async(func, *args, **kwargs):
+    """
+    Выполнить функцию работы с базой в пуле потоков и дождаться результата
+
+    Одновременно выполняется не больше DB_ASYNC_WORKERS запросов, остальные
+    ждут в очереди пула. Соединение потока после запроса возвращается в пул.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(run_with_connection, func, *args, **kwargs))
+
+
+class LatestCall:
+    """
+    Запрос, у которого важен только последний результат.
+
+    Новый вызов отменяет ожидание предыдущего незавершенного: предыдущий
+    обработчик получает asyncio.CancelledError и не перерисовывает экран
+    устаревшими данными, а еще не начатый запрос снимается с очереди пула.
+    Только для чтения — отмененная запись может успеть выполниться.
+    """
+
+    def __init__(self):
+        self._task = None
+
+    async def __call__(self, func, *args, **kwargs):
+        self.cancel()
+        task = self._task = asyncio.ensure_future(run_async(func, *args, **kwargs))
+        return await task
+
+    def cancel(self):
+        """Отменить ожидающий запрос"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+class AsyncDB:
+    """
+    Асинхронный фасад над KindergartenDB
+
+    Каждый метод из SETTINGS_DELEGATES доступен как корутина с теми же аргументами:
+    await db.aio.get_children_page('Ив', limit=8, offset=0)
+    """
+
+    def __init__(self, kindergarten_db):
+        self._db = kindergarten_db
+
+    async def run(self, func, *args, **kwargs):
+        """Выполнить произвольную функцию работы с базой в пуле потоков"""
+        return await run_async(func, *args, **kwargs)
+
+
+def _make_async_delegate(method_name: str):
+    """Создать корутину AsyncDB, вызывающую одноименный метод KindergartenDB в пуле потоков"""
+    get_method = attrgetter(f"_db.{method_name}")
+
+    async def delegate(self, *args, **kwargs):
+        return await run_async(get_method(self), *args, **kwargs)
+
+    delegate.__name__ = method_name
+    delegate.__qualname__ = f"{AsyncDB.__name__}.{method_name}"
+    delegate.__doc__ = (f"Асинхронно вызывает KindergartenDB.{method_name}"
+                        + (" (через очередь записи)" if method_name in WRITE_DELEGATES else ""))
+    return delegate
+
+
+# Корутины создаются один раз при загрузке модуля, а не при каждом обращении
+for _method_names in SETTINGS_DELEGATES.values():
+    for _method_name in _method_names:
+        setattr(AsyncDB, _method_name, _make_async_delegate(_method_name))
+del _method_names, _method_name
@@ -0,0 +1,284 @@
+"""
+Архив посещаемости по учебным годам
+
+Закрытые учебные годы переносятся из attendance_records в отдельные файлы
+SQLite (attendance_<год>.db), поэтому рабочая таблица содержит только
+текущий год. Для чтения истории файлы подключаются через ATTACH на время
+запроса. Сводки статистики при переносе не меняются.
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from peewee import IntegerField, CharField, DateField, DateTimeField
+from database import BaseModel, db, write_executor
+from settings.config import (ACADEMIC_YEAR_START_MONTH, ATTENDANCE_ARCHIVE_DIR,
+                             ATTENDANCE_ARCHIVE_CHUNK, ATTENDANCE_ARCHIVE_PAUSE)
+from settings.models import to_iso_date
+
+
+class AttendanceArchiveYear(BaseModel):
+    """Учебный год, перенесенный в архив"""
+    academic_year = IntegerField(primary_key=True)  # Год начала учебного года
+    start_date = DateField()
+    end_date = DateField()
+    file_name = CharField()  # Файл в папке архива
+    records = IntegerField(default=0)
+    archived_at = DateTimeField(default=datetime.now)
+    # Файл удален по сроку хранения: год не читается, но остается закрытым для изменений
+    purged_at = DateTimeField(null=True)
+
+    class Meta:
+        table_name = 'attendance_archives'
+
+
+# Строки архива хранят группу ребенка на момент переноса: по ней
+# пересчитываются сводки (rebuild_statistics) за архивные годы
+ARCHIVE_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS {0}.attendance_records ('
+    ' record_id INTEGER PRIMARY KEY, child_id INTEGER NOT NULL, group_id INTEGER NOT NULL,'
+    ' date DATE NOT NULL, status VARCHAR(255) NOT NULL, notes TEXT,'
+    ' created_at DATETIME, updated_at DATETIME)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS {0}.archive_child_date ON attendance_records (child_id, date)',
+    'CREATE INDEX IF NOT EXISTS {0}.archive_date ON attendance_records (date)',
+)
+
+ARCHIVE_COLUMNS = 'record_id, child_id, group_id, date, status, notes, created_at, updated_at'
+
+
+def academic_year_of(day) -> int:
+    """Год начала учебного года, к которому относится дата"""
+    day = date.fromisoformat(to_iso_date(day))
+    return day.year if day.month >= ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_bounds(year: int) -> tuple:
+    """Первый и последний день учебного года в ISO"""
+    end = date(year + 1, ACADEMIC_YEAR_START_MONTH, 1) - timedelta(days=1)
+    return date(year, ACADEMIC_YEAR_START_MONTH, 1).isoformat(), end.isoformat()
+
+
+def academic_year_label(year: int) -> str:
+    return f"{year}/{year + 1}"
+
+
+def archive_dir() -> str:
+    """Папка архива рядом с файлом базы"""
+    return os.path.join(os.path.dirname(os.path.abspath(db.database)), ATTENDANCE_ARCHIVE_DIR)
+
+
+def archive_path(year: int) -> str:
+    return os.path.join(archive_dir(), f"attendance_{year}.db")
+
+
+def _alias(year: int) -> str:
+    return f"archive_{year}"
+
+
+@contextmanager
+def attached(years: Iterable[int]):
+    """
+    Подключить файлы архива к соединению текущего потока на время блока
+
+    ATTACH и DETACH нельзя выполнять внутри транзакции, поэтому блок
+    открывается вне db.atomic(). Уже подключенные файлы (вложенный вызов)
+    не отключаются.
+
+    Yields:
+        {год: имя схемы} для подключенных лет
+    """
+    present = {row[1] for row in db.execute_sql('PRAGMA database_list').fetchall()}
+    aliases, added = {}, []
+    try:
+        for year in years:
+            alias = _alias(year)
+            if alias not in present:
+                db.execute_sql(f'ATTACH DATABASE ? AS {alias}', (archive_path(year),))
+                added.append(alias)
+                for sql in ARCHIVE_SCHEMA:
+                    db.execute_sql(sql.format(alias))
+            aliases[year] = alias
+        yield aliases
+    finally:
+        for alias in added:
+            db.execute_sql(f'DETACH DATABASE {alias}')
+
+
+def archived_years(start: str = None, end: str = None) -> List[int]:
+    """Архивные учебные годы с файлами, пересекающиеся с периодом (без периода — все)"""
+    query = (AttendanceArchiveYear.select(AttendanceArchiveYear.academic_year)
+             .where(AttendanceArchiveYear.purged_at.is_null()))
+    if start:
+        query = query.where(AttendanceArchiveYear.end_date >= start)
+    if end:
+        query = query.where(AttendanceArchiveYear.start_date <= end)
+    return [year for (year,) in query.order_by(AttendanceArchiveYear.academic_year).tuples()]
+
+
+def archived_rows(start: str, end: str, columns: str, condition: str = '', params: tuple = ()) -> list:
+    """
+    Строки архива за период одним запросом UNION ALL по всем нужным годам
+
+    Args:
+        columns: список колонок архивной таблицы (см. ARCHIVE_COLUMNS)
+        condition: дополнительное условие WHERE; таблицы рабочей базы — как main.<таблица>
+        params: параметры условия
+    """
+    years = archived_years(start, end)
+    if not years:
+        return []
+    with attached(years) as aliases:
+        selects = [f'SELECT {columns} FROM {alias}.attendance_records WHERE date >= ? AND date <= ?'
+                   + (f' AND ({condition})' if condition else '')
+                   for alias in aliases.values()]
+        return db.execute_sql(' UNION ALL '.join(selects), (start, end, *params) * len(selects)).fetchall()
+
+
+def check_not_archived(day: str):
+    """Запретить изменение отметок за учебный год, перенесенный в архив (в том числе удаленный)"""
+    if AttendanceArchiveYear.select().where((AttendanceArchiveYear.start_date <= day) &
+                                            (AttendanceArchiveYear.end_date >= day)).exists():
+        label = academic_year_label(academic_year_of(day))
+        raise ValueError(f"Учебный год {label} перенесен в архив, отметки за него не изменяются")
+
+
+# Перед удалением порции ее отметки добавляются к сводке: триггер
+# stats_attendance_delete вычтет их, и сводка за архивный год не изменится
+_KEEP_SUMMARY_SQL = (
+    "INSERT INTO stats_attendance_daily (day, group_id, status, count) "
+    "SELECT a.date, COALESCE(c.group_id, 0), a.status, COUNT(*) "
+    "FROM attendance_records a LEFT JOIN children c ON c.child_id = a.child_id "
+    "WHERE a.record_id <= ? AND a.date >= ? AND a.date <= ? "
+    "GROUP BY a.date, COALESCE(c.group_id, 0), a.status "
+    "ON CONFLICT (day, group_id, status) DO UPDATE SET count = count + excluded.count")
+
+
+class AttendanceArchive:
+    """Перенос закрытых учебных лет посещаемости в архивные файлы"""
+
+    def ensure_archive_table(self):
+        """Создать таблицу учета архивных лет и добавить колонку purged_at, если ее нет"""
+        db.create_tables([AttendanceArchiveYear])
+        table = AttendanceArchiveYear._meta.table_name
+        columns = [row[1] for row in db.execute_sql(f'PRAGMA table_info("{table}")').fetchall()]
+        if 'purged_at' not in columns:
+            db.execute_sql(f'ALTER TABLE "{table}" ADD COLUMN purged_at DATETIME')
+
+    def get_archived_years(self) -> List[dict]:
+        """Архивные учебные годы с числом перенесенных отметок (purged_at — когда удален файл)"""
+        return [
+            {
+                'academic_year': year.academic_year,
+                'label': academic_year_label(year.academic_year),
+                'start_date': str(year.start_date),
+                'end_date': str(year.end_date),
+                'file_name': year.file_name,
+                'records': year.records,
+                'archived_at': year.archived_at.isoformat() if year.archived_at else None,
+                'purged_at': year.purged_at.isoformat() if year.purged_at else None
+            }
+            for year in AttendanceArchiveYear.select().order_by(AttendanceArchiveYear.academic_year)
+        ]
+
+    def get_closed_years(self, today: date = None) -> List[int]:
+        """Учебные годы до текущего, отметки которых еще в рабочей таблице"""
+        current = academic_year_of(today or date.today())
+        first_day = db.execute_sql('SELECT MIN(date) FROM attendance_records').fetchone()[0]
+        if first_day is None:
+            return []
+        return [year for year in range(academic_year_of(first_day), current)
+                if db.execute_sql('SELECT 1 FROM attendance_records WHERE date >= ? AND date <= ? LIMIT 1',
+                                  academic_year_bounds(year)).fetchone()]
+
+    def archive_attendance(self, today: date = None, chunk_size: int = ATTENDANCE_ARCHIVE_CHUNK,
+                           pause: float = ATTENDANCE_ARCHIVE_PAUSE,
+                           progress: Optional[Callable[[int, int], None]] = None) -> Dict[int, int]:
+        """
+        Перенести все закрытые учебные годы в архив
+
+        Args:
+            progress: вызывается после каждой порции с (год, перенесено строк за год)
+
+        Returns:
+            {год: перенесено строк}
+        """
+        return {year: self.archive_year(year, chunk_size, pause, progress, today)
+                for year in self.get_closed_years(today)}
+
+    def archive_year(self, year: int, chunk_size: int = ATTENDANCE_ARCHIVE_CHUNK,
+                     pause: float = ATTENDANCE_ARCHIVE_PAUSE,
+                     progress: Optional[Callable[[int, int], None]] = None, today: date = None) -> int:
+        """
+        Перенести отметки учебного года в файл архива
+
+        Год регистрируется в архиве до переноса: чтение объединяет рабочую
+        таблицу и архив, поэтому отметки не пропадают из журнала и во время
+        переноса, а новые отметки за этот год уже не принимаются.
+        Каждая порция переносится отдельной короткой транзакцией через
+        очередь записи; между порциями другие сессии успевают записать свое.
+        Повторный запуск (например, после сбоя) продолжает перенос.
+
+        Returns:
+            число перенесенных строк
+        """
+        start, end = academic_year_bounds(year)
+        if year >= academic_year_of(today or date.today()):
+            raise ValueError(f"Учебный год {academic_year_label(year)} еще не закончился")
+        os.makedirs(archive_dir(), exist_ok=True)
+        write_executor.run(self._register_year, year)
+
+        moved = 0
+        with attached([year]) as aliases:
+            while True:
+                count = write_executor.run(self._move_chunk, aliases[year], start, end, chunk_size)
+                if not count:
+                    break
+                moved += count
+                if progress:
+                    progress(year, moved)
+                if pause:
+                    time.sleep(pause)
+
+        write_executor.run(self._count_records, year)
+        return moved
+
+    def _register_year(self, year: int):
+        start, end = academic_year_bounds(year)
+        (AttendanceArchiveYear
+         .insert(academic_year=year, start_date=start, end_date=end,
+                 file_name=os.path.basename(archive_path(year)))
+         .on_conflict(conflict_target=[AttendanceArchiveYear.academic_year],
+                      update={AttendanceArchiveYear.archived_at: datetime.now()})
+         .execute())
+
+    def _move_chunk(self, alias: str, start: str, end: str, chunk_size: int) -> int:
+        """
+        Перенести до chunk_size строк периода с наименьшими record_id
+
+        Копирование и удаление выполняются в одной транзакции. В режиме WAL
+        фиксация двух файлов не атомарна как единое целое, но копирование
+        идет через INSERT OR REPLACE, поэтому повтор после сбоя безопасен.
+        """
+        with db.atomic():
+            last_id = db.execute_sql(
+                'SELECT MAX(record_id) FROM (SELECT record_id FROM attendance_records '
+                'WHERE date >= ? AND date <= ? ORDER BY record_id LIMIT ?)',
+                (start, end, chunk_size)).fetchone()[0]
+            if last_id is None:
+                return 0
+            params = (last_id, start, end)
+            db.execute_sql(
+                f'INSERT OR REPLACE INTO {alias}.attendance_records ({ARCHIVE_COLUMNS}) '
+                f'SELECT a.record_id, a.child_id, COALESCE(c.group_id, 0), a.date, a.status, a.notes, '
+                f'a.created_at, a.updated_at '
+                f'FROM attendance_records a LEFT JOIN children c ON c.child_id = a.child_id '
+                f'WHERE a.record_id <= ? AND a.date >= ? AND a.date <= ?', params)
+            db.execute_sql(_KEEP_SUMMARY_SQL, params)
+            return db.execute_sql('DELETE FROM attendance_records '
+                                  'WHERE record_id <= ? AND date >= ? AND date <= ?', params).rowcount
+
+    def _count_records(self, year: int):
+        with attached([year]) as aliases:
+            count = db.execute_sql(f'SELECT COUNT(*) FROM {aliases[year]}.attendance_records').fetchone()[0]
+        AttendanceArchiveYear.update(records=count).where(AttendanceArchiveYear.academic_year == year).execute()
@@ -1,7 +1,9 @@
 from peewee import *
 from typing import List, Optional
 from datetime import datetime
-from database import AttendanceRecord, Child, Group, JOIN, DoesNotExist
+from database import AttendanceRecord, Child, Group, JOIN
+from settings.models import normalize_date
+from settings.attendance_archive import archived_rows, check_not_archived
 
 
 class AttendanceSettings:
@@ -9,6 +11,8 @@ class AttendanceSettings:
     
     def add_attendance_record(self, child_id: int, date: str, status: str, notes: str = None):
         """Добавить запись о посещаемости"""
+        date = normalize_date(date, "Дата отметки", required=True)
+        check_not_archived(date)
         AttendanceRecord.create(
             child=child_id,
             date=date,
@@ -17,40 +21,61 @@ class AttendanceSettings:
         )
     
     def update_attendance_record(self, child_id: int, date: str, status: str, notes: str = None):
-        """Обновить запись о посещаемости"""
-        try:
-            record = AttendanceRecord.get(
-                (AttendanceRecord.child == child_id) & 
-                (AttendanceRecord.date == date)
-            )
-            record.status = status
-            record.notes = notes
-            record.updated_at = datetime.now()
-            record.save()
-        except DoesNotExist:
-            self.add_attendance_record(child_id, date, status, notes)
+        """Обновить запись о посещаемости (или добавить, если ее нет) одним запросом"""
+        date = normalize_date(date, "Дата отметки", required=True)
+        check_not_archived(date)
+        (AttendanceRecord
+         .insert(child=child_id, date=date, status=status, notes=notes)
+         .on_conflict(
+             conflict_target=[AttendanceRecord.child, AttendanceRecord.date],
+             update={AttendanceRecord.status: status,
+                     AttendanceRecord.notes: notes,
+                     AttendanceRecord.updated_at: datetime.now()})
+         .execute())
+    
+    def get_group_attendance_statuses(self, group_id: int, start: str, end: str) -> dict:
+        """
+        Отмеченные статусы детей группы за период одним запросом
+        
+        Отметки архивных учебных лет читаются из подключенных файлов архива.
+        
+        Returns:
+            {(child_id, 'гггг-мм-дд'): статус}; дни без отметки не включаются
+        """
+        records = (AttendanceRecord
+                  .select(AttendanceRecord.child, AttendanceRecord.date, AttendanceRecord.status)
+                  .join(Child)
+                  .where((Child.group == group_id) &
+                         (AttendanceRecord.date >= start) & (AttendanceRecord.date <= end))
+                  .tuples())
+        result = {(child_id, str(day)): status for child_id, day, status in records}
+        archived = archived_rows(start, end, 'child_id, date, status',
+                                 'child_id IN (SELECT child_id FROM main.children WHERE group_id = ?)', (group_id,))
+        result.update({(child_id, day): status for child_id, day, status in archived})
+        return result
     
     def get_attendance_by_group_and_date(self, group_id: int, date: str, children_settings):
-        """Получить посещаемость группы на дату"""
+        """Получить посещаемость группы на дату (отметки — одним запросом, с учетом архива)"""
         children = children_settings.get_children_by_group(group_id)
-        result = []
+        records = {child_id: (status, notes, record_id) for child_id, status, notes, record_id in
+                   (AttendanceRecord
+                    .select(AttendanceRecord.child, AttendanceRecord.status,
+                            AttendanceRecord.notes, AttendanceRecord.record_id)
+                    .join(Child)
+                    .where((Child.group == group_id) & (AttendanceRecord.date == date))
+                    .tuples())}
+        records.update({child_id: (status, notes, record_id) for child_id, status, notes, record_id in
+                        archived_rows(date, date, 'child_id, status, notes, record_id',
+                                      'child_id IN (SELECT child_id FROM main.children WHERE group_id = ?)',
+                                      (group_id,))})
         
+        result = []
         for child in children:
-            try:
-                record = AttendanceRecord.get(
-                    (AttendanceRecord.child == child['child_id']) & 
-                    (AttendanceRecord.date == date)
-                )
-                child_data = child.copy()
-                child_data['status'] = record.status
-                child_data['notes'] = record.notes or ''
-                child_data['record_id'] = record.record_id
-            except DoesNotExist:
-                child_data = child.copy()
-                child_data['status'] = 'Присутствует'
-                child_data['notes'] = ''
-                child_data['record_id'] = None
-            
+            status, notes, record_id = records.get(child['child_id'], ('Присутствует', '', None))
+            child_data = child.copy()
+            child_data['status'] = status
+            child_data['notes'] = notes or ''
+            child_data['record_id'] = record_id
             result.append(child_data)
         
         return result
\ No newline at end of file
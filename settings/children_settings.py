@@ -1,6 +1,14 @@
 from peewee import *
-from typing import List, Optional
-from database import Child, Group, JOIN
+from typing import List, Optional, Tuple
+from database import Child, Group, JOIN, db
+from settings.records import ChildRecord
+from settings.models import birth_date_range, normalize_date
+
+
+def age_between(min_age: int, max_age: int):
+    """Условие на возраст в полных годах, выполняемое поиском по индексу дат рождения"""
+    born_after, born_until = birth_date_range(min_age, max_age)
+    return (Child.birth_date > born_after) & (Child.birth_date <= born_until)
 
 
 class ChildrenSettings:
@@ -16,33 +24,34 @@ class ChildrenSettings:
             last_name: фамилия
             first_name: имя
             middle_name: отчество
-            birth_date: дата рождения (формат: YYYY-MM-DD)
+            birth_date: дата рождения (дд-мм-гггг или гггг-мм-дд)
             gender: пол (М или Ж)
             group_id: ID группы
-            enrollment_date: дата зачисления (формат: YYYY-MM-DD)
+            enrollment_date: дата зачисления (дд-мм-гггг или гггг-мм-дд)
         
         Returns:
             ID созданной записи
+        
+        Raises:
+            ValueError: дата не указана или не распознана
         """
         child = Child.create(
             last_name=last_name,
             first_name=first_name,
             middle_name=middle_name,
-            birth_date=birth_date,
+            birth_date=normalize_date(birth_date, "Дата рождения", required=True),
             gender=gender,
             group=group_id,
-            enrollment_date=enrollment_date,
+            enrollment_date=normalize_date(enrollment_date, "Дата зачисления", required=True),
             locker_symbol=locker_symbol
         )
         return child.child_id
     
-    def get_all_children(self) -> List[dict]:
+    def get_all_children(self) -> List[ChildRecord]:
         """Получить список всех детей"""
-        children = (Child
-                   .select(Child, Group)
-                   .join(Group, JOIN.LEFT_OUTER)
+        children = (self._select_records()
                    .order_by(Child.last_name, Child.first_name))
-        return [self._child_to_dict(child) for child in children]
+        return ChildRecord.fetch(children)
     
     def get_child_by_id(self, child_id: int) -> Optional[dict]:
         """Получить информацию о ребенке по ID"""
@@ -56,29 +65,44 @@ class ChildrenSettings:
         except DoesNotExist:
             return None
     
-    def get_children_by_group(self, group_id: int) -> List[dict]:
+    def get_children_by_group(self, group_id: int) -> List[ChildRecord]:
         """Получить список детей в группе"""
-        children = (Child
-                   .select()
+        children = (self._select_records()
                    .where(Child.group == group_id)
                    .order_by(Child.last_name, Child.first_name))
-        return [self._child_to_dict(child) for child in children]
+        return ChildRecord.fetch(children)
     
-    def search_children(self, search_term: str) -> List[dict]:
-        """Поиск детей по фамилии или имени"""
-        if not search_term.strip():
-            return self.get_all_children()
+    def search_children(self, search_term: str, limit: int = None, offset: int = 0) -> List[ChildRecord]:
+        """
+        Поиск детей по фамилии или имени
         
-        search_pattern = f"%{search_term}%"
-        children = (Child
-                   .select(Child, Group)
-                   .join(Group, JOIN.LEFT_OUTER)
-                   .where(
-                       (Child.last_name ** search_pattern) |
-                       (Child.first_name ** search_pattern)
-                   )
-                   .order_by(Child.last_name, Child.first_name))
-        return [self._child_to_dict(child) for child in children]
+        Args:
+            search_term: строка поиска (пустая — все дети)
+            limit: размер страницы (None — без ограничения)
+            offset: смещение страницы
+        """
+        children = self._select_records()
+        if search_term.strip():
+            children = children.where(self._name_matches(search_term))
+        return ChildRecord.fetch(self._order_and_page(children, limit, offset))
+    
+    def get_children_page(self, search_term: str = "", group_id: int = None,
+                          limit: int = None, offset: int = 0) -> Tuple[List[ChildRecord], int]:
+        """
+        Страница списка детей и общее число найденных
+        
+        Args:
+            search_term: строка поиска по фамилии или имени
+            group_id: только дети группы (None — все дети)
+            limit: размер страницы (None — без ограничения)
+            offset: смещение страницы
+        """
+        children = self._select_records()
+        if search_term.strip():
+            children = children.where(self._name_matches(search_term))
+        if group_id:
+            children = children.where(Child.group == group_id)
+        return ChildRecord.fetch(self._order_and_page(children, limit, offset)), children.count()
     
     def update_child(self, child_id: int, **kwargs):
         """
@@ -99,6 +123,14 @@ class ChildrenSettings:
             elif field == 'group_id':  # Убрал проверку value is not None
                 updates['group'] = value
         
+        for field, label in (('birth_date', "Дата рождения"), ('enrollment_date', "Дата зачисления")):
+            if field in updates:
+                updates[field] = normalize_date(updates[field], label, required=True)
+        
+        # Шкафчик закреплен за группой: при переводе в другую группу назначение снимается
+        if 'group' in updates and 'locker_symbol' not in updates:
+            updates['locker_symbol'] = self._locker_kept_if_group(updates['group'])
+        
         if updates:
             Child.update(**updates).where(Child.child_id == child_id).execute()
     
@@ -113,17 +145,70 @@ class ChildrenSettings:
     def bulk_transfer_children(self, child_ids: List[int], new_group_id: int) -> int:
         """Массовый перевод детей в группу"""
         return (Child
-                .update(group=new_group_id)
+                .update(group=new_group_id, locker_symbol=self._locker_kept_if_group(new_group_id))
                 .where(Child.child_id.in_(child_ids))
                 .execute())
     
-    def get_children_without_group(self) -> List[dict]:
+    def get_group_candidates(self, group_id: int, search_term: str = "",
+                             limit: int = None, offset: int = 0,
+                             age_range: tuple = None) -> List[ChildRecord]:
+        """
+        Получить детей, которых можно включить в группу: без группы или уже в ней
+        
+        Args:
+            age_range: (от, до) полных лет — только дети подходящего возраста
+        """
+        children = (self._select_records()
+                   .where(Child.group.is_null() | (Child.group == group_id)))
+        if search_term.strip():
+            children = children.where(self._name_matches(search_term))
+        if age_range:
+            children = children.where(age_between(*age_range))
+        return ChildRecord.fetch(self._order_and_page(children, limit, offset))
+    
+    def get_children_by_age(self, min_age: int, max_age: int, group_id: int = None) -> List[ChildRecord]:
+        """Дети от min_age до max_age полных лет (диапазон дат рождения по индексу)"""
+        children = self._select_records().where(age_between(min_age, max_age))
+        if group_id is not None:
+            children = children.where(Child.group == group_id)
+        return ChildRecord.fetch(children.order_by(Child.birth_date.desc()))
+    
+    def update_group_membership(self, group_id: int, added_ids, removed_ids) -> int:
+        """
+        Изменить состав группы двумя UPDATE в одной транзакции
+        
+        Args:
+            group_id: ID группы
+            added_ids: ID детей, которых нужно добавить (только без группы или уже в ней)
+            removed_ids: ID детей, которых нужно открепить от группы
+        
+        Returns:
+            количество измененных записей
+        """
+        added_ids = list(added_ids)
+        removed_ids = list(removed_ids)
+        changed = 0
+        
+        with db.atomic():
+            if added_ids:
+                changed += (Child
+                           .update(group=group_id, locker_symbol=self._locker_kept_if_group(group_id))
+                           .where(Child.child_id.in_(added_ids) &
+                                  (Child.group.is_null() | (Child.group == group_id)))
+                           .execute())
+            if removed_ids:
+                changed += (Child
+                           .update(group=None, locker_symbol=None)
+                           .where(Child.child_id.in_(removed_ids) & (Child.group == group_id))
+                           .execute())
+        return changed
+    
+    def get_children_without_group(self) -> List[ChildRecord]:
         """Получить детей без группы"""
-        children = (Child
-                   .select()
+        children = (self._select_records()
                    .where(Child.group.is_null())
                    .order_by(Child.last_name, Child.first_name))
-        return [self._child_to_dict(child) for child in children]
+        return ChildRecord.fetch(children)
     
     def get_used_locker_symbols_in_group(self, group_id: int, exclude_child_id: int = None) -> List[str]:
         """Получить список используемых символов шкафчиков в группе"""
@@ -136,6 +221,28 @@ class ChildrenSettings:
         
         return [child.locker_symbol for child in query if child.locker_symbol]
     
+    def _name_matches(self, search_term: str):
+        """Условие поиска по фамилии или имени"""
+        search_pattern = f"%{search_term}%"
+        return (Child.last_name ** search_pattern) | (Child.first_name ** search_pattern)
+    
+    def _order_and_page(self, query, limit: int = None, offset: int = 0):
+        """Упорядочить по ФИО и при необходимости ограничить страницей"""
+        query = query.order_by(Child.last_name, Child.first_name)
+        if limit is not None:
+            query = query.limit(limit).offset(offset)
+        return query
+    
+    def _locker_kept_if_group(self, group_id):
+        """Выражение для locker_symbol: сохраняется, только если группа не меняется"""
+        return Case(None, [(Child.group == group_id, Child.locker_symbol)], None)
+    
+    def _select_records(self):
+        """Запрос колонок ChildRecord с присоединенной группой"""
+        return (Child
+                .select(*ChildRecord.columns())
+                .join(Group, JOIN.LEFT_OUTER))
+    
     def _child_to_dict(self, child: Child) -> dict:
         """Преобразовать модель ребенка в словарь"""
         result = {
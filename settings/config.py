@@ -16,6 +16,62 @@ else:
 
 DATABASE_NAME = os.path.join(BASE_DIR, "kindergarten.db")
 
+# Асинхронные обработчики выполняют запросы в общем пуле из DB_ASYNC_WORKERS потоков
+DB_ASYNC_WORKERS = 8
+
+# Синхронные обработчики всех сессий Flet выполняет в общем пуле потоков
+# размера по умолчанию ThreadPoolExecutor
+FLET_HANDLER_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Пул соединений: поток берет соединение на время обработчика и возвращает его.
+# Соединений хватает на все потоки, которые могут работать с базой одновременно:
+# обработчики Flet, пул асинхронных запросов, поток очистки и запуск сессии.
+# Если все соединения заняты, поток ждет освобождения не дольше DB_POOL_TIMEOUT секунд.
+DB_MAX_CONNECTIONS = FLET_HANDLER_WORKERS + DB_ASYNC_WORKERS + 4
+DB_POOL_TIMEOUT = 10
+DB_STALE_TIMEOUT = 300  # Неиспользуемое соединение закрывается через 5 минут
+
+# Блокировки записи: SQLite ждет освобождения базы DB_BUSY_TIMEOUT мс, затем
+# запись повторяется до DB_WRITE_RETRIES раз с растущей случайной паузой
+DB_BUSY_TIMEOUT = 5000
+DB_WRITE_RETRIES = 5
+DB_WRITE_RETRY_DELAY = 0.05  # Первая пауза, секунд (удваивается с каждой попыткой)
+DB_WRITE_RETRY_MAX_DELAY = 1.0
+
+# Обновления страницы объединяются и отправляются не чаще раза за кадр;
+# при изменении размера окна — не чаще раза за RESIZE_UPDATE_INTERVAL секунд
+UPDATE_FRAME_INTERVAL = 1 / 60
+RESIZE_UPDATE_INTERVAL = 0.15
+
+# Диалоги переиспользуются по типу; в оверлее сессии остается не больше
+# MAX_CACHED_DIALOGS закрытых диалогов
+MAX_CACHED_DIALOGS = 16
+
+# Архив посещаемости: закрытые учебные годы (учебный год начинается в месяце
+# ACADEMIC_YEAR_START_MONTH) переносятся в файлы attendance_<год>.db в папке
+# ATTENDANCE_ARCHIVE_DIR рядом с базой — порциями по ATTENDANCE_ARCHIVE_CHUNK строк
+# с паузой ATTENDANCE_ARCHIVE_PAUSE секунд, чтобы не задерживать запись других сессий
+ACADEMIC_YEAR_START_MONTH = 9
+ATTENDANCE_ARCHIVE_DIR = "archive"
+ATTENDANCE_ARCHIVE_CHUNK = 500
+ATTENDANCE_ARCHIVE_PAUSE = 0.05
+
+# Хранение данных: записи старше срока (дней) удаляются фоновой задачей раз в
+# RETENTION_INTERVAL секунд. Журнал действий удаляется порциями по
+# RETENTION_BATCH_SIZE строк с паузой RETENTION_BATCH_PAUSE секунд между порциями
+RETENTION_DAYS = {
+    'audit_log': 90,  # Журнал действий пользователей
+    'attendance_archive': 5 * 365,  # Архивные учебные годы посещаемости (после окончания года)
+    'backups': 30,  # Резервные копии базы
+}
+BACKUP_FILE_PATTERN = "kindergarten_backup_*.db"
+BACKUP_KEEP_MIN = 3  # Последние копии не удаляются независимо от срока
+RETENTION_BATCH_SIZE = 1000
+RETENTION_BATCH_PAUSE = 0.05
+RETENTION_VACUUM_PAGES = 500  # Страниц за один шаг incremental_vacuum
+RETENTION_INTERVAL = 24 * 60 * 60
+RETENTION_START_DELAY = 60  # Первый запуск — через минуту после старта приложения
+
 # Настройки интерфейса
 APP_TITLE = "Учет детей в детском саду"
 WINDOW_WIDTH = 1400
@@ -36,8 +92,25 @@ AGE_CATEGORIES = {
     "Подготовительная (6-7 лет)": "Подготовительная (6-7 лет)"
 }
 
+# Полных лет (от, до включительно) для каждой возрастной категории
+AGE_CATEGORY_RANGES = {
+    "Ясельная (1-3 года)": (1, 2),
+    "Младшая (3-4 года)": (3, 3),
+    "Средняя (4-5 лет)": (4, 4),
+    "Старшая (5-6 лет)": (5, 5),
+    "Подготовительная (6-7 лет)": (6, 7)
+}
+
 # Пол
 GENDERS = {
     "М": "Мужской",
     "Ж": "Женский"
 }
+
+# Хеширование паролей: схема по умолчанию и стоимость для каждой схемы.
+# При изменении стоимости старые хеши пересчитываются при следующем входе.
+PASSWORD_SCHEME = "scrypt"
+PASSWORD_COST = {
+    "scrypt": {"n": 2 ** 14, "r": 8, "p": 1},
+    "pbkdf2_sha256": {"iterations": 600000}
+}
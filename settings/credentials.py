@@ -0,0 +1,97 @@
+"""
+Хеширование и проверка паролей пользователей
+"""
+import hashlib
+import hmac
+import os
+import re
+from settings.config import PASSWORD_SCHEME, PASSWORD_COST
+
+# Старые хеши: несоленый sha256 в шестнадцатеричном виде
+LEGACY_SHA256 = re.compile(r'[0-9a-f]{64}')
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class PasswordHasher:
+    """
+    Соленые хеши паролей через scrypt или pbkdf2_hmac.
+    
+    Хеш хранится строкой '<схема>$<параметры>$<соль>$<ключ>', поэтому
+    параметры стоимости можно менять без миграции: старые хеши проверяются
+    со своими параметрами, а needs_rehash сообщает, что их пора пересчитать.
+    """
+    
+    def __init__(self, scheme: str = PASSWORD_SCHEME, cost: dict = None):
+        if scheme not in PASSWORD_COST:
+            raise ValueError(f"Неизвестная схема хеширования: {scheme}")
+        self.scheme = scheme
+        self.cost = dict(cost or PASSWORD_COST[scheme])
+        self._dummy_hash = None
+    
+    def hash(self, password: str) -> str:
+        """Вычислить хеш пароля с новой солью"""
+        salt = os.urandom(SALT_BYTES)
+        params = self._format_params(self.cost)
+        key = self._derive(self.scheme, self.cost, password, salt)
+        return f"{self.scheme}${params}${salt.hex()}${key.hex()}"
+    
+    def verify(self, password: str, stored: str) -> bool:
+        """Проверить пароль за постоянное время (для поддерживаемых форматов)"""
+        if LEGACY_SHA256.fullmatch(stored or ''):
+            candidate = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(candidate, stored)
+        
+        try:
+            scheme, params, salt, key = stored.split('$')
+            cost = self._parse_params(scheme, params)
+            expected = bytes.fromhex(key)
+            derived = self._derive(scheme, cost, password, bytes.fromhex(salt))
+        except (ValueError, AttributeError):
+            return False
+        return hmac.compare_digest(derived, expected)
+    
+    def verify_dummy(self, password: str):
+        """Проверка против заглушки, чтобы вход несуществующего пользователя занимал то же время"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(os.urandom(SALT_BYTES).hex())
+        self.verify(password, self._dummy_hash)
+    
+    def needs_rehash(self, stored: str) -> bool:
+        """Нужно ли пересчитать хеш: старый формат, другая схема или стоимость"""
+        try:
+            scheme, params, _, _ = stored.split('$')
+            return scheme != self.scheme or self._parse_params(scheme, params) != self.cost
+        except (ValueError, AttributeError):
+            return True
+    
+    @staticmethod
+    def _derive(scheme: str, cost: dict, password: str, salt: bytes) -> bytes:
+        if scheme == 'scrypt':
+            n, r, p = cost['n'], cost['r'], cost['p']
+            # Память scrypt ~ 128 * n * r байт; оставляем запас сверх лимита OpenSSL по умолчанию
+            return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                                  maxmem=256 * n * r, dklen=KEY_BYTES)
+        if scheme == 'pbkdf2_sha256':
+            return hashlib.pbkdf2_hmac('sha256', password.encode(), salt,
+                                       cost['iterations'], dklen=KEY_BYTES)
+        raise ValueError(f"Неизвестная схема хеширования: {scheme}")
+    
+    @staticmethod
+    def _format_params(cost: dict) -> str:
+        return ','.join(f"{name}={cost[name]}" for name in sorted(cost))
+    
+    @staticmethod
+    def _parse_params(scheme: str, params: str) -> dict:
+        cost = {}
+        for item in params.split(','):
+            name, value = item.split('=')
+            cost[name] = int(value)
+        if set(cost) != set(PASSWORD_COST.get(scheme, ())):
+            raise ValueError(f"Неверные параметры для схемы {scheme}")
+        return cost
+
+
+# Глобальный экземпляр с настройками из config
+password_hasher = PasswordHasher()
@@ -0,0 +1,85 @@
+"""
+Приведение колонок дат к ISO-8601 (гггг-мм-дд) и индексы для поиска по диапазону дат
+"""
+from peewee import ModelIndex
+from database import db, Child, Teacher, MedicalRecord, AttendanceRecord
+from settings.models import to_iso_date
+
+# Колонки дат: в ISO строки сравниваются как даты, поэтому диапазоны
+# (возраст, просроченные осмотры, период посещаемости) ищутся по индексу
+DATE_COLUMNS = (
+    Child.birth_date,
+    Child.enrollment_date,
+    Teacher.birth_date,
+    MedicalRecord.last_checkup,
+    AttendanceRecord.date,
+)
+
+# Индексы для запросов по диапазону дат (отчеты по посещаемости за период
+# читают сводные таблицы статистики)
+DATE_INDEXES = (
+    ('child_birth_date', Child.birth_date),
+    ('medicalrecord_last_checkup', MedicalRecord.last_checkup),
+)
+
+ISO_GLOB = '[0-9][0-9][0-9][0-9]-[0-1][0-9]-[0-3][0-9]'
+
+
+def normalize_date_column(field) -> dict:
+    """
+    Переписать даты колонки в ISO
+
+    Выбираются только значения не в формате гггг-мм-дд (дд-мм-гггг, дд.мм.гггг,
+    дата-время), каждое разбирается общим parse_date. Пустые строки
+    в необязательных колонках становятся NULL; нераспознанные значения
+    остаются как есть и попадают в счетчик 'invalid'.
+
+    Returns:
+        {'converted': переписано строк, 'invalid': не удалось разобрать}
+    """
+    table, column = field.model._meta.table_name, field.column_name
+    primary_key = field.model._meta.primary_key.column_name
+    rows = db.execute_sql(
+        f'SELECT {primary_key}, {column} FROM {table} '
+        f'WHERE {column} IS NOT NULL AND {column} NOT GLOB ?', (ISO_GLOB,)).fetchall()
+
+    updates, invalid = [], 0
+    for row_id, value in rows:
+        iso = to_iso_date(value)
+        if iso is None and (not field.null or str(value).strip()):
+            invalid += 1
+            continue
+        updates.append((iso, row_id))
+    if updates:
+        db.cursor().executemany(f'UPDATE {table} SET {column} = ? WHERE {primary_key} = ?', updates)
+    return {'converted': len(updates), 'invalid': invalid}
+
+
+def normalize_dates() -> dict:
+    """
+    Миграция: привести все колонки дат к ISO в одной транзакции
+
+    Повторный запуск ничего не меняет: уже приведенные значения не выбираются.
+
+    Returns:
+        {'таблица.колонка': {'converted': ..., 'invalid': ...}} для колонок с изменениями
+    """
+    report = {}
+    with db.atomic():
+        for field in DATE_COLUMNS:
+            result = normalize_date_column(field)
+            if result['converted'] or result['invalid']:
+                report[f"{field.model._meta.table_name}.{field.column_name}"] = result
+    from settings.logger import app_logger
+    for column, result in report.items():
+        if result['invalid']:
+            app_logger.log('MIGRATION_DATES', 'System', column,
+                           f"Не удалось разобрать {result['invalid']} значений", 'WARNING')
+    return report
+
+
+def ensure_date_indexes():
+    """Создать индексы по колонкам дат и удалить индекс по выражению для старого формата"""
+    db.execute_sql('DROP INDEX IF EXISTS child_birth_date_key')
+    for name, field in DATE_INDEXES:
+        db.execute(ModelIndex(field.model, (field,), name=name, safe=True))
@@ -1,6 +1,7 @@
 from peewee import *
 from typing import List, Optional
-from database import Group, Teacher, Child, JOIN
+from database import Group, Teacher, JOIN
+from settings.records import GroupRecord
 
 
 class GroupsSettings:
@@ -25,13 +26,13 @@ class GroupsSettings:
         )
         return group.group_id
     
-    def get_all_groups(self) -> List[dict]:
+    def get_all_groups(self) -> List[GroupRecord]:
         """Получить список всех групп"""
         groups = (Group
-                 .select(Group, Teacher)
+                 .select(*GroupRecord.columns())
                  .join(Teacher, JOIN.LEFT_OUTER)
                  .order_by(Group.group_name))
-        return [self._group_to_dict(group) for group in groups]
+        return GroupRecord.fetch(groups)
     
     def get_group_by_id(self, group_id: int) -> Optional[dict]:
         """Получить информацию о группе по ID"""
@@ -59,9 +60,7 @@ class GroupsSettings:
             Group.update(**updates).where(Group.group_id == group_id).execute()
     
     def delete_group(self, group_id: int) -> int:
-        """Удалить группу"""
-        # Открепляем всех детей от группы
-        Child.update(group=None).where(Child.group == group_id).execute()
+        """Удалить группу (дети и пользователи открепляются, назначения воспитателей удаляются внешними ключами)"""
         return Group.delete().where(Group.group_id == group_id).execute()
     
     def _group_to_dict(self, group: Group) -> dict:
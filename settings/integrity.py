@@ -0,0 +1,157 @@
+"""
+Ссылочная целостность: внешние ключи с ON DELETE, пересборка таблиц и очистка «осиротевших» строк
+"""
+from database import (db, Group, Child, ParentChild, GroupTeacher, AttendanceRecord, MedicalRecord,
+                      Allergy, Vaccination, User, UserPermission)
+
+# Таблицы со ссылками в порядке зависимостей: сначала обнуляются ссылки
+# на удаленные группы и воспитателей, затем удаляются строки удаленных детей
+FK_MODELS = (Group, Child, User, ParentChild, GroupTeacher, AttendanceRecord, MedicalRecord,
+             Allergy, Vaccination, UserPermission)
+
+
+def foreign_keys(model) -> list:
+    """Поля внешних ключей модели"""
+    return list(model._meta.refs)
+
+
+def _relations():
+    """Внешние ключи существующих таблиц в порядке FK_MODELS"""
+    for model in FK_MODELS:
+        if db.table_exists(model._meta.table_name):
+            yield from foreign_keys(model)
+
+
+def _orphan_condition(field) -> tuple:
+    """(таблица, колонка, условие WHERE) для строк, ссылающихся на несуществующую запись"""
+    table, column = field.model._meta.table_name, field.column_name
+    parent = field.rel_model._meta.table_name
+    parent_key = field.rel_field.column_name
+    return table, column, (f'{column} IS NOT NULL AND {column} NOT IN '
+                           f'(SELECT {parent_key} FROM {parent})')
+
+
+def find_orphans() -> dict:
+    """
+    Посчитать строки со ссылками на удаленные записи
+
+    Returns:
+        {'таблица.колонка': число строк} только для колонок с «сиротами»
+    """
+    report = {}
+    for field in _relations():
+        table, column, condition = _orphan_condition(field)
+        count = db.execute_sql(f'SELECT COUNT(*) FROM {table} WHERE {condition}').fetchone()[0]
+        if count:
+            report[f'{table}.{column}'] = count
+    return report
+
+
+def sweep_orphans(dry_run: bool = False) -> dict:
+    """
+    Очистить «осиротевшие» строки так же, как это сделал бы ON DELETE
+
+    Для каждой ссылки выполняется одна операция над множеством строк:
+    SET NULL — UPDATE ... SET колонка = NULL, CASCADE — DELETE.
+
+    Args:
+        dry_run: только посчитать, ничего не менять
+
+    Returns:
+        {'таблица.колонка': число строк} — найденные (dry_run) или исправленные строки
+    """
+    if dry_run:
+        return find_orphans()
+
+    report = {}
+    with db.atomic():
+        for field in _relations():
+            table, column, condition = _orphan_condition(field)
+            if field.on_delete == 'SET NULL':
+                cursor = db.execute_sql(f'UPDATE {table} SET {column} = NULL WHERE {condition}')
+            else:
+                cursor = db.execute_sql(f'DELETE FROM {table} WHERE {condition}')
+            if cursor.rowcount:
+                report[f'{table}.{column}'] = cursor.rowcount
+    return report
+
+
+def _expected_keys(model) -> set:
+    return {(field.column_name, field.rel_model._meta.table_name, field.on_delete or 'NO ACTION')
+            for field in foreign_keys(model)}
+
+
+def _actual_keys(table: str) -> set:
+    return {(row[3], row[2], row[6])
+            for row in db.execute_sql(f'PRAGMA foreign_key_list("{table}")').fetchall()}
+
+
+def tables_to_rebuild() -> list:
+    """Модели, у которых внешние ключи в базе не совпадают с описанием модели"""
+    return [model for model in FK_MODELS
+            if db.table_exists(model._meta.table_name)
+            and _actual_keys(model._meta.table_name) != _expected_keys(model)]
+
+
+def _rebuild_table(model):
+    """
+    Пересоздать таблицу по описанию модели, сохранив данные, индексы и триггеры
+
+    SQLite не умеет менять ограничения существующей таблицы, поэтому
+    создается новая таблица, данные копируются, старая удаляется,
+    а новая переименовывается (процедура из документации ALTER TABLE).
+    """
+    table = model._meta.table_name
+    temp_table = f'{table}__new'
+    columns = [row[1] for row in db.execute_sql(f'PRAGMA table_info("{table}")').fetchall()]
+    common = ', '.join(f'"{field.column_name}"' for field in model._meta.sorted_fields
+                       if field.column_name in columns)
+    schema_objects = [sql for (sql,) in db.execute_sql(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+        "AND sql IS NOT NULL", (table,)).fetchall()]
+
+    create_sql, params = model._schema._create_table(safe=False).query()
+    db.execute_sql(f'DROP TABLE IF EXISTS "{temp_table}"')
+    db.execute_sql(create_sql.replace(f'CREATE TABLE "{table}"', f'CREATE TABLE "{temp_table}"', 1), params)
+    db.execute_sql(f'INSERT INTO "{temp_table}" ({common}) SELECT {common} FROM "{table}"')
+    db.execute_sql(f'DROP TABLE "{table}"')
+    db.execute_sql(f'ALTER TABLE "{temp_table}" RENAME TO "{table}"')
+    for sql in schema_objects:
+        db.execute_sql(sql)
+
+
+def ensure_foreign_keys() -> dict:
+    """
+    Миграция: пересобрать таблицы, у которых внешние ключи без нужного ON DELETE
+
+    Перед пересборкой удаляются «сироты» — иначе новые ограничения
+    не выполнялись бы. На время миграции проверка внешних ключей
+    выключается (переключать ее можно только вне транзакции).
+
+    Returns:
+        {'rebuilt': [таблицы], 'orphans': отчет sweep_orphans}
+    """
+    models = tables_to_rebuild()
+    if not models:
+        return {'rebuilt': [], 'orphans': {}}
+
+    db.execute_sql('PRAGMA foreign_keys = OFF')
+    # Ссылки на старые таблицы в триггерах других таблиц не переписываются при RENAME
+    db.execute_sql('PRAGMA legacy_alter_table = ON')
+    try:
+        with db.atomic():
+            orphans = sweep_orphans()
+            for model in models:
+                _rebuild_table(model)
+            violations = db.execute_sql('PRAGMA foreign_key_check').fetchall()
+            if violations:
+                raise RuntimeError(f"Нарушены внешние ключи после миграции: {violations[:10]}")
+    finally:
+        db.execute_sql('PRAGMA legacy_alter_table = OFF')
+        db.execute_sql('PRAGMA foreign_keys = ON')
+
+    rebuilt = [model._meta.table_name for model in models]
+    print(f"Миграция внешних ключей: пересобраны {', '.join(rebuilt)}")
+    for column, count in orphans.items():
+        print(f"Миграция внешних ключей: {column} — исправлено {count} строк без родителя")
+    return {'rebuilt': rebuilt, 'orphans': orphans}
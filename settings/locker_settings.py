@@ -0,0 +1,160 @@
+"""
+Настройки для назначения шкафчиков детям группы
+"""
+from typing import Dict, List, Optional
+from peewee import Case, IntegrityError
+from database import Child, db
+from settings.locker_symbols import LOCKER_SYMBOLS
+
+# Бит каждого символа в маске занятых шкафчиков (в порядке LOCKER_SYMBOLS)
+SYMBOL_BITS = {symbol: 1 << i for i, symbol in enumerate(LOCKER_SYMBOLS)}
+
+
+class LockerIndex:
+    """Занятость шкафчиков группы: маска занятых символов и назначения детей"""
+
+    def __init__(self, group_id: int, children: List[dict]):
+        self.group_id = group_id
+        self.children = children
+        self.assignments = {c['child_id']: c['locker_symbol'] for c in children}
+        self._original = dict(self.assignments)
+        self.used_mask = 0
+        for symbol in self.assignments.values():
+            self.used_mask |= SYMBOL_BITS.get(symbol, 0)
+
+    def is_free(self, symbol: str) -> bool:
+        """Свободен ли символ в группе"""
+        return not self.used_mask & SYMBOL_BITS.get(symbol, 0)
+
+    def free_symbols(self) -> List[str]:
+        """Свободные символы в порядке LOCKER_SYMBOLS"""
+        return [symbol for symbol, bit in SYMBOL_BITS.items() if not self.used_mask & bit]
+
+    def options_for(self, child_id: int) -> List[str]:
+        """Символы, доступные ребенку: свободные и его текущий"""
+        current = self.assignments.get(child_id)
+        return [symbol for symbol, bit in SYMBOL_BITS.items()
+                if not self.used_mask & bit or symbol == current]
+
+    def assign(self, child_id: int, symbol: Optional[str]) -> bool:
+        """
+        Назначить ребенку символ (None — снять назначение)
+
+        Returns:
+            False, если символ занят другим ребенком
+        """
+        current = self.assignments.get(child_id)
+        if symbol == current:
+            return True
+        if symbol and not self.is_free(symbol):
+            return False
+        self.used_mask &= ~SYMBOL_BITS.get(current, 0)
+        self.used_mask |= SYMBOL_BITS.get(symbol, 0)
+        self.assignments[child_id] = symbol or None
+        return True
+
+    def auto_assign(self) -> int:
+        """Назначить свободные шкафчики всем детям без шкафчика, вернуть число назначений"""
+        free = iter(self.free_symbols())
+        assigned = 0
+        for child in self.children:
+            child_id = child['child_id']
+            if self.assignments.get(child_id):
+                continue
+            symbol = next(free, None)
+            if symbol is None:
+                break
+            self.assign(child_id, symbol)
+            assigned += 1
+        return assigned
+
+    def changes(self) -> Dict[int, Optional[str]]:
+        """Назначения, отличающиеся от сохраненных в базе"""
+        return {child_id: symbol for child_id, symbol in self.assignments.items()
+                if symbol != self._original.get(child_id)}
+
+
+class LockerSettings:
+    """Класс для работы со шкафчиками детей"""
+
+    def get_locker_index(self, group_id: int) -> LockerIndex:
+        """Загрузить детей группы и занятость шкафчиков одним запросом"""
+        children = (Child
+                   .select(Child.child_id, Child.last_name, Child.first_name, Child.locker_symbol)
+                   .where(Child.group == group_id)
+                   .order_by(Child.last_name, Child.first_name)
+                   .dicts())
+        return LockerIndex(group_id, list(children))
+
+    def save_locker_assignments(self, group_id: int, assignments: Dict[int, Optional[str]]) -> int:
+        """
+        Сохранить назначения шкафчиков одной транзакцией
+
+        Сначала у измененных детей символ сбрасывается, затем новые символы
+        записываются одним UPDATE с CASE — так обмен шкафчиками между детьми
+        не нарушает уникальный индекс (group_id, locker_symbol).
+
+        Args:
+            group_id: ID группы
+            assignments: {child_id: символ или None}
+
+        Returns:
+            количество измененных записей
+
+        Raises:
+            ValueError: символ уже занят другим ребенком группы
+        """
+        if not assignments:
+            return 0
+
+        child_ids = list(assignments)
+        new_symbols = [(child_id, symbol) for child_id, symbol in assignments.items() if symbol]
+        in_group = Child.child_id.in_(child_ids) & (Child.group == group_id)
+
+        try:
+            with db.atomic():
+                changed = Child.update(locker_symbol=None).where(in_group).execute()
+                if new_symbols:
+                    (Child
+                     .update(locker_symbol=Case(Child.child_id, new_symbols))
+                     .where(Child.child_id.in_([child_id for child_id, _ in new_symbols]) & (Child.group == group_id))
+                     .execute())
+        except IntegrityError:
+            # Уникальный индекс (group_id, locker_symbol): символ назначен дважды
+            # или занят ребенком группы, которого нет в назначениях
+            taken = {symbol for (symbol,) in Child
+                     .select(Child.locker_symbol)
+                     .where((Child.group == group_id) & Child.locker_symbol.is_null(False)
+                            & Child.child_id.not_in(child_ids))
+                     .tuples()}
+            symbols = [symbol for _, symbol in new_symbols]
+            conflicts = sorted({symbol for symbol in symbols if symbol in taken or symbols.count(symbol) > 1})
+            raise ValueError(f"Шкафчик уже занят в группе: {', '.join(conflicts) or 'повторяющийся символ'}")
+        return changed
+
+    def auto_assign_lockers(self, group_id: int) -> int:
+        """Назначить свободные шкафчики всем детям группы без шкафчика"""
+        index = self.get_locker_index(group_id)
+        assigned = index.auto_assign()
+        self.save_locker_assignments(group_id, index.changes())
+        return assigned
+
+    def ensure_locker_constraint(self):
+        """
+        Создать частичный уникальный индекс (group_id, locker_symbol)
+
+        Перед созданием индекса у повторяющихся в группе символов сохраняется
+        только первый ребенок, остальным символ сбрасывается.
+        """
+        with db.atomic():
+            db.execute_sql(
+                'UPDATE children SET locker_symbol = NULL '
+                'WHERE locker_symbol IS NOT NULL AND group_id IS NOT NULL AND child_id NOT IN ('
+                '  SELECT MIN(child_id) FROM children '
+                '  WHERE locker_symbol IS NOT NULL AND group_id IS NOT NULL '
+                '  GROUP BY group_id, locker_symbol)'
+            )
+            db.execute_sql(
+                'CREATE UNIQUE INDEX IF NOT EXISTS child_group_locker_symbol '
+                'ON children (group_id, locker_symbol) WHERE locker_symbol IS NOT NULL'
+            )
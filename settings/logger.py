@@ -3,7 +3,7 @@
 """
 import logging
 from datetime import datetime
-from database import db, BaseModel
+from database import db, BaseModel, write_executor
 from peewee import CharField, TextField, DateTimeField
 
 
@@ -15,22 +15,33 @@ class AuditLog(BaseModel):
     entity = CharField(max_length=50, null=True)
     details = TextField(null=True)
     level = CharField(max_length=20, default='INFO')
+    
+    class Meta:
+        # Просмотр журнала (новые сверху) и очистка по сроку ищут по времени
+        indexes = (
+            (('timestamp',), False),
+        )
 
 
 class AppLogger:
     """Класс для логирования действий в приложении"""
     
     def __init__(self):
-        # Настройка файлового логирования
-        logging.basicConfig(
-            filename='kindergarten.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            encoding='utf-8'
-        )
         self.logger = logging.getLogger('kindergarten')
+        self._file_configured = False
         self._table_created = False
     
+    def _ensure_file_logging(self):
+        """Настроить файловое логирование при первой записи, а не при импорте модуля"""
+        if not self._file_configured:
+            logging.basicConfig(
+                filename='kindergarten.log',
+                level=logging.INFO,
+                format='%(asctime)s - %(levelname)s - %(message)s',
+                encoding='utf-8'
+            )
+            self._file_configured = True
+    
     def _ensure_table(self):
         """Создать таблицу логов если её нет"""
         if not self._table_created:
@@ -40,6 +51,16 @@ class AppLogger:
             except Exception as e:
                 self.logger.error(f"Failed to create logs table: {str(e)}")
     
+    def log_to_file(self, message: str, level: str = 'INFO'):
+        """Записать сообщение только в файл (служебная статистика, без журнала действий в базе)"""
+        self._ensure_file_logging()
+        if level == 'ERROR':
+            self.logger.error(message)
+        elif level == 'WARNING':
+            self.logger.warning(message)
+        else:
+            self.logger.info(message)
+    
     def log(self, action: str, user: str = None, entity: str = None, details: str = None, level: str = 'INFO'):
         """Записать лог в файл и базу данных"""
         # Запись в файл
@@ -48,18 +69,13 @@ class AppLogger:
             log_message += f" | Entity: {entity}"
         if details:
             log_message += f" | Details: {details}"
-        
-        if level == 'ERROR':
-            self.logger.error(log_message)
-        elif level == 'WARNING':
-            self.logger.warning(log_message)
-        else:
-            self.logger.info(log_message)
+        self.log_to_file(log_message, level)
         
         # Запись в базу данных
         try:
             self._ensure_table()
-            AuditLog.create(
+            write_executor.run(
+                AuditLog.create,
                 user=user,
                 action=action,
                 entity=entity,
@@ -92,11 +108,11 @@ class AppLogger:
         ]
     
     def clear_old_logs(self, days: int = 90):
-        """Удалить логи старше указанного количества дней"""
+        """Удалить логи старше указанного количества дней (порциями, не блокируя запись логов)"""
         self._ensure_table()
         from datetime import timedelta
-        old_date = datetime.now() - timedelta(days=days)
-        deleted = AuditLog.delete().where(AuditLog.timestamp < old_date).execute()
+        from settings.retention import RetentionService
+        deleted = RetentionService().purge_audit_log(datetime.now() - timedelta(days=days))
         self.log('CLEAR_LOGS', 'System', details=f'Deleted {deleted} old log entries')
         return deleted
 
@@ -1,7 +1,48 @@
 """
 Настройки для работы с медицинскими картами
 """
-from datetime import datetime
+import re
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, List
+from peewee import JOIN, fn
+from database import Child, Group, MedicalRecord, Allergy, Vaccination, db
+from settings.models import normalize_date, to_iso_date
+
+# Значения текстовых полей медкарты, которые означают «ничего не выявлено»
+EMPTY_MARKERS = ('', '-', 'нет', 'Нет', 'НЕТ', 'не выявлено', 'Не выявлено', 'отсутствуют', 'Отсутствуют')
+
+
+# Разделители перечислений в текстовых полях аллергий и прививок
+ITEM_SEPARATORS = re.compile(r'[,;\n]+')
+
+# Разобранные поля медкарты: поле записи -> (модель, поле модели)
+HEALTH_ITEMS = {
+    'allergies': (Allergy, 'allergen'),
+    'vaccinations': (Vaccination, 'vaccine'),
+}
+
+
+def has_value(field):
+    """SQL-условие: текстовое поле медкарты заполнено содержательным значением"""
+    return field.is_null(False) & fn.TRIM(field).not_in(EMPTY_MARKERS)
+
+
+def normalize_item(name: str) -> str:
+    """Привести название аллергена или прививки к виду, по которому идет поиск"""
+    return ' '.join(name.split()).lower()
+
+
+def parse_items(text: str) -> List[str]:
+    """Разобрать перечисление через запятую, точку с запятой или перевод строки"""
+    if not text:
+        return []
+    empty = {normalize_item(marker) for marker in EMPTY_MARKERS}
+    items = []
+    for part in ITEM_SEPARATORS.split(text):
+        item = normalize_item(part).strip(' .')
+        if item not in empty and item not in items:
+            items.append(item)
+    return items
 
 
 class MedicalCardSettings:
@@ -9,45 +50,193 @@ class MedicalCardSettings:
     
     def get_medical_record(self, child_id: int):
         """Получить медицинскую карту ребёнка"""
-        from database import MedicalRecord
-        try:
-            record = MedicalRecord.get(MedicalRecord.child == child_id)
-            return {
-                'record_id': record.record_id,
-                'child_id': record.child.child_id,
-                'blood_type': record.blood_type,
-                'allergies': record.allergies,
-                'chronic_diseases': record.chronic_diseases,
-                'vaccinations': record.vaccinations,
-                'height': record.height,
-                'weight': record.weight,
-                'doctor_notes': record.doctor_notes,
-                'emergency_contact': record.emergency_contact,
-                'last_checkup': record.last_checkup.strftime('%d-%m-%Y') if record.last_checkup else None
-            }
-        except:
-            return None
+        record = MedicalRecord.get_or_none(MedicalRecord.child == child_id)
+        return self._record_to_dict(record) if record else None
+    
+    def _record_to_dict(self, record) -> dict:
+        """Преобразовать модель медицинской карты в словарь"""
+        return {
+            'record_id': record.record_id,
+            'child_id': record.child_id,
+            'blood_type': record.blood_type,
+            'allergies': record.allergies,
+            'chronic_diseases': record.chronic_diseases,
+            'vaccinations': record.vaccinations,
+            'height': record.height,
+            'weight': record.weight,
+            'doctor_notes': record.doctor_notes,
+            'emergency_contact': record.emergency_contact,
+            'last_checkup': to_iso_date(record.last_checkup)
+        }
     
     def create_or_update_medical_record(self, child_id: int, **kwargs):
-        """Создать или обновить медицинскую карту"""
-        from database import MedicalRecord
-        
-        # Преобразуем дату из строки
-        if 'last_checkup' in kwargs and kwargs['last_checkup']:
-            try:
-                if '-' in kwargs['last_checkup'] and len(kwargs['last_checkup'].split('-')[0]) <= 2:
-                    kwargs['last_checkup'] = datetime.strptime(kwargs['last_checkup'], '%d-%m-%Y').date()
-                else:
-                    kwargs['last_checkup'] = datetime.strptime(kwargs['last_checkup'], '%Y-%m-%d').date()
-            except:
-                kwargs['last_checkup'] = None
+        """
+        Создать или обновить медицинскую карту одним запросом
+        
+        Карта уникальна для ребенка, поэтому используется INSERT ... ON CONFLICT(child_id):
+        при обновлении меняются только переданные поля и updated_at.
+        """
+        if 'last_checkup' in kwargs:
+            kwargs['last_checkup'] = normalize_date(kwargs['last_checkup'], "Дата осмотра")
         
         kwargs['updated_at'] = datetime.now()
         
-        try:
-            record = MedicalRecord.get(MedicalRecord.child == child_id)
-            for key, value in kwargs.items():
-                setattr(record, key, value)
-            record.save()
-        except:
-            MedicalRecord.create(child=child_id, **kwargs)
\ No newline at end of file
+        with db.atomic():
+            (MedicalRecord
+             .insert(child=child_id, **kwargs)
+             .on_conflict(conflict_target=[MedicalRecord.child],
+                          preserve=[getattr(MedicalRecord, key) for key in kwargs])
+             .execute())
+            
+            for field_name in HEALTH_ITEMS.keys() & kwargs.keys():
+                self._sync_health_items(field_name, {child_id: kwargs[field_name]})
+    
+    def _sync_health_items(self, field_name: str, texts: Dict[int, str]):
+        """Перезаписать разобранные аллергии или прививки детей по тексту медкарты"""
+        model, column = HEALTH_ITEMS[field_name]
+        model.delete().where(model.child.in_(list(texts))).execute()
+        rows = [(child_id, item) for child_id, text in texts.items() for item in parse_items(text)]
+        if rows:
+            model.insert_many(rows, fields=[model.child, getattr(model, column)]).execute()
+    
+    def backfill_health_items(self):
+        """
+        Разобрать текстовые поля аллергий и прививок в таблицы child_allergies и child_vaccinations
+        
+        Обрабатываются только карты с заполненным полем и без разобранных строк,
+        поэтому повторный запуск почти ничего не стоит.
+        """
+        for field_name, (model, _) in HEALTH_ITEMS.items():
+            field = getattr(MedicalRecord, field_name)
+            pending = (MedicalRecord
+                       .select(MedicalRecord.child, field)
+                       .where(has_value(field) &
+                              MedicalRecord.child.not_in(model.select(model.child)))
+                       .tuples())
+            texts = dict(pending)
+            if texts:
+                with db.atomic():
+                    self._sync_health_items(field_name, texts)
+    
+    def _health_query(self, *fields, group_id: int = None):
+        """Дети (с группой) и их медкарты; group_id ограничивает одной группой"""
+        query = (Child
+                 .select(Child.child_id, Child.last_name, Child.first_name,
+                         Group.group_id, Group.group_name, *fields)
+                 .join(Group, JOIN.LEFT_OUTER, on=(Child.group == Group.group_id))
+                 .switch(Child)
+                 .join(MedicalRecord, JOIN.LEFT_OUTER, on=(MedicalRecord.child == Child.child_id)))
+        if group_id is not None:
+            query = query.where(Child.group == group_id)
+        return query
+    
+    def get_children_with_allergies(self, group_id: int = None) -> List[dict]:
+        """Дети с указанными аллергиями (по группе или по всему саду)"""
+        query = (self._health_query(MedicalRecord.allergies, group_id=group_id)
+                 .where(has_value(MedicalRecord.allergies))
+                 .order_by(Group.group_name, Child.last_name, Child.first_name))
+        return list(query.dicts())
+    
+    def get_children_with_chronic_diseases(self, group_id: int = None) -> List[dict]:
+        """Дети с хроническими заболеваниями (по группе или по всему саду)"""
+        query = (self._health_query(MedicalRecord.chronic_diseases, group_id=group_id)
+                 .where(has_value(MedicalRecord.chronic_diseases))
+                 .order_by(Group.group_name, Child.last_name, Child.first_name))
+        return list(query.dicts())
+    
+    def get_overdue_checkups(self, days: int, group_id: int = None, include_missing: bool = True) -> List[dict]:
+        """
+        Дети, чей последний осмотр был раньше, чем days дней назад
+        
+        Args:
+            days: допустимый срок с последнего осмотра
+            group_id: ID группы (None — весь сад)
+            include_missing: включать детей без медкарты или без даты осмотра
+        """
+        threshold = date.today() - timedelta(days=days)
+        overdue = MedicalRecord.last_checkup < threshold
+        if include_missing:
+            overdue |= MedicalRecord.last_checkup.is_null()
+        
+        query = (self._health_query(MedicalRecord.last_checkup, group_id=group_id)
+                 .where(overdue)
+                 .order_by(MedicalRecord.last_checkup.asc(nulls='first'), Child.last_name, Child.first_name))
+        return list(query.dicts())
+    
+    def get_health_summary(self, group_id: int = None, checkup_days: int = 365) -> dict:
+        """Сводка по здоровью одним агрегирующим запросом"""
+        threshold = date.today() - timedelta(days=checkup_days)
+        query = (Child
+                 .select(fn.COUNT(Child.child_id).alias('children'),
+                         fn.COUNT(MedicalRecord.record_id).alias('with_record'),
+                         fn.SUM(has_value(MedicalRecord.allergies).cast('INTEGER')).alias('with_allergies'),
+                         fn.SUM(has_value(MedicalRecord.chronic_diseases).cast('INTEGER')).alias('with_chronic_diseases'),
+                         fn.SUM((MedicalRecord.last_checkup.is_null() |
+                                 (MedicalRecord.last_checkup < threshold)).cast('INTEGER')).alias('overdue_checkups'))
+                 .join(MedicalRecord, JOIN.LEFT_OUTER, on=(MedicalRecord.child == Child.child_id)))
+        if group_id is not None:
+            query = query.where(Child.group == group_id)
+        summary = query.dicts().get()
+        return {key: value or 0 for key, value in summary.items()}
+    
+    def _children_with_item(self, model, column: str, name: str, group_ids: Iterable[int] = None):
+        """Запрос ID детей, у которых есть аллерген или прививка (поиск по индексу)"""
+        query = (model
+                 .select(model.child)
+                 .where(getattr(model, column) == normalize_item(name)))
+        if group_ids is not None:
+            query = (query
+                     .join(Child, on=(model.child == Child.child_id))
+                     .where(Child.group.in_(list(group_ids))))
+        return query
+    
+    def get_children_with_allergen(self, allergen: str, group_ids: Iterable[int] = None) -> List[int]:
+        """ID детей с аллергией на allergen (в указанных группах или во всем саду)"""
+        return [child_id for (child_id,) in self._children_with_item(Allergy, 'allergen', allergen, group_ids).tuples()]
+    
+    def get_children_with_vaccine(self, vaccine: str, group_ids: Iterable[int] = None) -> List[int]:
+        """ID детей, получивших прививку vaccine"""
+        return [child_id for (child_id,) in self._children_with_item(Vaccination, 'vaccine', vaccine, group_ids).tuples()]
+    
+    def get_children_without_vaccine(self, vaccine: str, group_ids: Iterable[int] = None) -> List[int]:
+        """ID детей без прививки vaccine"""
+        query = Child.select(Child.child_id).where(
+            Child.child_id.not_in(self._children_with_item(Vaccination, 'vaccine', vaccine)))
+        if group_ids is not None:
+            query = query.where(Child.group.in_(list(group_ids)))
+        return [child_id for (child_id,) in query.tuples()]
+    
+    def get_allergies_by_groups(self, group_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """Аллергены детей указанных групп одним запросом: {child_id: [аллергены]}"""
+        rows = (Allergy
+                .select(Allergy.child, Allergy.allergen)
+                .join(Child, on=(Allergy.child == Child.child_id))
+                .where(Child.group.in_(list(group_ids)))
+                .order_by(Allergy.child, Allergy.allergen)
+                .tuples())
+        allergies = {}
+        for child_id, allergen in rows:
+            allergies.setdefault(child_id, []).append(allergen)
+        return allergies
+    
+    def ensure_child_unique(self):
+        """
+        Сделать индекс medical_records(child_id) уникальным
+        
+        Нужен для upsert по ребенку. Если у ребенка несколько карт,
+        остается последняя обновленная.
+        """
+        indexes = {index.name: index.unique for index in db.get_indexes(MedicalRecord._meta.table_name)}
+        if indexes.get('medicalrecord_child_id'):
+            return
+        
+        with db.atomic():
+            db.execute_sql(
+                'DELETE FROM medical_records WHERE record_id NOT IN ('
+                '  SELECT record_id FROM ('
+                '    SELECT record_id, ROW_NUMBER() OVER ('
+                '      PARTITION BY child_id ORDER BY updated_at DESC, record_id DESC) AS rn'
+                '    FROM medical_records) WHERE rn = 1)'
+            )
+            db.execute_sql('DROP INDEX IF EXISTS medicalrecord_child_id')
+            db.execute_sql('CREATE UNIQUE INDEX medicalrecord_child_id ON medical_records (child_id)')
@@ -1,26 +1,164 @@
 """
 Модели данных и вспомогательные функции
 """
-from datetime import datetime
-from typing import Optional
-from database import Child, Group, Teacher # Import Peewee models
+from datetime import datetime, date
+from functools import lru_cache
+from typing import Optional, Tuple
+from settings.config import AGE_CATEGORY_RANGES
 
 
-def format_date(date_str: str) -> str:
-    """Форматировать дату в читаемый вид"""
-    if not date_str:
-        return ""
+# Даты хранятся в базе в ISO-8601 (гггг-мм-дд), вводятся и показываются как дд-мм-гггг
+DATE_FORMAT = "%Y-%m-%d"
+DISPLAY_DATE_FORMAT = "%d-%m-%Y"
+INPUT_DATE_FORMATS = (DISPLAY_DATE_FORMAT, "%d.%m.%Y")
+
+
+@lru_cache(maxsize=8192)
+def _parse_date_text(text: str) -> Optional[date]:
+    text = text.strip()
     try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        return date_obj.strftime("%d-%m-%Y")
-    except:
-        return date_str
+        # гггг-мм-дд, в том числе начало значения даты-времени
+        if len(text) >= 10 and text[4] == '-':
+            return date.fromisoformat(text[:10])
+        # дд-мм-гггг и дд.мм.гггг без strptime
+        if len(text) == 10 and text[2] in '-.' and text[5] == text[2]:
+            return date(int(text[6:]), int(text[3:5]), int(text[:2]))
+    except ValueError:
+        return None
+    for date_format in INPUT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            pass
+    return None
+
+
+def parse_date(value) -> Optional[date]:
+    """
+    Разобрать дату: date, гггг-мм-дд (ISO), дд-мм-гггг или дд.мм.гггг
+    
+    Строки разбираются один раз: результат кешируется, поэтому повторный
+    разбор одних и тех же дат при отрисовке списков ничего не стоит.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        return None
+    return _parse_date_text(str(value))
+
+
+def to_iso_date(value) -> Optional[str]:
+    """Дата в ISO (гггг-мм-дд) или None, если значение не удалось разобрать"""
+    parsed = parse_date(value)
+    return parsed.isoformat() if parsed else None
+
+
+@lru_cache(maxsize=8192)
+def _format_date_text(text: str) -> str:
+    parsed = _parse_date_text(text)
+    return parsed.strftime(DISPLAY_DATE_FORMAT) if parsed else text
+
+
+def format_date(value) -> str:
+    """Дата для отображения (дд-мм-гггг); нераспознанное значение возвращается как есть"""
+    if not value:
+        return ""
+    if isinstance(value, date):
+        return value.strftime(DISPLAY_DATE_FORMAT)
+    return _format_date_text(str(value))
 
 
 def validate_date(date_str: str) -> bool:
-    """Проверить корректность даты"""
+    """Проверить корректность даты (любой поддерживаемый формат)"""
+    return parse_date(date_str) is not None
+
+
+def normalize_date(value, label: str = "Дата", required: bool = False) -> Optional[str]:
+    """
+    Дата для записи в базу (проверка на входе классов настроек)
+    
+    Returns:
+        дата в ISO (гггг-мм-дд) или None для пустого необязательного значения
+    
+    Raises:
+        ValueError: дата не указана или не распознана
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ValueError(f"{label}: дата не указана")
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"{label}: неверная дата «{value}», ожидается дд-мм-гггг")
+    return parsed.isoformat()
+
+
+def years_between(start: date, end: date) -> int:
+    """Количество полных лет между датами"""
+    return end.year - start.year - ((end.month, end.day) < (start.month, start.day))
+
+
+@lru_cache(maxsize=4096)
+def _age_on(birth_date_str: str, today: date) -> Optional[int]:
+    birth_date = parse_date(birth_date_str)
+    return years_between(birth_date, today) if birth_date else None
+
+
+def calculate_age(birth_date_str: str, today: date = None) -> Optional[int]:
+    """
+    Возраст в полных годах (None, если дату не удалось разобрать)
+    
+    Результат кешируется по строке даты и текущему дню, поэтому при
+    отрисовке списков дата каждого ребенка разбирается один раз в сутки.
+    """
+    return _age_on(birth_date_str, today or date.today())
+
+
+def format_age(age: int) -> str:
+    """Возраст с правильным окончанием: 1 год, 2 года, 5 лет"""
+    if age % 10 == 1 and age % 100 != 11:
+        return f"{age} год"
+    if age % 10 in (2, 3, 4) and age % 100 not in (12, 13, 14):
+        return f"{age} года"
+    return f"{age} лет"
+
+
+def age_category_for_age(age: Optional[int]) -> Optional[str]:
+    """Возрастная категория для возраста в полных годах"""
+    if age is None:
+        return None
+    for category, (min_age, max_age) in AGE_CATEGORY_RANGES.items():
+        if min_age <= age <= max_age:
+            return category
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _age_category_on(birth_date_str: str, today: date) -> Optional[str]:
+    return age_category_for_age(_age_on(birth_date_str, today))
+
+
+def current_age_category(birth_date_str: str) -> Optional[str]:
+    """Текущая возрастная категория ребенка (кешируется до смены дня)"""
+    return _age_category_on(birth_date_str, date.today())
+
+
+def shift_years(day: date, years: int) -> date:
+    """Сдвинуть дату на years лет назад (29 февраля становится 28-м)"""
     try:
-        datetime.strptime(date_str, "%Y-%m-%d")
-        return True
-    except:
-        return False
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def birth_date_range(min_age: int, max_age: int, today: date = None) -> Tuple[str, str]:
+    """
+    Диапазон дат рождения для возраста от min_age до max_age полных лет
+    
+    Returns:
+        (после, по) в ISO: ребенку нужный возраст, если после < дата рождения <= по
+    """
+    today = today or date.today()
+    return shift_years(today, max_age + 1).isoformat(), shift_years(today, min_age).isoformat()
@@ -1,6 +1,7 @@
 from peewee import *
 from typing import List, Optional
 from database import Parent
+from settings.records import ParentRecord
 
 
 class ParentsSettings:
@@ -32,10 +33,10 @@ class ParentsSettings:
         )
         return parent.parent_id
     
-    def get_all_parents(self) -> List[dict]:
+    def get_all_parents(self) -> List[ParentRecord]:
         """Получить список всех родителей"""
-        parents = Parent.select().order_by(Parent.last_name, Parent.first_name)
-        return [self._parent_to_dict(parent) for parent in parents]
+        parents = Parent.select(*ParentRecord.columns()).order_by(Parent.last_name, Parent.first_name)
+        return ParentRecord.fetch(parents)
     
     def get_parent_by_id(self, parent_id: int) -> Optional[dict]:
         """Получить информацию о родителе по ID"""
@@ -57,23 +58,29 @@ class ParentsSettings:
         """Удалить родителя"""
         return Parent.delete().where(Parent.parent_id == parent_id).execute()
     
-    def search_parents(self, search_term: str) -> List[dict]:
-        """Поиск родителей по ФИО, телефону или email"""
-        if not search_term.strip():
-            return self.get_all_parents()
+    def search_parents(self, search_term: str, limit: int = None, offset: int = 0) -> List[ParentRecord]:
+        """
+        Поиск родителей по ФИО, телефону или email
         
-        search_pattern = f"%{search_term}%"
-        parents = (Parent
-                   .select()
-                   .where(
-                       (Parent.last_name ** search_pattern) |
-                       (Parent.first_name ** search_pattern) |
-                       (Parent.middle_name ** search_pattern) |
-                       (Parent.phone ** search_pattern) |
-                       (Parent.email ** search_pattern)
-                   )
-                   .order_by(Parent.last_name, Parent.first_name))
-        return [self._parent_to_dict(parent) for parent in parents]
+        Args:
+            search_term: строка поиска (пустая — все родители)
+            limit: размер страницы (None — без ограничения)
+            offset: смещение страницы
+        """
+        parents = Parent.select(*ParentRecord.columns())
+        if search_term.strip():
+            search_pattern = f"%{search_term}%"
+            parents = parents.where(
+                (Parent.last_name ** search_pattern) |
+                (Parent.first_name ** search_pattern) |
+                (Parent.middle_name ** search_pattern) |
+                (Parent.phone ** search_pattern) |
+                (Parent.email ** search_pattern)
+            )
+        parents = parents.order_by(Parent.last_name, Parent.first_name)
+        if limit is not None:
+            parents = parents.limit(limit).offset(offset)
+        return ParentRecord.fetch(parents)
     
     def _parent_to_dict(self, parent: Parent) -> dict:
         """Преобразовать модель родителя в словарь"""
@@ -0,0 +1,142 @@
+"""
+Компактные записи строк для списочных запросов
+"""
+from collections.abc import Mapping
+from peewee import fn, Case, Value
+from database import Child, Group, Parent, Teacher
+
+
+def full_name_expr(model):
+    """SQL-выражение 'Фамилия Имя [Отчество]' для модели с полями ФИО"""
+    middle = Case(None, [(fn.COALESCE(model.middle_name, '') != '', Value(' ').concat(model.middle_name))], '')
+    return model.last_name.concat(' ').concat(model.first_name).concat(middle)
+
+
+class Record(Mapping):
+    """
+    Легковесная запись строки таблицы.
+
+    Хранит значения одним кортежем вместо словаря на каждую строку и
+    поддерживает интерфейс словаря только для чтения (row['key'], get, keys, items),
+    поэтому представления работают с ней так же, как с результатом *_to_dict.
+    Поля из OPTIONAL_FIELDS со значением None считаются отсутствующими —
+    как ключи, которые *_to_dict добавляет только при наличии связанной записи.
+    """
+    __slots__ = ('_values',)
+
+    # Пары (имя поля, выражение для SELECT) — задаются в наследниках
+    COLUMNS = ()
+    OPTIONAL_FIELDS = frozenset()
+    FIELDS = ()
+    _INDEX = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(name for name, _ in cls.COLUMNS)
+        cls._INDEX = {name: i for i, name in enumerate(cls.FIELDS)}
+
+    def __init__(self, values: tuple):
+        self._values = values
+
+    @classmethod
+    def columns(cls) -> list:
+        """Выражения для SELECT в порядке полей записи"""
+        return [expr for _, expr in cls.COLUMNS]
+
+    @classmethod
+    def fetch(cls, query) -> list:
+        """Выполнить запрос без создания моделей и вернуть список записей"""
+        cursor = query.model._meta.database.execute(query)
+        return [cls(row) for row in cursor]
+
+    def __getitem__(self, key):
+        value = self._values[self._INDEX[key]]
+        if value is None and key in self.OPTIONAL_FIELDS:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        optional = self.OPTIONAL_FIELDS
+        for name, value in zip(self.FIELDS, self._values):
+            if value is None and name in optional:
+                continue
+            yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self) -> dict:
+        """Изменяемая копия записи в виде словаря"""
+        return dict(self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self)!r})"
+
+
+class ChildRecord(Record):
+    """Запись ребенка (ключи совпадают с ChildrenSettings._child_to_dict)"""
+    __slots__ = ()
+    COLUMNS = (
+        ('child_id', Child.child_id),
+        ('last_name', Child.last_name),
+        ('first_name', Child.first_name),
+        ('middle_name', fn.COALESCE(Child.middle_name, '')),
+        ('birth_date', Child.birth_date),
+        ('gender', Child.gender),
+        ('group_id', Group.group_id),
+        ('enrollment_date', Child.enrollment_date),
+        ('locker_symbol', Child.locker_symbol),
+        ('created_at', fn.REPLACE(Child.created_at, ' ', 'T')),
+        ('group_name', Group.group_name),
+        ('age_category', Group.age_category),
+    )
+    OPTIONAL_FIELDS = frozenset({'group_name', 'age_category'})
+
+
+class ParentRecord(Record):
+    """Запись родителя (ключи совпадают с ParentsSettings._parent_to_dict)"""
+    __slots__ = ()
+    COLUMNS = (
+        ('parent_id', Parent.parent_id),
+        ('last_name', Parent.last_name),
+        ('first_name', Parent.first_name),
+        ('middle_name', fn.COALESCE(Parent.middle_name, '')),
+        ('full_name', full_name_expr(Parent)),
+        ('phone', fn.COALESCE(Parent.phone, '')),
+        ('email', fn.COALESCE(Parent.email, '')),
+        ('address', fn.COALESCE(Parent.address, '')),
+        ('created_at', fn.REPLACE(Parent.created_at, ' ', 'T')),
+    )
+
+
+class TeacherRecord(Record):
+    """Запись воспитателя (ключи совпадают с TeachersSettings._teacher_to_dict)"""
+    __slots__ = ()
+    COLUMNS = (
+        ('teacher_id', Teacher.teacher_id),
+        ('last_name', Teacher.last_name),
+        ('first_name', Teacher.first_name),
+        ('middle_name', fn.COALESCE(Teacher.middle_name, '')),
+        ('full_name', full_name_expr(Teacher)),
+        ('phone', fn.COALESCE(Teacher.phone, '')),
+        ('email', fn.COALESCE(Teacher.email, '')),
+        ('birth_date', fn.COALESCE(Teacher.birth_date, '')),
+        ('address', fn.COALESCE(Teacher.address, '')),
+        ('education', fn.COALESCE(Teacher.education, '')),
+        ('experience', Teacher.experience),
+        ('created_at', fn.REPLACE(Teacher.created_at, ' ', 'T')),
+    )
+
+
+class GroupRecord(Record):
+    """Запись группы (ключи совпадают с GroupsSettings._group_to_dict)"""
+    __slots__ = ()
+    COLUMNS = (
+        ('group_id', Group.group_id),
+        ('group_name', Group.group_name),
+        ('age_category', Group.age_category),
+        ('teacher_id', Teacher.teacher_id),
+        ('created_at', fn.REPLACE(Group.created_at, ' ', 'T')),
+        ('teacher_name', full_name_expr(Teacher)),
+    )
+    OPTIONAL_FIELDS = frozenset({'teacher_name'})
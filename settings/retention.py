@@ -0,0 +1,295 @@
+"""
+Хранение данных: удаление устаревших записей порциями и фоновое расписание
+
+Устаревшие строки удаляются короткими транзакциями по диапазонам первичного
+ключа с паузами между ними, поэтому запись других сессий (в том числе
+app_logger.log) не ждет окончания всей очистки. После очистки освобожденные
+страницы возвращаются файловой системе через PRAGMA incremental_vacuum.
+"""
+import glob
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from database import db, write_executor, run_with_connection
+from settings.config import (RETENTION_DAYS, RETENTION_BATCH_SIZE, RETENTION_BATCH_PAUSE,
+                             RETENTION_VACUUM_PAGES, RETENTION_INTERVAL, RETENTION_START_DELAY,
+                             BACKUP_FILE_PATTERN, BACKUP_KEEP_MIN)
+
+# Режим auto_vacuum, при котором работает PRAGMA incremental_vacuum
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def ensure_incremental_vacuum() -> bool:
+    """
+    Миграция: включить auto_vacuum = INCREMENTAL
+
+    Для существующей базы режим применяется только после полного VACUUM.
+    Выполняется планировщиком в фоновом потоке через очередь записи (вне
+    транзакции); признак выполнения — сам режим auto_vacuum в файле базы,
+    поэтому VACUUM выполняется один раз.
+
+    Returns:
+        True, если режим включен сейчас
+    """
+    if db.execute_sql('PRAGMA auto_vacuum').fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return False
+    db.execute_sql(f'PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}')
+    db.execute_sql('VACUUM')
+    from settings.logger import app_logger
+    app_logger.log_to_file("Миграция: включен auto_vacuum = INCREMENTAL")
+    return True
+
+
+def delete_in_batches(table: str, key: str, condition: str, params: tuple = (),
+                      batch_size: int = RETENTION_BATCH_SIZE, pause: float = RETENTION_BATCH_PAUSE,
+                      progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Удалить строки по условию порциями по диапазонам первичного ключа
+
+    Границы диапазона берутся один раз; каждая порция — отдельная транзакция
+    в очереди записи вида DELETE ... WHERE key >= ? AND key < ? AND условие.
+
+    Args:
+        key: целочисленный первичный ключ (rowid) таблицы
+        progress: вызывается после каждой порции с числом удаленных строк
+
+    Returns:
+        число удаленных строк
+    """
+    low, high = db.execute_sql(f'SELECT MIN({key}), MAX({key}) FROM {table} WHERE {condition}',
+                               params).fetchone()
+    if low is None:
+        return 0
+
+    sql = f'DELETE FROM {table} WHERE {key} >= ? AND {key} < ? AND {condition}'
+
+    def delete_batch(start: int) -> int:
+        return db.execute_sql(sql, (start, start + batch_size, *params)).rowcount
+
+    deleted = 0
+    while low <= high:
+        deleted += write_executor.run(delete_batch, low)
+        low += batch_size
+        if progress:
+            progress(deleted)
+        if pause and low <= high:
+            time.sleep(pause)
+    return deleted
+
+
+def incremental_vacuum(pages: int = RETENTION_VACUUM_PAGES, pause: float = RETENTION_BATCH_PAUSE) -> int:
+    """
+    Вернуть свободные страницы файла базы порциями по pages страниц
+
+    Returns:
+        число освобожденных страниц (0, если auto_vacuum не INCREMENTAL)
+    """
+    if db.execute_sql('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        return 0
+
+    def vacuum_step() -> int:
+        before = db.execute_sql('PRAGMA freelist_count').fetchone()[0]
+        # execute() модуля sqlite3 делает один шаг и освобождает одну страницу,
+        # executescript() выполняет прагму до конца
+        db.connection().executescript(f'PRAGMA incremental_vacuum({pages});')
+        return before - db.execute_sql('PRAGMA freelist_count').fetchone()[0]
+
+    freed = 0
+    while db.execute_sql('PRAGMA freelist_count').fetchone()[0]:
+        step = write_executor.run(vacuum_step)
+        if not step:
+            break
+        freed += step
+        if pause:
+            time.sleep(pause)
+    # В режиме WAL файл уменьшается, когда изменения переносятся из журнала в базу;
+    # PASSIVE не ждет и не блокирует запись, поэтому выполняется вне очереди записи
+    if freed:
+        db.execute_sql('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+    return freed
+
+
+class RetentionService:
+    """Очистка устаревших данных по срокам хранения из RETENTION_DAYS"""
+
+    def __init__(self, retention_days: Dict[str, int] = None, batch_size: int = RETENTION_BATCH_SIZE,
+                 pause: float = RETENTION_BATCH_PAUSE,
+                 progress: Optional[Callable[[str, int], None]] = None):
+        """
+        Args:
+            retention_days: сроки хранения по видам данных (None в значении — не удалять)
+            progress: вызывается с (вид данных, удалено) по ходу очистки
+        """
+        self.retention_days = dict(RETENTION_DAYS if retention_days is None else retention_days)
+        self.batch_size = batch_size
+        self.pause = pause
+        self.progress = progress
+
+    def _cutoff(self, kind: str, now: datetime = None) -> Optional[datetime]:
+        days = self.retention_days.get(kind)
+        if days is None:
+            return None
+        return (now or datetime.now()) - timedelta(days=days)
+
+    def _report(self, kind: str):
+        if self.progress:
+            return lambda done: self.progress(kind, done)
+        return None
+
+    def run(self, now: datetime = None) -> Dict[str, int]:
+        """
+        Выполнить все виды очистки и incremental_vacuum
+
+        Returns:
+            {'audit_log': строк, 'attendance_archive': строк в удаленных файлах архива,
+             'backups': файлов, 'vacuum_pages': освобождено страниц}
+        """
+        return {
+            'audit_log': self.purge_audit_log(self._cutoff('audit_log', now)),
+            'attendance_archive': self.purge_attendance_archive(self._cutoff('attendance_archive', now)),
+            'backups': self.purge_backups(self._cutoff('backups', now)),
+            'vacuum_pages': incremental_vacuum(pause=self.pause),
+        }
+
+    def purge_audit_log(self, cutoff: Optional[datetime]) -> int:
+        """Удалить записи журнала действий старше cutoff"""
+        if cutoff is None:
+            return 0
+        from settings.logger import AuditLog
+        AuditLog.create_table(safe=True)
+        return delete_in_batches(AuditLog._meta.table_name, AuditLog._meta.primary_key.column_name,
+                                 'timestamp < ?', (str(cutoff),), self.batch_size, self.pause,
+                                 self._report('audit_log'))
+
+    def purge_attendance_archive(self, cutoff: Optional[datetime]) -> int:
+        """
+        Удалить файлы архивных учебных лет, закончившихся раньше cutoff
+
+        Год сначала отмечается удаленным (журнал перестает подключать файл),
+        затем файл удаляется целиком — строк в рабочей базе он не содержит.
+        Запись о годе остается, поэтому отметки за него по-прежнему нельзя
+        изменить. Если файл удалить не удалось (в Windows — пока он подключен
+        в другой сессии), удаление повторяется при следующем запуске.
+        Сводки статистики за эти годы сохраняются.
+
+        Returns:
+            число отметок в годах, файлы которых удалены
+        """
+        if cutoff is None:
+            return 0
+        from settings.attendance_archive import AttendanceArchiveYear, archive_path
+        from settings.logger import app_logger
+        years = list(AttendanceArchiveYear.select()
+                     .where(AttendanceArchiveYear.end_date < cutoff.date().isoformat()))
+        removed = 0
+        for year in years:
+            path = archive_path(year.academic_year)
+            if year.purged_at is not None and not os.path.exists(path):
+                continue
+            if year.purged_at is None:
+                write_executor.run(self._mark_purged, year.academic_year)
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as ex:
+                app_logger.log_to_file(f"Retention: файл {path} не удален, повтор при следующем запуске: {ex}",
+                                       'WARNING')
+                continue
+            removed += year.records
+            if self.progress:
+                self.progress('attendance_archive', removed)
+        return removed
+
+    @staticmethod
+    def _mark_purged(academic_year: int):
+        from settings.attendance_archive import AttendanceArchiveYear
+        (AttendanceArchiveYear.update(purged_at=datetime.now())
+         .where(AttendanceArchiveYear.academic_year == academic_year).execute())
+
+    def purge_backups(self, cutoff: Optional[datetime]) -> int:
+        """Удалить резервные копии старше cutoff, кроме BACKUP_KEEP_MIN последних"""
+        if cutoff is None:
+            return 0
+        pattern = os.path.join(os.path.dirname(os.path.abspath(db.database)), BACKUP_FILE_PATTERN)
+        backups = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+        removed = 0
+        for path in backups[BACKUP_KEEP_MIN:]:
+            if datetime.fromtimestamp(os.path.getmtime(path)) < cutoff:
+                os.remove(path)
+                removed += 1
+                if self.progress:
+                    self.progress('backups', removed)
+        return removed
+
+
+class RetentionScheduler:
+    """
+    Фоновый поток: раз в interval секунд очистка устаревших данных
+    и снимок численности групп для истории (запись — через очередь записи)
+    """
+
+    def __init__(self, service: RetentionService = None, interval: float = RETENTION_INTERVAL,
+                 start_delay: float = RETENTION_START_DELAY):
+        self.service = service or RetentionService(progress=self._log_progress)
+        self.interval = interval
+        self.start_delay = start_delay
+        self.last_report = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _log_progress(kind: str, done: int):
+        from settings.logger import app_logger
+        app_logger.log_to_file(f"Retention: {kind} — {done}")
+
+    def start(self):
+        """Запустить поток (повторный вызов ничего не делает)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='retention', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Остановить поток после текущей порции"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> Dict[str, int]:
+        """Выполнить очистку и снимок численности в текущем потоке и записать итог в журнал действий"""
+        from settings.logger import app_logger
+        from kindergarten_stats import StatisticsSummaries
+        # Один раз для базы: без INCREMENTAL incremental_vacuum ничего не освобождает
+        run_with_connection(write_executor.run, ensure_incremental_vacuum)
+        report = run_with_connection(self.service.run)
+        run_with_connection(write_executor.run, StatisticsSummaries().snapshot_headcount)
+        self.last_report = report
+        app_logger.log('RETENTION', 'System', 'Database',
+                       ', '.join(f'{kind}: {count}' for kind, count in report.items()))
+        return report
+
+    def _loop(self):
+        delay = self.start_delay
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+            except Exception as ex:
+                from settings.logger import app_logger
+                app_logger.log('RETENTION_FAILED', 'System', 'Database', str(ex), 'ERROR')
+            delay = self.interval
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_retention_scheduler() -> RetentionScheduler:
+    """Общий для всех сессий планировщик очистки (запускается при первом вызове)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RetentionScheduler()
+        _scheduler.start()
+        return _scheduler
@@ -1,6 +1,8 @@
 from peewee import *
 from typing import List, Optional
 from database import Teacher
+from settings.records import TeacherRecord
+from settings.models import normalize_date, to_iso_date
 
 
 class TeachersSettings:
@@ -17,7 +19,7 @@ class TeachersSettings:
             middle_name: отчество (опционально)
             phone: телефон (опционально)
             email: email (опционально)
-            birth_date: дата рождения (опционально)
+            birth_date: дата рождения, дд-мм-гггг или гггг-мм-дд (опционально)
             address: адрес (опционально)
             education: образование (опционально)
             experience: стаж работы (опционально)
@@ -31,17 +33,17 @@ class TeachersSettings:
             middle_name=middle_name,
             phone=phone,
             email=email,
-            birth_date=birth_date,
+            birth_date=normalize_date(birth_date, "Дата рождения"),
             address=address,
             education=education,
             experience=experience
         )
         return teacher.teacher_id
     
-    def get_all_teachers(self) -> List[dict]:
+    def get_all_teachers(self) -> List[TeacherRecord]:
         """Получить список всех воспитателей"""
-        teachers = Teacher.select().order_by(Teacher.last_name, Teacher.first_name)
-        return [self._teacher_to_dict(teacher) for teacher in teachers]
+        teachers = Teacher.select(*TeacherRecord.columns()).order_by(Teacher.last_name, Teacher.first_name)
+        return TeacherRecord.fetch(teachers)
     
     def get_teacher_by_id(self, teacher_id: int) -> Optional[dict]:
         """Получить информацию о воспитателе по ID"""
@@ -55,6 +57,8 @@ class TeachersSettings:
         """Обновить информацию о воспитателе"""
         allowed_fields = {'last_name', 'first_name', 'middle_name', 'phone', 'email', 'birth_date', 'address', 'education', 'experience'}
         updates = {k: v for k, v in kwargs.items() if k in allowed_fields}
+        if 'birth_date' in updates:
+            updates['birth_date'] = normalize_date(updates['birth_date'], "Дата рождения")
         
         if updates:
             Teacher.update(**updates).where(Teacher.teacher_id == teacher_id).execute()
@@ -63,23 +67,29 @@ class TeachersSettings:
         """Удалить воспитателя"""
         return Teacher.delete().where(Teacher.teacher_id == teacher_id).execute()
     
-    def search_teachers(self, search_term: str) -> List[dict]:
-        """Поиск воспитателей по ФИО, телефону или email"""
-        if not search_term.strip():
-            return self.get_all_teachers()
+    def search_teachers(self, search_term: str, limit: int = None, offset: int = 0) -> List[TeacherRecord]:
+        """
+        Поиск воспитателей по ФИО, телефону или email
         
-        search_pattern = f"%{search_term}%"
-        teachers = (Teacher
-                   .select()
-                   .where(
-                       (Teacher.last_name ** search_pattern) |
-                       (Teacher.first_name ** search_pattern) |
-                       (Teacher.middle_name ** search_pattern) |
-                       (Teacher.phone ** search_pattern) |
-                       (Teacher.email ** search_pattern)
-                   )
-                   .order_by(Teacher.last_name, Teacher.first_name))
-        return [self._teacher_to_dict(teacher) for teacher in teachers]
+        Args:
+            search_term: строка поиска (пустая — все воспитатели)
+            limit: размер страницы (None — без ограничения)
+            offset: смещение страницы
+        """
+        teachers = Teacher.select(*TeacherRecord.columns())
+        if search_term.strip():
+            search_pattern = f"%{search_term}%"
+            teachers = teachers.where(
+                (Teacher.last_name ** search_pattern) |
+                (Teacher.first_name ** search_pattern) |
+                (Teacher.middle_name ** search_pattern) |
+                (Teacher.phone ** search_pattern) |
+                (Teacher.email ** search_pattern)
+            )
+        teachers = teachers.order_by(Teacher.last_name, Teacher.first_name)
+        if limit is not None:
+            teachers = teachers.limit(limit).offset(offset)
+        return TeacherRecord.fetch(teachers)
     
     def _teacher_to_dict(self, teacher: Teacher) -> dict:
         """Преобразовать модель воспитателя в словарь"""
@@ -92,7 +102,7 @@ class TeachersSettings:
                         (f" {teacher.middle_name}" if teacher.middle_name else ""),
             'phone': teacher.phone or '',
             'email': teacher.email or '',
-            'birth_date': getattr(teacher, 'birth_date', None) or '',
+            'birth_date': to_iso_date(teacher.birth_date) or '',
             'address': getattr(teacher, 'address', None) or '',
             'education': getattr(teacher, 'education', None) or '',
             'experience': getattr(teacher, 'experience', None),
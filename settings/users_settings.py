@@ -0,0 +1,141 @@
+"""
+Настройки для работы с пользователями, их группами и правами доступа
+"""
+import threading
+from typing import Dict, Optional
+from peewee import JOIN
+from database import User, Group, UserPermission, db
+
+
+class UserContext:
+    """Данные сессии пользователя: учетная запись, группа и права доступа к страницам"""
+
+    def __init__(self, user_id: int, username: str, role: str, group_id: int = None,
+                 group_name: str = None, permissions: Dict[str, bool] = None):
+        self.user_id = user_id
+        self.username = username
+        self.role = role
+        self.group_id = group_id
+        self.group_name = group_name
+        self.permissions = permissions or {}
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == 'admin'
+
+    @property
+    def group(self) -> Optional[dict]:
+        """Группа пользователя в формате get_user_group"""
+        if self.group_id is None:
+            return None
+        return {'group_id': self.group_id, 'group_name': self.group_name}
+
+    def can_access(self, page_name: str) -> bool:
+        """Есть ли доступ к странице (по умолчанию доступ разрешен)"""
+        return self.is_admin or self.permissions.get(page_name, True)
+
+
+# Кеш контекстов общий для всех сессий процесса: изменение группы или прав
+# в сессии администратора сразу видно в открытой сессии этого пользователя.
+# Ключ — (файл базы, user_id); _contexts_generation растет при каждом сбросе,
+# чтобы контекст, прочитанный до изменения, не попал в кеш после него.
+_contexts: Dict[tuple, UserContext] = {}
+_contexts_generation = 0
+_contexts_lock = threading.Lock()
+
+
+class UsersSettings:
+    """
+    Класс для работы с пользователями.
+
+    Контексты пользователей кешируются на уровне процесса и сбрасываются
+    методами, которые меняют группу или права соответствующего пользователя.
+    """
+
+    def get_user_context(self, user_id: int) -> Optional[UserContext]:
+        """Получить пользователя, его группу и права одним запросом (с кешированием)"""
+        key = (db.database, int(user_id))
+        with _contexts_lock:
+            context = _contexts.get(key)
+            generation = _contexts_generation
+        if context is None:
+            context = self._load_user_context(key[1])
+            with _contexts_lock:
+                if context is not None and generation == _contexts_generation:
+                    _contexts[key] = context
+        return context
+
+    def _load_user_context(self, user_id: int) -> Optional[UserContext]:
+        rows = (User
+               .select(User.user_id, User.username, User.role, Group.group_id, Group.group_name,
+                       UserPermission.page_name, UserPermission.can_access)
+               .join(Group, JOIN.LEFT_OUTER, on=(User.group == Group.group_id))
+               .switch(User)
+               .join(UserPermission, JOIN.LEFT_OUTER, on=(UserPermission.user == User.user_id))
+               .where(User.user_id == user_id)
+               .tuples())
+
+        context = None
+        for uid, username, role, group_id, group_name, page_name, can_access in rows:
+            if context is None:
+                context = UserContext(uid, username, role, group_id, group_name)
+            if page_name is not None:
+                context.permissions[page_name] = bool(can_access)
+        return context
+
+    def invalidate_user_context(self, user_id: int = None):
+        """Сбросить кеш контекста пользователя во всех сессиях (None — всех пользователей)"""
+        global _contexts_generation
+        with _contexts_lock:
+            _contexts_generation += 1
+            if user_id is None:
+                _contexts.clear()
+            else:
+                _contexts.pop((db.database, int(user_id)), None)
+
+    def get_user_permissions(self, user_id: int) -> Dict[str, bool]:
+        """Получить права доступа пользователя"""
+        context = self.get_user_context(user_id)
+        return dict(context.permissions) if context else {}
+
+    def set_user_permission(self, user_id: int, page_name: str, can_access: bool):
+        """Установить право доступа"""
+        UserPermission.replace(user=user_id, page_name=page_name, can_access=can_access).execute()
+        self.invalidate_user_context(user_id)
+
+    def set_user_permissions(self, user_id: int, permissions: Dict[str, bool]):
+        """Установить права доступа к нескольким страницам одним запросом"""
+        if permissions:
+            (UserPermission
+             .insert_many([(user_id, page_name, bool(can_access))
+                           for page_name, can_access in permissions.items()],
+                          fields=[UserPermission.user, UserPermission.page_name, UserPermission.can_access])
+             .on_conflict_replace()
+             .execute())
+        self.invalidate_user_context(user_id)
+
+    def get_all_users(self):
+        """Получить всех пользователей"""
+        users = User.select(User, Group).join(Group, JOIN.LEFT_OUTER)
+        return [{
+            'user_id': u.user_id,
+            'username': u.username,
+            'role': u.role,
+            'group_id': u.group.group_id if u.group else None,
+            'group_name': u.group.group_name if u.group else None
+        } for u in users]
+
+    def set_user_group(self, user_id: int, group_id: int = None):
+        """Установить группу для пользователя"""
+        User.update(group=group_id).where(User.user_id == user_id).execute()
+        self.invalidate_user_context(user_id)
+
+    def get_user_group(self, user_id: int) -> Optional[dict]:
+        """Получить группу пользователя"""
+        context = self.get_user_context(user_id)
+        return context.group if context else None
+
+    def delete_user(self, user_id: int):
+        """Удалить пользователя (права доступа удаляются каскадно)"""
+        User.delete().where(User.user_id == user_id).execute()
+        self.invalidate_user_context(user_id)
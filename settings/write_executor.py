@@ -0,0 +1,114 @@
+"""
+Последовательное выполнение записей в базу данных с повтором при блокировках
+"""
+import random
+import threading
+import time
+from functools import wraps
+from peewee import OperationalError
+from settings.config import DB_WRITE_RETRIES, DB_WRITE_RETRY_DELAY, DB_WRITE_RETRY_MAX_DELAY
+
+# Сообщения SQLite о временной блокировке (SQLITE_BUSY / SQLITE_LOCKED)
+BUSY_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_busy_error(ex: Exception) -> bool:
+    """Временная ли это блокировка базы, после которой запись можно повторить"""
+    return isinstance(ex, OperationalError) and any(message in str(ex) for message in BUSY_MESSAGES)
+
+
+class WriteExecutor:
+    """
+    Очередь записи: все изменения базы в процессе выполняются по одному.
+
+    Потоки встают в очередь по порядку обращения, поэтому сессии не мешают
+    друг другу брать блокировку записи SQLite, а чтение в режиме WAL идет
+    параллельно и очереди не ждет. Если базу держит другой процесс,
+    запись повторяется с экспоненциальной паузой со случайным разбросом.
+    Вложенные вызовы (и вызовы внутри открытой транзакции) выполняются
+    сразу и не повторяются — повторяет внешний вызов.
+    """
+
+    def __init__(self, database, retries: int = DB_WRITE_RETRIES, delay: float = DB_WRITE_RETRY_DELAY,
+                 max_delay: float = DB_WRITE_RETRY_MAX_DELAY):
+        self.database = database
+        self.retries = retries
+        self.delay = delay
+        self.max_delay = max_delay
+        self._turn = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def run(self, func, *args, **kwargs):
+        """Выполнить функцию записи в своей очереди и вернуть ее результат"""
+        waited = self._acquire()
+        outer = self._local.depth == 1
+        can_retry = outer and not self.database.in_transaction()
+        retries = 0
+        backoff = 0.0
+        try:
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as ex:
+                    if not can_retry or retries >= self.retries or not is_busy_error(ex):
+                        if outer:
+                            self._count(failures=1)
+                        raise
+                    retries += 1
+                    pause = min(self.max_delay, self.delay * 2 ** (retries - 1)) * random.uniform(0.5, 1.0)
+                    backoff += pause
+                    time.sleep(pause)
+        finally:
+            self._release()
+            if outer:
+                self._count(writes=1, retries=retries, queue_wait=waited, retry_wait=backoff,
+                            max_queue_wait=waited)
+
+    def __call__(self, func):
+        """Декоратор: метод выполняется через очередь записи"""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(func, *args, **kwargs)
+        return wrapper
+
+    def stats(self) -> dict:
+        """Счетчики: записи, повторы, ошибки и время ожидания (секунды)"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {'writes': 0, 'retries': 0, 'failures': 0,
+                           'queue_wait': 0.0, 'max_queue_wait': 0.0, 'retry_wait': 0.0}
+
+    def _count(self, max_queue_wait: float = 0.0, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+            self._stats['max_queue_wait'] = max(self._stats['max_queue_wait'], max_queue_wait)
+
+    def _acquire(self) -> float:
+        """Дождаться своей очереди, вернуть время ожидания"""
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            self._local.depth = depth + 1
+            return 0.0
+        started = time.perf_counter()
+        with self._turn:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._turn.wait()
+        self._local.depth = 1
+        return time.perf_counter() - started
+
+    def _release(self):
+        self._local.depth -= 1
+        if not self._local.depth:
+            with self._turn:
+                self._serving += 1
+                self._turn.notify_all()
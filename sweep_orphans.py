@@ -0,0 +1,41 @@
+"""
+Поиск и очистка строк, ссылающихся на удаленные записи
+
+По умолчанию только выводит отчет: сколько строк в каждой таблице
+ссылается на несуществующего ребенка, группу, родителя и т.д.
+С --apply такие ссылки обнуляются (SET NULL) или строки удаляются
+(CASCADE) — так же, как это сделали бы внешние ключи при удалении.
+
+Пример:
+    python sweep_orphans.py --apply
+"""
+import argparse
+
+from database import KindergartenDB, write_executor
+from settings.config import DATABASE_NAME
+from settings.integrity import sweep_orphans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск и очистка строк без родительской записи")
+    parser.add_argument('--db', default=DATABASE_NAME, help="файл базы данных")
+    parser.add_argument('--apply', action='store_true', help="исправить найденные строки")
+    args = parser.parse_args()
+
+    kdb = KindergartenDB(args.db)
+    kdb.connect()
+    report = write_executor.run(sweep_orphans, dry_run=not args.apply)
+    kdb.close()
+
+    if not report:
+        print("Строк без родительской записи нет")
+        return
+    for column, count in report.items():
+        print(f"{column}: {count}")
+    print(f"{'Исправлено' if args.apply else 'Найдено'} строк: {sum(report.values())}")
+    if not args.apply:
+        print("Для очистки запустите с --apply")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Проверка кеша контекстов пользователей между сессиями
+
+Две сессии (два KindergartenDB) работают с копией базы: первая загружает
+контекст пользователя, вторая — как администратор — меняет его группу и
+права. Первая сессия должна сразу увидеть изменения, не выходя из системы.
+
+Пример:
+    python user_context_check.py
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from database import KindergartenDB, Group, User
+from settings.config import DATABASE_NAME
+from settings.credentials import password_hasher
+
+
+def run_check(db_path: str) -> list:
+    """
+    Returns:
+        список описаний несовпадений (пустой — проверка пройдена)
+    """
+    user_session = KindergartenDB(db_path)
+    admin_session = KindergartenDB(db_path)
+    user_session.connect()
+    user_session.create_tables()
+
+    group_ids = [group.group_id for group in Group.select(Group.group_id).limit(2)]
+    user = User.create(username='context_check', password=password_hasher.hash('context_check'),
+                       role='teacher', group=group_ids[0] if group_ids else None)
+    problems = []
+    try:
+        before = user_session.get_user_context(user.user_id)
+
+        new_group = group_ids[1] if len(group_ids) > 1 else None
+        admin_session.set_user_group(user.user_id, new_group)
+        after = user_session.get_user_context(user.user_id)
+        if after.group_id != new_group:
+            problems.append(f"группа: ожидалась {new_group}, в сессии {after.group_id} (было {before.group_id})")
+
+        admin_session.set_user_permission(user.user_id, 'children', False)
+        if user_session.get_user_context(user.user_id).can_access('children'):
+            problems.append("set_user_permission: доступ к children не снят")
+
+        admin_session.set_user_permissions(user.user_id, {'children': True, 'groups': False})
+        context = user_session.get_user_context(user.user_id)
+        if not context.can_access('children') or context.can_access('groups'):
+            problems.append(f"set_user_permissions: права в сессии {context.permissions}")
+    finally:
+        admin_session.delete_user(user.user_id)
+        if user_session.get_user_context(user.user_id) is not None:
+            problems.append("delete_user: контекст удаленного пользователя остался в кеше")
+        user_session.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка кеша контекстов пользователей между сессиями")
+    parser.add_argument('--db', default=None, help="файл базы (по умолчанию — копия рабочей базы)")
+    args = parser.parse_args()
+
+    db_path = args.db
+    if db_path is None:
+        # Проверка создает и удаляет пользователя, поэтому работаем с копией
+        db_path = os.path.join(tempfile.mkdtemp(), 'kindergarten_context.db')
+        shutil.copy(DATABASE_NAME, db_path)
+
+    problems = run_check(db_path)
+    if problems:
+        print("ОШИБКА: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK: изменения группы и прав видны в другой сессии сразу")
+
+
+if __name__ == "__main__":
+    main()
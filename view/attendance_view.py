@@ -5,6 +5,10 @@ import flet as ft
 from datetime import datetime, date
 from typing import Callable
 from settings.config import PRIMARY_COLOR
+from settings.async_db import LatestCall
+from components import LoadingBar
+from dialogs import open_dialog
+from page_updates import request_update
 
 
 class AttendanceView(ft.Container):
@@ -17,6 +21,8 @@ class AttendanceView(ft.Container):
         self.page = page
         self.selected_date = date.today().strftime("%Y-%m-%d")
         self.selected_group_id = None
+        self.attendance_request = LatestCall()  # Новый запрос журнала отменяет устаревший
+        self.loading_bar = LoadingBar()
         
         # Выбор группы
         groups = self.db.get_all_groups()
@@ -63,22 +69,20 @@ class AttendanceView(ft.Container):
                 self.group_dropdown,
                 self.date_button
             ], spacing=20),
+            self.loading_bar,
             self.attendance_container
         ], spacing=20, expand=True)
-        
-        self.page.overlay.append(self.date_picker)
     
-    def on_group_change(self, e):
+    async def on_group_change(self, e):
         """Обработчик изменения группы"""
         self.selected_group_id = int(e.control.value) if e.control.value else None
-        self.load_attendance()
+        await self.load_attendance()
     
     def open_date_picker(self, e):
         """Открыть выбор даты"""
-        self.date_picker.open = True
-        self.page.update()
+        open_dialog(self.page, self.date_picker)
     
-    def on_date_change(self, e):
+    async def on_date_change(self, e):
         """Обработчик изменения даты"""
         if e.control.value:
             # Сохраняем в формате YYYY-MM-DD для базы данных
@@ -87,17 +91,19 @@ class AttendanceView(ft.Container):
             display_date = e.control.value.strftime("%d-%m-%Y")
             self.date_button.text = f"Дата: {display_date}"
             self.date_button.update()
-            self.load_attendance()
+            await self.load_attendance()
     
-    def load_attendance(self):
-        """Загрузка данных посещаемости"""
+    async def load_attendance(self):
+        """Загрузка данных посещаемости (устаревший запрос отменяется новым)"""
         if not self.selected_group_id:
             return
         
-        children_data = self.db.get_attendance_by_group_and_date(
-            self.selected_group_id, 
-            self.selected_date
-        )
+        with self.loading_bar:
+            children_data = await self.attendance_request(
+                self.db.get_attendance_by_group_and_date,
+                self.selected_group_id, 
+                self.selected_date
+            )
         
         if not children_data:
             self.attendance_container.content = ft.Text(
@@ -105,7 +111,7 @@ class AttendanceView(ft.Container):
                 size=16
             )
             if self.page:
-                self.page.update()
+                request_update(self.page)
             return
         
         # Создаем таблицу с редактируемыми ячейками
@@ -119,7 +125,8 @@ class AttendanceView(ft.Container):
                     ft.DropdownOption("Отсутствует", "Отсутствует"),
                     ft.DropdownOption("Болеет", "Болеет")
                 ],
-                on_change=lambda e, child_id=child['child_id']: self.update_status(child_id, e.control.value, '')
+                data=child['child_id'],
+                on_change=self.on_status_change
             )
             
             rows.append(
@@ -150,12 +157,16 @@ class AttendanceView(ft.Container):
         ], scroll=ft.ScrollMode.AUTO)
         
         if self.page:
-            self.page.update()
+            request_update(self.page)
+    
+    async def on_status_change(self, e):
+        """Обработчик изменения статуса в таблице"""
+        await self.update_status(e.control.data, e.control.value, '')
     
-    def update_status(self, child_id: int, status: str, notes: str = ''):
+    async def update_status(self, child_id: int, status: str, notes: str = ''):
         """Обновление статуса посещаемости в реальном времени"""
         try:
-            self.db.update_attendance_record(child_id, self.selected_date, status, notes)
+            await self.db.aio.update_attendance_record(child_id, self.selected_date, status, notes)
         except Exception as ex:
             self.show_error(f"Ошибка при обновлении статуса: {str(ex)}")
     
@@ -169,4 +180,4 @@ class AttendanceView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
\ No newline at end of file
+            request_update(self.page)
\ No newline at end of file
@@ -2,7 +2,9 @@
 Детальное представление информации о ребенке с вкладками
 """
 import flet as ft
-from datetime import datetime, date
+from settings.models import calculate_age, format_date, validate_date
+from dialogs import show_dialog, close_dialog
+from page_updates import request_update
 
 
 class ChildDetailView(ft.Container):
@@ -16,10 +18,15 @@ class ChildDetailView(ft.Container):
         self.page = page
         self.on_refresh = on_refresh
         
-        # Получаем данные ребенка
-        self.child = self.db.get_child_by_id(child_id)
-        if not self.child:
+        # Получаем все данные карточки одним пакетом
+        bundle = self.db.get_child_bundle(child_id)
+        if not bundle:
+            self.child = None
             return
+        self.child = bundle['child']
+        self.parents = bundle['parents']
+        self.medical_record = bundle['medical_record']
+        self.attendance = bundle['attendance']
         
         child_name = f"{self.child['last_name']} {self.child['first_name']} {self.child.get('middle_name', '')}"
         
@@ -50,16 +57,8 @@ class ChildDetailView(ft.Container):
     def _create_info_tab(self):
         """Создать вкладку с общей информацией"""
         # Вычисляем возраст
-        try:
-            birth_date_str = self.child['birth_date']
-            if '-' in birth_date_str and len(birth_date_str.split('-')[0]) == 4:
-                birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-            else:
-                birth_date_obj = datetime.strptime(birth_date_str, "%d-%m-%Y").date()
-            
-            today = date.today()
-            age = today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
-        except:
+        age = calculate_age(self.child['birth_date'])
+        if age is None:
             age = "Неизвестно"
         
         from settings.config import GENDERS
@@ -68,15 +67,23 @@ class ChildDetailView(ft.Container):
         return ft.Container(
             content=ft.Column([
                 self._info_row("ФИО", f"{self.child['last_name']} {self.child['first_name']} {self.child.get('middle_name', '')}"),
-                self._info_row("Дата рождения", self.child['birth_date']),
+                self._info_row("Дата рождения", format_date(self.child['birth_date'])),
                 self._info_row("Возраст", f"{age} лет"),
                 self._info_row("Пол", gender_text),
                 self._info_row("Группа", self.child.get('group_name', 'Без группы')),
-                self._info_row("Дата зачисления", self.child['enrollment_date'])
+                self._info_row("Дата зачисления", format_date(self.child['enrollment_date'])),
+                self._info_row(f"Посещаемость ({self.attendance['days']} дн.)", self._attendance_summary())
             ], spacing=15, scroll=ft.ScrollMode.AUTO),
             padding=20
         )
     
+    def _attendance_summary(self):
+        """Сводка посещаемости за последние дни"""
+        counts = self.attendance['counts']
+        if not self.attendance['total']:
+            return "Нет отметок"
+        return ", ".join(f"{status}: {count}" for status, count in counts.items())
+    
     def _create_medical_tab(self):
         """Создать вкладку с медицинской картой"""
         from view.medical_card_view import MedicalCardView
@@ -87,7 +94,8 @@ class ChildDetailView(ft.Container):
             child_name=f"{self.child['last_name']} {self.child['first_name']}",
             on_close=lambda: None,
             page=self.page,
-            embedded=True
+            embedded=True,
+            record=self.medical_record
         )
     
     def _create_parents_tab(self):
@@ -108,9 +116,11 @@ class ChildDetailView(ft.Container):
             padding=20
         )
     
-    def _load_parents(self):
+    def _load_parents(self, reload: bool = False):
         """Загрузить список родителей"""
-        parents = self.db.get_parents_by_child(self.child_id)
+        if reload:
+            self.parents = self.db.get_parents_by_child(self.child_id)
+        parents = self.parents
         
         if not parents:
             self.parents_column.controls = [
@@ -144,65 +154,35 @@ class ChildDetailView(ft.Container):
     
     def manage_parents(self, e):
         """Управление родителями ребенка"""
-        all_parents = self.db.get_all_parents()
-        current_parents = self.db.get_parents_by_child(self.child_id)
-        current_parent_ids = [p['parent_id'] for p in current_parents]
+        from components import SearchPicker
         
-        parent_checkboxes = []
-        relationship_fields = {}
-        parent_rows = []
-        
-        for parent in all_parents:
-            is_selected = parent['parent_id'] in current_parent_ids
-            current_relationship = next((p['relationship'] for p in current_parents if p['parent_id'] == parent['parent_id']), "")
-            
-            checkbox = ft.Checkbox(
-                label=f"{parent.get('last_name', '')} {parent.get('first_name', '')}",
-                value=is_selected,
-                data=parent['parent_id']
-            )
-            
-            relationship_field = ft.TextField(
-                label="Степень родства",
-                value=current_relationship,
-                width=150,
-                hint_text="Мама, Папа..."
-            )
-            
-            parent_checkboxes.append(checkbox)
-            relationship_fields[parent['parent_id']] = relationship_field
-            parent_rows.append(ft.Row([checkbox, relationship_field], spacing=10))
+        picker = SearchPicker(
+            fetch_page=lambda term, offset, limit: self.db.search_parents(term, limit=limit, offset=offset),
+            id_key='parent_id',
+            label=lambda parent: f"{parent['last_name']} {parent['first_name']}",
+            selected={p['parent_id'] for p in self.parents},
+            detail_label="Степень родства",
+            detail_hint="Мама, Папа...",
+            details={p['parent_id']: p['relationship'] for p in self.parents}
+        )
         
         def save_relations(e):
-            for parent_id in current_parent_ids:
-                self.db.remove_parent_child_relation(parent_id, self.child_id)
-            
-            for checkbox in parent_checkboxes:
-                if checkbox.value:
-                    relationship = relationship_fields[checkbox.data].value or "Родитель"
-                    self.db.add_parent_child_relation(checkbox.data, self.child_id, relationship)
+            self.db.set_child_parents(self.child_id, picker.get_selected_details(default="Родитель"))
             
-            self._load_parents()
-            self.page.update()
-            self.page.close(dialog)
+            self._load_parents(reload=True)
+            request_update(self.page)
+            close_dialog(self.page, dialog)
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "child_detail.manage_parents",
             modal=True,
             title=ft.Text(f"Родители: {self.child['last_name']} {self.child['first_name']}"),
-            content=ft.Container(
-                content=ft.Column(parent_rows, scroll=ft.ScrollMode.AUTO),
-                width=400,
-                height=300
-            ),
+            content=picker,
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_relations),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
-        
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
     
     def edit_child(self, e):
         """Редактировать ребенка"""
@@ -213,7 +193,7 @@ class ChildDetailView(ft.Container):
         last_name_field = ft.TextField(label="Фамилия", value=self.child['last_name'], width=300)
         first_name_field = ft.TextField(label="Имя", value=self.child['first_name'], width=300)
         middle_name_field = ft.TextField(label="Отчество", value=self.child.get('middle_name', ''), width=300)
-        birth_date_field = ft.TextField(label="Дата рождения", value=self.child['birth_date'], width=300, hint_text="дд-мм-гггг")
+        birth_date_field = ft.TextField(label="Дата рождения", value=format_date(self.child['birth_date']), width=300, hint_text="дд-мм-гггг")
         gender_dropdown = ft.Dropdown(
             label="Пол",
             width=300,
@@ -226,12 +206,18 @@ class ChildDetailView(ft.Container):
             value=str(self.child['group_id']) if self.child.get('group_id') else "0",
             options=[ft.dropdown.Option("0", "Без группы")] + [ft.dropdown.Option(str(g['group_id']), g['group_name']) for g in groups]
         )
-        enrollment_date_field = ft.TextField(label="Дата зачисления", value=self.child['enrollment_date'], width=300, hint_text="дд-мм-гггг")
+        enrollment_date_field = ft.TextField(label="Дата зачисления", value=format_date(self.child['enrollment_date']), width=300, hint_text="дд-мм-гггг")
         
         def save_changes(e):
             if not last_name_field.value or not first_name_field.value or not birth_date_field.value or not gender_dropdown.value or not enrollment_date_field.value:
                 return
             
+            for field in (birth_date_field, enrollment_date_field):
+                field.error_text = None if validate_date(field.value) else "Неверная дата"
+            if birth_date_field.error_text or enrollment_date_field.error_text:
+                request_update(self.page)
+                return
+            
             child_data = {
                 'last_name': last_name_field.value,
                 'first_name': first_name_field.value,
@@ -255,10 +241,11 @@ class ChildDetailView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             
-            self.page.update()
-            self.page.close(dialog)
+            request_update(self.page)
+            close_dialog(self.page, dialog)
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "child_detail.edit_child",
             modal=True,
             title=ft.Text("Редактировать ребенка"),
             content=ft.Container(
@@ -276,13 +263,9 @@ class ChildDetailView(ft.Container):
             ),
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_changes),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
-        
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
     
     def _info_row(self, label: str, value: str):
         """Создать строку с информацией"""
@@ -4,13 +4,14 @@
 import flet as ft
 from datetime import datetime
 from typing import Callable
-from settings.models import format_date
-from datetime import date # Import date for age calculation
-from components import ConfirmDialog, SearchBar
-from dialogs import show_confirm_dialog
+from settings.models import format_date, calculate_age
+from components import ConfirmDialog, SearchBar, SearchPicker, LoadingBar, RecycledList
+from dialogs import show_confirm_dialog, show_dialog, close_dialog
 from settings.config import GENDERS
 from pages_styles.styles import AppStyles
 from settings.logger import app_logger
+from settings.async_db import LatestCall
+from page_updates import request_update
 
 
 class ChildrenView(ft.Container):
@@ -25,6 +26,8 @@ class ChildrenView(ft.Container):
         self.page = page
         self.current_page = 0
         self.items_per_page = 8
+        self.total_items = 0
+        self.children_request = LatestCall()  # Новый запрос списка отменяет устаревший
         self.user_group_id = user_group_id  # Группа пользователя для фильтрации
         
         # Поля формы
@@ -93,7 +96,14 @@ class ChildrenView(ft.Container):
         self.search_bar = SearchBar(on_search=self.on_search)
         
         # Список детей
-        self.children_list = ft.ListView(expand=True, spacing=10, padding=20)
+        self.children_list = RecycledList(
+            describe=self._describe_child,
+            on_open=lambda child: self.show_child_detail(child['child_id']),
+            on_delete=lambda child: self.delete_child(str(child['child_id'])),
+            title_weight=ft.FontWeight.BOLD,
+            expand=True, spacing=10, padding=20
+        )
+        self.loading_bar = LoadingBar()
         
         # Пагинация
         self.pagination_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD)
@@ -107,84 +117,73 @@ class ChildrenView(ft.Container):
         # Кнопка добавления
         add_button = AppStyles.primary_button("Добавить ребенка", icon=ft.Icons.ADD, on_click=self.show_add_form)
         
-        # Загружаем данные
-        self.load_children()
-        
+        # Данные загружаются асинхронно при переходе на страницу (load_children)
         self.content = AppStyles.form_column([
             AppStyles.page_header("Дети", "Добавить ребенка", self.show_add_form),
             self.form_container,
             self.search_bar,
+            self.loading_bar,
             ft.Container(content=self.children_list, expand=True),
             self.pagination_row
         ], spacing=20)
         self.expand = True
     
-    def load_children(self, search_query: str = ""):
-        """Загрузка списка детей"""
-        children = self.db.search_children(search_query) if search_query else self.db.get_all_children()
-        # Фильтруем по группе пользователя
-        if self.user_group_id:
-            children = [c for c in children if c.get('group_id') == self.user_group_id]
-        self.all_children = children
-        self.update_pagination()
-    
-    def update_pagination(self):
-        """Обновить пагинацию"""
-        total_items = len(self.all_children)
-        total_pages = max(1, (total_items + self.items_per_page - 1) // self.items_per_page)
-        
-        if self.current_page >= total_pages:
-            self.current_page = max(0, total_pages - 1)
-        
-        start_idx = self.current_page * self.items_per_page
-        end_idx = min(start_idx + self.items_per_page, total_items)
+    async def load_children(self, search_query: str = None):
+        """
+        Загрузка текущей страницы списка детей
+        
+        Запрос выполняется в пуле потоков базы; если до его завершения
+        пришел новый (например, при вводе в поиске), старый отменяется.
+        """
+        if search_query is not None:
+            self.search_query = search_query
+        with self.loading_bar:
+            children, self.total_items = await self.children_request(
+                self.db.get_children_page, self.search_query, group_id=self.user_group_id,
+                limit=self.items_per_page, offset=self.current_page * self.items_per_page)
+        
+        # Страница могла исчезнуть после удаления — показываем последнюю
+        if self.current_page >= self.total_pages() and self.current_page > 0:
+            self.current_page = self.total_pages() - 1
+            await self.load_children()
+            return
         
-        current_items = self.all_children[start_idx:end_idx]
-        self.children_list.controls = [self._create_child_item(child) for child in current_items]
+        self.update_pagination(children)
+        if self.page:
+            request_update(self.page)
+    
+    def total_pages(self) -> int:
+        return max(1, (self.total_items + self.items_per_page - 1) // self.items_per_page)
+    
+    def update_pagination(self, children):
+        """Показать страницу детей и обновить пагинацию"""
+        total_pages = self.total_pages()
+        self.children_list.show(children)
         
-        self.pagination_text.value = f"{self.current_page + 1}/{total_pages}" if total_items > 0 else "0/0"
+        self.pagination_text.value = f"{self.current_page + 1}/{total_pages}" if self.total_items > 0 else "0/0"
         self.prev_button.disabled = self.current_page == 0
         self.next_button.disabled = self.current_page >= total_pages - 1
     
-    def prev_page(self, e):
+    async def prev_page(self, e):
         """Предыдущая страница"""
         if self.current_page > 0:
             self.current_page -= 1
-            self.update_pagination()
-            self.update()
+            await self.load_children()
     
-    def next_page(self, e):
+    async def next_page(self, e):
         """Следующая страница"""
-        total_pages = max(1, (len(self.all_children) + self.items_per_page - 1) // self.items_per_page)
-        if self.current_page < total_pages - 1:
+        if self.current_page < self.total_pages() - 1:
             self.current_page += 1
-            self.update_pagination()
-            self.update()
+            await self.load_children()
     
-    def _create_child_item(self, child):
-        """Создать элемент списка для ребенка"""
-        birth_date_str = child['birth_date']
-        try:
-            if '-' in birth_date_str and len(birth_date_str.split('-')[0]) == 4:
-                birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-            else:
-                birth_date_obj = datetime.strptime(birth_date_str, "%d-%m-%Y").date()
-        except ValueError:
-            birth_date_obj = date.today()
-        
-        today = date.today()
-        age = today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
-        
-        return ft.ListTile(
-            title=ft.Text(f"{child['last_name']} {child['first_name']} {child['middle_name'] or ''}", weight=ft.FontWeight.BOLD),
-            subtitle=ft.Text(f"ДР: {format_date(child['birth_date'])} | {age} лет | {GENDERS.get(child['gender'], child['gender'])} | {child.get('group_name') if child.get('group_id') else 'Без группы'}"),
-            on_click=lambda _, cid=child['child_id']: self.show_child_detail(cid),
-            trailing=ft.IconButton(
-                icon=ft.Icons.DELETE,
-                tooltip="Удалить",
-                on_click=lambda _, cid=child['child_id']: self.delete_child(str(cid))
-            )
-        )
+    def _describe_child(self, child):
+        """Текст строки списка для ребенка"""
+        age = calculate_age(child['birth_date']) or 0
+        
+        return {
+            'title': f"{child['last_name']} {child['first_name']} {child['middle_name'] or ''}",
+            'subtitle': f"ДР: {format_date(child['birth_date'])} | {age} лет | {GENDERS.get(child['gender'], child['gender'])} | {child.get('group_name') if child.get('group_id') else 'Без группы'}"
+        }
     
     def show_add_form(self, e):
         """Показать форму добавления"""
@@ -193,7 +192,7 @@ class ChildrenView(ft.Container):
         self.form_container.content.controls[0].value = "Добавить ребенка"
         self.form_container.visible = True
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def edit_child(self, child_id: str):
         """Редактировать ребенка"""
@@ -203,15 +202,15 @@ class ChildrenView(ft.Container):
             self.last_name_field.value = child['last_name']
             self.first_name_field.value = child['first_name']
             self.middle_name_field.value = child['middle_name'] or ''
-            self.birth_date_field.value = child['birth_date']
+            self.birth_date_field.value = format_date(child['birth_date'])
             self.gender_dropdown.value = child['gender']
             self.group_dropdown.value = str(child['group_id']) if child['group_id'] else "0"
-            self.enrollment_date_field.value = child['enrollment_date']
+            self.enrollment_date_field.value = format_date(child['enrollment_date'])
             
             self.form_container.content.controls[0].value = "Редактировать ребенка"
             self.form_container.visible = True
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def delete_child(self, child_id: str):
         """Удалить ребенка"""
@@ -225,7 +224,7 @@ class ChildrenView(ft.Container):
                 username = self.page.client_storage.get("username") if self.page else None
                 app_logger.log('DELETE', username, 'Child', f"Deleted child: {child_name}")
                 
-                self.load_children(self.search_query)
+                self.page.run_task(self.load_children)
                 if self.on_refresh:
                     self.on_refresh()
             except Exception as ex:
@@ -278,11 +277,11 @@ class ChildrenView(ft.Container):
             is_valid = False
         
         if not is_valid and self.page:
-            self.page.update()
+            request_update(self.page)
         
         return is_valid
     
-    def save_child(self, e):
+    async def save_child(self, e):
         """Сохранить ребенка"""
         # Проверка обязательных полей
         if not self.validate_fields():
@@ -302,19 +301,20 @@ class ChildrenView(ft.Container):
             username = self.page.client_storage.get("username") if self.page else None
             child_name = f"{child_data['last_name']} {child_data['first_name']}"
             
-            if self.selected_child:
-                self.db.update_child(self.selected_child['child_id'], **child_data)
-                app_logger.log('UPDATE', username, 'Child', f"Updated child: {child_name}")
-            else:
-                self.db.add_child(**child_data)
-                app_logger.log('CREATE', username, 'Child', f"Created child: {child_name}")
+            with self.loading_bar:
+                if self.selected_child:
+                    await self.db.aio.update_child(self.selected_child['child_id'], **child_data)
+                    await self.db.aio.run(app_logger.log, 'UPDATE', username, 'Child', f"Updated child: {child_name}")
+                else:
+                    await self.db.aio.add_child(**child_data)
+                    await self.db.aio.run(app_logger.log, 'CREATE', username, 'Child', f"Created child: {child_name}")
             
             self.form_container.visible = False
-            self.load_children(self.search_query)
+            await self.load_children()
             if self.on_refresh:
                 self.on_refresh()
             if self.page:
-                self.page.update()
+                request_update(self.page)
             
         except Exception as ex:
             self.show_error(f"Ошибка при сохранении: {str(ex)}")
@@ -324,7 +324,7 @@ class ChildrenView(ft.Container):
         self.form_container.visible = False
         self.clear_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def clear_form(self):
         """Очистить форму"""
@@ -337,13 +337,10 @@ class ChildrenView(ft.Container):
         self.enrollment_date_field.value = datetime.now().strftime("%d-%m-%Y")
         self.clear_field_errors()
     
-    def on_search(self, query: str):
+    async def on_search(self, query: str):
         """Обработка поиска"""
-        self.search_query = query
         self.current_page = 0
-        self.load_children(query)
-        if self.page:
-            self.page.update()
+        await self.load_children(query)
     
     def manage_parents(self, child_id: str):
         """Управление родителями ребенка"""
@@ -352,69 +349,38 @@ class ChildrenView(ft.Container):
             if not child:
                 return
             
-            all_parents = self.db.get_all_parents()
             current_parents = self.db.get_parents_by_child(int(child_id))
-            current_parent_ids = [p['parent_id'] for p in current_parents]
-            
-            parent_checkboxes = []
-            relationship_fields = {}
-            parent_rows = []
-            
-            for parent in all_parents:
-                is_selected = parent['parent_id'] in current_parent_ids
-                current_relationship = next((p['relationship'] for p in current_parents if p['parent_id'] == parent['parent_id']), "")
-                
-                checkbox = ft.Checkbox(
-                    label=f"{parent.get('last_name', '')} {parent.get('first_name', '')}",
-                    value=is_selected,
-                    data=parent['parent_id']
-                )
-                
-                relationship_field = ft.TextField(
-                    label="Степень родства",
-                    value=current_relationship,
-                    width=150,
-                    hint_text="Мама, Папа..."
-                )
-                
-                parent_checkboxes.append(checkbox)
-                relationship_fields[parent['parent_id']] = relationship_field
-                parent_rows.append(ft.Row([checkbox, relationship_field], spacing=10))
+            picker = SearchPicker(
+                fetch_page=lambda term, offset, limit: self.db.search_parents(term, limit=limit, offset=offset),
+                id_key='parent_id',
+                label=lambda parent: f"{parent['last_name']} {parent['first_name']}",
+                selected={p['parent_id'] for p in current_parents},
+                detail_label="Степень родства",
+                detail_hint="Мама, Папа...",
+                details={p['parent_id']: p['relationship'] for p in current_parents}
+            )
             
             def save_relations(e):
                 try:
-                    for parent_id in current_parent_ids:
-                        self.db.remove_parent_child_relation(parent_id, int(child_id))
-                    
-                    for checkbox in parent_checkboxes:
-                        if checkbox.value:
-                            relationship = relationship_fields[checkbox.data].value or "Родитель"
-                            self.db.add_parent_child_relation(checkbox.data, int(child_id), relationship)
+                    self.db.set_child_parents(int(child_id), picker.get_selected_details(default="Родитель"))
                     
-                    self.page.close(dialog)
+                    close_dialog(self.page, dialog)
                 except Exception as ex:
                     self.show_error(f"Ошибка: {str(ex)}")
             
-            def close_dialog(e):
-                self.page.close(dialog)
+            def cancel_relations(e):
+                close_dialog(self.page, dialog)
             
-            dialog = ft.AlertDialog(
+            dialog = show_dialog(
+                self.page, "children.manage_parents",
                 modal=True,
                 title=ft.Text(f"Родители: {child['last_name']} {child['first_name']}"),
-                content=ft.Container(
-                    content=ft.Column(parent_rows, scroll=ft.ScrollMode.AUTO),
-                    width=400,
-                    height=300
-                ),
+                content=picker,
                 actions=[
                     ft.ElevatedButton("Сохранить", on_click=save_relations),
-                    ft.TextButton("Отмена", on_click=close_dialog)
+                    ft.TextButton("Отмена", on_click=cancel_relations)
                 ]
             )
-            
-            self.page.overlay.append(dialog)
-            dialog.open = True
-            self.page.update()
         except Exception as ex:
             self.show_error(f"Ошибка: {str(ex)}")
     
@@ -429,7 +395,7 @@ class ChildrenView(ft.Container):
         child_name = f"{child['last_name']} {child['first_name']}"
         
         def close_medical_card():
-            self.page.close(dialog)
+            close_dialog(self.page, dialog)
         
         medical_card = MedicalCardView(
             db=self.db,
@@ -439,7 +405,8 @@ class ChildrenView(ft.Container):
             page=self.page
         )
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "children.show_medical_card",
             modal=True,
             title=ft.Text("Медицинская карта"),
             content=ft.Container(
@@ -447,22 +414,18 @@ class ChildrenView(ft.Container):
                 width=800,
                 height=600
             ),
-            actions=[],
-            open=True
+            actions=[]
         )
-        
-        self.page.overlay.append(dialog)
-        self.page.update()
     
     def show_child_detail(self, child_id: int):
         """Показать детальную информацию о ребенке"""
         from view.child_detail_view import ChildDetailView
         
         def close_detail():
-            self.page.close(dialog)
+            close_dialog(self.page, dialog)
         
         def refresh_data():
-            self.load_children(self.search_query)
+            self.page.run_task(self.load_children)
             if self.on_refresh:
                 self.on_refresh()
         
@@ -474,19 +437,16 @@ class ChildrenView(ft.Container):
             on_refresh=refresh_data
         )
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "children.show_child_detail",
             modal=True,
             content=ft.Container(
                 content=detail_view,
                 width=900,
                 height=700
             ),
-            actions=[],
-            open=True
+            actions=[]
         )
-        
-        self.page.overlay.append(dialog)
-        self.page.update()
     
     def show_error(self, message: str):
         """Показать ошибку"""
@@ -496,7 +456,7 @@ class ChildrenView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
 
     def format_date(self, e):
@@ -527,4 +487,4 @@ class ChildrenView(ft.Container):
             ft.DropdownOption(str(g['group_id']), g['group_name']) 
             for g in groups
         ]
-        self.load_children(self.search_query)
+        self.page.run_task(self.load_children)
@@ -5,6 +5,9 @@ import flet as ft
 from datetime import datetime, date, timedelta
 import calendar
 from typing import Callable
+from settings.async_db import LatestCall
+from components import LoadingBar
+from page_updates import request_update
 
 
 class ElectronicJournalView(ft.Container):
@@ -21,6 +24,9 @@ class ElectronicJournalView(ft.Container):
         self.current_year = datetime.now().year
         self.selected_group = None
         self.attendance_cache = {}  # Кэш для данных посещаемости
+        self.children = []
+        self.journal_request = LatestCall()  # Новый запрос месяца отменяет устаревший
+        self.loading_bar = LoadingBar()
         
         # Элементы управления
         self.group_dropdown = ft.Dropdown(
@@ -57,6 +63,7 @@ class ElectronicJournalView(ft.Container):
                 ft.ElevatedButton("Обновить", on_click=self.refresh_journal)
             ], spacing=10),
             ft.Divider(),
+            self.loading_bar,
             self.journal_container
         ], expand=True, scroll=ft.ScrollMode.AUTO)
         
@@ -71,39 +78,67 @@ class ElectronicJournalView(ft.Container):
                 for group in groups
             ]
             if self.page:
-                self.page.update()
+                request_update(self.page)
         except Exception as ex:
             print(f"Ошибка загрузки групп: {ex}")
     
-    def on_group_change(self, e):
+    async def on_group_change(self, e):
         """Обработчик изменения группы"""
         self.selected_group = int(e.control.value) if e.control.value else None
-        self.build_journal()
+        await self.build_journal()
     
-    def on_month_change(self, e):
+    async def on_month_change(self, e):
         """Обработчик изменения месяца"""
         self.current_month = int(e.control.value)
-        self.build_journal()
+        await self.build_journal()
     
-    def on_year_change(self, e):
+    async def on_year_change(self, e):
         """Обработчик изменения года"""
         self.current_year = int(e.control.value)
-        self.build_journal()
+        await self.build_journal()
     
-    def refresh_journal(self, e):
+    async def refresh_journal(self, e):
         """Обновление журнала"""
-        self.build_journal()
+        await self.build_journal()
     
     def get_days_in_month(self):
         """Получить количество дней в месяце"""
         return calendar.monthrange(self.current_year, self.current_month)[1]
     
-    def build_journal(self):
-        """Построение журнала посещаемости"""
+    def load_month(self, group_id: int, year: int, month: int):
+        """Дети группы и отмеченные статусы за месяц (выполняется в пуле потоков базы)"""
+        days_in_month = calendar.monthrange(year, month)[1]
+        children = self.db.get_children_by_group(group_id)
+        statuses = self.db.get_group_attendance_statuses(
+            group_id, f"{year}-{month:02d}-01", f"{year}-{month:02d}-{days_in_month:02d}")
+        return children, {f"{child_id}_{day}": status for (child_id, day), status in statuses.items()}
+    
+    async def build_journal(self):
+        """Загрузка месяца (устаревший запрос отменяется новым) и построение журнала"""
+        if not self.selected_group:
+            self.journal_container.content = ft.Text("Выберите группу для отображения журнала")
+            if self.page:
+                request_update(self.page)
+            return
+        
+        try:
+            with self.loading_bar:
+                self.children, self.attendance_cache = await self.journal_request(
+                    self.load_month, self.selected_group, self.current_year, self.current_month)
+        except Exception as ex:
+            print(f"Ошибка загрузки журнала: {ex}")
+            self.journal_container.content = ft.Text(f"Ошибка: {ex}")
+            if self.page:
+                request_update(self.page)
+            return
+        self.render_journal()
+    
+    def render_journal(self):
+        """Построение журнала посещаемости по загруженным данным"""
         if not self.selected_group:
             self.journal_container.content = ft.Text("Выберите группу для отображения журнала")
             if self.page:
-                self.page.update()
+                request_update(self.page)
             return
         
         # Адаптивные цвета для темы
@@ -121,25 +156,16 @@ class ElectronicJournalView(ft.Container):
         sick_color = ft.Colors.ORANGE_800 if not is_dark else ft.Colors.ORANGE_200
         
         try:
-            # Получаем детей группы
-            children = self.db.get_children_by_group(self.selected_group)
+            children = self.children
             if not children:
                 self.journal_container.content = ft.Text("В группе нет детей")
                 if self.page:
-                    self.page.update()
+                    request_update(self.page)
                 return
             
             # Получаем количество дней в месяце
             days_in_month = self.get_days_in_month()
             
-            # Предзагружаем все данные посещаемости за месяц
-            self.attendance_cache = {}
-            for day in range(1, days_in_month + 1):
-                date_str = f"{self.current_year}-{self.current_month:02d}-{day:02d}"
-                attendance_data = self.db.get_attendance_by_group_and_date(self.selected_group, date_str)
-                for item in attendance_data:
-                    self.attendance_cache[f"{item['child_id']}_{date_str}"] = item['status']
-            
             # Создаем заголовок с днями
             header_row = [ft.Container(
                 content=ft.Text("№", weight=ft.FontWeight.BOLD, size=12),
@@ -224,7 +250,8 @@ class ElectronicJournalView(ft.Container):
                         padding=2,
                         border=ft.border.all(1, border_color),
                         bgcolor=bgcolor,
-                        on_click=lambda e, c_id=child['child_id'], d=date_str: self.toggle_attendance(c_id, d)
+                        data=(child['child_id'], date_str),
+                        on_click=self.on_cell_click
                     )
                     child_row.append(cell)
                 
@@ -268,15 +295,19 @@ class ElectronicJournalView(ft.Container):
             ])
             
             if self.page:
-                self.page.update()
+                request_update(self.page)
                 
         except Exception as ex:
             print(f"Ошибка построения журнала: {ex}")
             self.journal_container.content = ft.Text(f"Ошибка: {ex}")
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
-    def toggle_attendance(self, child_id: int, date_str: str):
+    async def on_cell_click(self, e):
+        """Обработчик нажатия на ячейку журнала"""
+        await self.toggle_attendance(*e.control.data)
+    
+    async def toggle_attendance(self, child_id: int, date_str: str):
         """Переключение статуса посещаемости"""
         try:
             # Получаем текущий статус из кэша
@@ -291,13 +322,11 @@ class ElectronicJournalView(ft.Container):
                 new_status = 'Присутствует'
             
             # Обновляем в базе данных
-            self.db.update_attendance_record(child_id, date_str, new_status)
+            await self.db.aio.update_attendance_record(child_id, date_str, new_status)
             
-            # Обновляем кэш
+            # Обновляем кэш и перестраиваем журнал без повторной загрузки месяца
             self.attendance_cache[f"{child_id}_{date_str}"] = new_status
-            
-            # Перестраиваем журнал
-            self.build_journal()
+            self.render_journal()
             
         except Exception as ex:
             print(f"Ошибка переключения посещаемости: {ex}")
\ No newline at end of file
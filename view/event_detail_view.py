@@ -2,7 +2,9 @@
 Детальное представление информации о мероприятии с вкладками
 """
 import flet as ft
-from datetime import datetime, date
+from settings.models import calculate_age, format_date, to_iso_date, validate_date
+from dialogs import show_dialog, close_dialog
+from page_updates import request_update
 
 
 class EventDetailView(ft.Container):
@@ -54,7 +56,7 @@ class EventDetailView(ft.Container):
         return ft.Container(
             content=ft.Column([
                 self._info_row("Название", self.event.get('name', '')),
-                self._info_row("Дата проведения", self.event.get('date', '')),
+                self._info_row("Дата проведения", format_date(self.event.get('date'))),
                 self._info_row("Ответственный", self.event.get('teacher_name', 'Не назначен')),
                 self._info_row("Описание", self.event.get('description', 'Нет описания')),
                 self._info_row("Количество групп", str(len(self.event.get('groups', []))))
@@ -129,21 +131,12 @@ class EventDetailView(ft.Container):
     
     def _calculate_age(self, birth_date_str):
         """Вычисление возраста"""
-        try:
-            if '-' in birth_date_str and len(birth_date_str.split('-')[0]) == 4:
-                birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-            else:
-                birth_date_obj = datetime.strptime(birth_date_str, "%d-%m-%Y").date()
-            
-            today = date.today()
-            return today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
-        except:
-            return 0
+        return calculate_age(birth_date_str) or 0
     
     def edit_event(self, e):
         """Редактировать мероприятие"""
         event_name_field = ft.TextField(label="Название мероприятия", value=self.event.get('name', ''), width=300)
-        event_date_field = ft.TextField(label="Дата проведения", value=self.event.get('date', ''), width=300, hint_text="дд-мм-гггг")
+        event_date_field = ft.TextField(label="Дата проведения", value=format_date(self.event.get('date')), width=300, hint_text="дд-мм-гггг")
         description_field = ft.TextField(label="Описание", value=self.event.get('description', ''), width=300, multiline=True, max_lines=3)
         
         # Воспитатели
@@ -175,6 +168,11 @@ class EventDetailView(ft.Container):
             if not event_name_field.value:
                 return
             
+            event_date_field.error_text = None if validate_date(event_date_field.value) else "Неверная дата"
+            if event_date_field.error_text:
+                request_update(self.page)
+                return
+            
             teacher_id = int(teacher_dropdown.value) if teacher_dropdown.value and teacher_dropdown.value != "0" else None
             teacher_name = "Не назначен"
             if teacher_id:
@@ -185,7 +183,7 @@ class EventDetailView(ft.Container):
             selected_groups = [cb.data for cb in group_checkboxes if cb.value]
             
             self.event['name'] = event_name_field.value
-            self.event['date'] = event_date_field.value
+            self.event['date'] = to_iso_date(event_date_field.value)
             self.event['description'] = description_field.value
             self.event['teacher_id'] = teacher_id
             self.event['teacher_name'] = teacher_name
@@ -211,10 +209,11 @@ class EventDetailView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             
-            self.page.update()
-            self.page.close(dialog)
+            request_update(self.page)
+            close_dialog(self.page, dialog)
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "event_detail.edit_event",
             modal=True,
             title=ft.Text("Редактировать мероприятие"),
             content=ft.Container(
@@ -231,13 +230,9 @@ class EventDetailView(ft.Container):
             ),
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_changes),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
-        
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
     
     def _info_row(self, label: str, value: str):
         """Создать строку с информацией"""
@@ -2,12 +2,25 @@
 Представление для управления мероприятиями
 """
 import flet as ft
-from datetime import datetime, date
 from typing import Callable
+from settings.models import calculate_age, format_date, to_iso_date, validate_date
 
-from dialogs import show_confirm_dialog
+from components import RecycledList
+from dialogs import show_confirm_dialog, show_dialog, close_dialog
 from pages_styles.styles import AppStyles
 from settings.logger import app_logger
+from page_updates import request_update
+
+
+def normalize_event_dates(events: list) -> bool:
+    """Перевести даты мероприятий в ISO (гггг-мм-дд); True, если что-то изменилось"""
+    changed = False
+    for event in events:
+        iso = to_iso_date(event.get('date'))
+        if iso and iso != event.get('date'):
+            event['date'] = iso
+            changed = True
+    return changed
 
 
 class EventsView(ft.Container):
@@ -25,6 +38,9 @@ class EventsView(ft.Container):
         if page and hasattr(page, 'client_storage'):
             stored_events = page.client_storage.get("events_storage")
             self.events_storage = stored_events if stored_events else []
+            # Мероприятия, сохраненные с датой дд-мм-гггг, переводятся в ISO
+            if normalize_event_dates(self.events_storage):
+                page.client_storage.set("events_storage", self.events_storage)
         else:
             self.events_storage = []
         
@@ -84,7 +100,14 @@ class EventsView(ft.Container):
         )
         
         # Список мероприятий
-        self.events_list = ft.ListView(expand=True, spacing=10, padding=20)
+        is_admin = page.client_storage.get("user_role") == "admin" if page else True
+        self.events_list = RecycledList(
+            describe=self._describe_event,
+            on_open=self.show_event_detail,
+            on_delete=(lambda event: self.delete_event(str(event.get('event_id')))) if is_admin else None,
+            leading_icon=ft.Icons.EVENT,
+            expand=True, spacing=10, padding=20
+        )
         
         # Пагинация
         self.pagination_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD)
@@ -128,7 +151,7 @@ class EventsView(ft.Container):
         """Загрузка списка мероприятий"""
         self.update_pagination()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def update_pagination(self):
         """Обновить пагинацию"""
@@ -142,9 +165,7 @@ class EventsView(ft.Container):
         end_idx = min(start_idx + self.items_per_page, total_items)
         
         current_items = self.events_storage[start_idx:end_idx]
-        self.events_list.controls.clear()
-        for event in current_items:
-            self.events_list.controls.append(self._create_event_item(event))
+        self.events_list.show(current_items)
         
         self.pagination_text.value = f"{self.current_page + 1}/{total_pages}" if total_items > 0 else "0/0"
         self.prev_button.disabled = self.current_page == 0
@@ -156,7 +177,7 @@ class EventsView(ft.Container):
             self.current_page -= 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def next_page(self, e):
         """Следующая страница"""
@@ -165,29 +186,14 @@ class EventsView(ft.Container):
             self.current_page += 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
-    def _create_event_item(self, event):
-        """Создать элемент списка для мероприятия"""
-        eid = event.get('event_id')
-        is_admin = self.page.client_storage.get("user_role") == "admin" if self.page else True
-        
-        if is_admin:
-            trailing = ft.IconButton(
-                icon=ft.Icons.DELETE,
-                tooltip="Удалить",
-                on_click=lambda _, e=eid: self.delete_event(str(e))
-            )
-        else:
-            trailing = None
-        
-        return ft.ListTile(
-            leading=ft.Icon(ft.Icons.EVENT),
-            title=ft.Text(event.get('name', '')),
-            subtitle=ft.Text(f"Дата: {event.get('date', '')} | Ответственный: {event.get('teacher_name', 'Не назначен')} | Групп: {len(event.get('groups', []))}"),
-            on_click=lambda _, ev=event: self.show_event_detail(ev),
-            trailing=trailing
-        )
+    def _describe_event(self, event):
+        """Текст строки списка для мероприятия"""
+        return {
+            'title': event.get('name', ''),
+            'subtitle': f"Дата: {format_date(event.get('date'))} | Ответственный: {event.get('teacher_name', 'Не назначен')} | Групп: {len(event.get('groups', []))}"
+        }
     
     def show_add_form(self, e):
         """Показать форму добавления"""
@@ -198,7 +204,7 @@ class EventsView(ft.Container):
         self._load_teachers_for_form()
         self._load_groups_for_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def edit_event(self, event_id: str):
         """Редактировать мероприятие"""
@@ -211,7 +217,7 @@ class EventsView(ft.Container):
         
         # Заполняем поля формы данными мероприятия
         self.event_name_field.value = event.get('name', '')
-        self.event_date_field.value = event.get('date', '')
+        self.event_date_field.value = format_date(event.get('date'))
         self.description_field.value = event.get('description', '')
         
         self.form_container.content.controls[0].value = "Редактировать мероприятие"
@@ -233,7 +239,7 @@ class EventsView(ft.Container):
             checkbox.value = checkbox.data in event_groups
             
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def delete_event(self, event_id: str):
         """Удалить мероприятие"""
@@ -265,7 +271,7 @@ class EventsView(ft.Container):
         from view.event_detail_view import EventDetailView
         
         def close_detail():
-            self.page.close(dialog)
+            close_dialog(self.page, dialog)
         
         def refresh_data():
             self.load_events()
@@ -280,19 +286,16 @@ class EventsView(ft.Container):
             on_refresh=refresh_data
         )
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "events.show_event_detail",
             modal=True,
             content=ft.Container(
                 content=detail_view,
                 width=900,
                 height=700
             ),
-            actions=[],
-            open=True
+            actions=[]
         )
-        
-        self.page.overlay.append(dialog)
-        self.page.update()
     
     def view_participants(self, event_id: str):
         """Просмотр участников мероприятия"""
@@ -303,22 +306,25 @@ class EventsView(ft.Container):
         event_groups = event.get('groups', [])
         participants_content = ft.Column([], spacing=10, scroll=ft.ScrollMode.AUTO)
         
+        groups = {g['group_id']: g for g in self.db.get_all_groups()}
+        # Аллергии всех участников одним запросом по индексу
+        allergies = self.db.get_allergies_by_groups(event_groups) if event_groups else {}
+        
         for group_id in event_groups:
-            group = next((g for g in self.db.get_all_groups() if g['group_id'] == group_id), None)
+            group = groups.get(group_id)
             if not group:
                 continue
                 
             children = self.db.get_children_by_group(group_id)
+            at_risk = sum(1 for child in children if child['child_id'] in allergies)
+            subtitle = f"Детей: {len(children)}"
+            if at_risk:
+                subtitle += f", с аллергиями: {at_risk}"
             
             group_card = ft.ExpansionTile(
                 title=ft.Text(f"Группа: {group['group_name']}", weight=ft.FontWeight.BOLD),
-                subtitle=ft.Text(f"Детей: {len(children)}"),
-                controls=[
-                    ft.ListTile(
-                        title=ft.Text(f"{child['last_name']} {child['first_name']}"),
-                        subtitle=ft.Text(f"Возраст: {self._calculate_age(child['birth_date'])} лет")
-                    ) for child in children
-                ]
+                subtitle=ft.Text(subtitle),
+                controls=[self._create_participant_tile(child, allergies.get(child['child_id'])) for child in children]
             )
             participants_content.controls.append(group_card)
         
@@ -327,7 +333,8 @@ class EventsView(ft.Container):
                 ft.Text("Нет участвующих групп", size=16, color=ft.Colors.GREY)
             )
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "events.view_participants",
             title=ft.Text("Участники мероприятия"),
             content=ft.Container(
                 content=participants_content,
@@ -335,26 +342,28 @@ class EventsView(ft.Container):
                 height=300
             ),
             actions=[
-                ft.TextButton("Закрыть", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Закрыть", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
+    
+    def _create_participant_tile(self, child, allergens=None):
+        """Строка участника; дети с аллергиями отмечаются предупреждением"""
+        subtitle = f"Возраст: {self._calculate_age(child['birth_date'])} лет"
+        if not allergens:
+            return ft.ListTile(
+                title=ft.Text(f"{child['last_name']} {child['first_name']}"),
+                subtitle=ft.Text(subtitle)
+            )
         
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
+        return ft.ListTile(
+            leading=ft.Icon(ft.Icons.WARNING_AMBER, color=ft.Colors.ORANGE),
+            title=ft.Text(f"{child['last_name']} {child['first_name']}"),
+            subtitle=ft.Text(f"{subtitle}\nАллергии: {', '.join(allergens)}", color=ft.Colors.ORANGE_900)
+        )
     
     def _calculate_age(self, birth_date_str):
         """Вычисление возраста"""
-        try:
-            if '-' in birth_date_str and len(birth_date_str.split('-')[0]) == 4:
-                birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-            else:
-                birth_date_obj = datetime.strptime(birth_date_str, "%d-%m-%Y").date()
-            
-            today = date.today()
-            return today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
-        except:
-            return 0
+        return calculate_age(birth_date_str) or 0
     
     def _load_teachers_for_form(self):
         """Загружает список воспитателей в форму"""
@@ -396,9 +405,13 @@ class EventsView(ft.Container):
             self.event_date_error.value = "Заполните поле"
             self.event_date_error.visible = True
             is_valid = False
+        elif not validate_date(self.event_date_field.value):
+            self.event_date_error.value = "Неверная дата"
+            self.event_date_error.visible = True
+            is_valid = False
         
         if not is_valid and self.page:
-            self.page.update()
+            request_update(self.page)
         
         return is_valid
     
@@ -431,7 +444,7 @@ class EventsView(ft.Container):
                 new_event = {
                     'event_id': self.selected_event['event_id'],
                     'name': self.event_name_field.value,
-                    'date': self.event_date_field.value,
+                    'date': to_iso_date(self.event_date_field.value),
                     'description': self.description_field.value or '',
                     'teacher_id': teacher_id,
                     'teacher_name': teacher_name,
@@ -447,7 +460,7 @@ class EventsView(ft.Container):
                 new_event = {
                     'event_id': len(self.events_storage) + 1,
                     'name': self.event_name_field.value,
-                    'date': self.event_date_field.value,
+                    'date': to_iso_date(self.event_date_field.value),
                     'description': self.description_field.value or '',
                     'teacher_id': teacher_id,
                     'teacher_name': teacher_name,
@@ -465,7 +478,7 @@ class EventsView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             if self.page:
-                self.page.update()
+                request_update(self.page)
             
         except Exception as ex:
             self.show_error(f"Ошибка при сохранении: {str(ex)}")
@@ -475,7 +488,7 @@ class EventsView(ft.Container):
         self.form_container.visible = False
         self.clear_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def clear_form(self):
         """Очистить форму"""
@@ -494,7 +507,7 @@ class EventsView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def refresh(self):
         """Обновить данные"""
@@ -2,8 +2,11 @@
 Детальное представление группы с вкладками
 """
 import flet as ft
-from datetime import datetime, date
-from settings.config import AGE_CATEGORIES
+from datetime import datetime
+from settings.config import AGE_CATEGORIES, AGE_CATEGORY_RANGES
+from settings.models import calculate_age, format_age
+from dialogs import show_dialog, close_dialog
+from page_updates import request_update
 
 
 class GroupDetailView(ft.Container):
@@ -87,151 +90,86 @@ class GroupDetailView(ft.Container):
     
     def manage_children(self, e):
         """Управление детьми группы"""
-        all_children = self.db.get_all_children()
-        current_children = self.db.get_children_by_group(self.group_id)
-        current_child_ids = [c['child_id'] for c in current_children]
+        from components import SearchPicker
         
-        manage_page = [0]
-        items_per_page = 7
-        
-        child_checkboxes = []
-        for child in all_children:
-            # Пропускаем детей, которые уже в других группах
-            child_group_id = child.get('group_id')
-            if child_group_id is not None and child_group_id != self.group_id:
-                continue
-            
-            is_selected = child['child_id'] in current_child_ids
-            age = self._calculate_age(child.get('birth_date'))
-            checkbox = ft.Checkbox(
-                label=f"{child['last_name']} {child['first_name']} {child.get('middle_name', '')} ({age})",
-                value=is_selected,
-                data=child['child_id']
-            )
-            child_checkboxes.append(checkbox)
+        current_child_ids = {c['child_id'] for c in self.db.get_children_by_group(self.group_id)}
         
-        checkboxes_column = ft.Column([], scroll=ft.ScrollMode.AUTO, height=250)
-        pagination_row = ft.Row([], alignment=ft.MainAxisAlignment.CENTER, height=50)
-        
-        def update_manage_list():
-            total_pages = (len(child_checkboxes) + items_per_page - 1) // items_per_page
-            start_idx = manage_page[0] * items_per_page
-            end_idx = min(start_idx + items_per_page, len(child_checkboxes))
-            
-            checkboxes_column.controls = child_checkboxes[start_idx:end_idx]
-            
-            if total_pages > 1:
-                pagination_row.controls = [
-                    ft.IconButton(
-                        icon=ft.Icons.ARROW_BACK,
-                        disabled=manage_page[0] == 0,
-                        on_click=lambda e: prev_manage_page()
-                    ),
-                    ft.Text(f"{manage_page[0] + 1} / {total_pages}", size=14),
-                    ft.IconButton(
-                        icon=ft.Icons.ARROW_FORWARD,
-                        disabled=manage_page[0] >= total_pages - 1,
-                        on_click=lambda e: next_manage_page()
-                    )
-                ]
-            else:
-                pagination_row.controls = []
-        
-        def prev_manage_page():
-            if manage_page[0] > 0:
-                manage_page[0] -= 1
-                update_manage_list()
-                dialog.update()
+        # Подсказка по возрасту: дети, чей возраст подходит категории группы
+        age_range = AGE_CATEGORY_RANGES.get(self.group['age_category'])
+        age_filter = ft.Switch(
+            label="Только подходящий возраст",
+            value=age_range is not None,
+            disabled=age_range is None,
+            on_change=lambda e: picker.reload()
+        )
         
-        def next_manage_page():
-            total_pages = (len(child_checkboxes) + items_per_page - 1) // items_per_page
-            if manage_page[0] < total_pages - 1:
-                manage_page[0] += 1
-                update_manage_list()
-                dialog.update()
+        # Только дети без группы и дети этой группы
+        picker = SearchPicker(
+            fetch_page=lambda term, offset, limit: self.db.get_group_candidates(
+                self.group_id, term, limit=limit, offset=offset,
+                age_range=age_range if age_filter.value else None),
+            id_key='child_id',
+            label=lambda child: f"{child['last_name']} {child['first_name']} {child.get('middle_name', '')} "
+                                f"({self._calculate_age(child.get('birth_date'))})",
+            selected=current_child_ids,
+            page_size=7
+        )
         
         def save_children(e):
-            for checkbox in child_checkboxes:
-                if checkbox.value:
-                    self.db.update_child(checkbox.data, group_id=self.group_id)
-                elif checkbox.data in current_child_ids:
-                    self.db.update_child(checkbox.data, group_id=None)
+            self.db.update_group_membership(
+                self.group_id,
+                added_ids=picker.selected - current_child_ids,
+                removed_ids=current_child_ids - picker.selected
+            )
             
             self._load_children()
             if self.on_refresh:
                 self.on_refresh()
-            self.page.update()
-            self.page.close(dialog)
+            request_update(self.page)
+            close_dialog(self.page, dialog)
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "group_detail.manage_children",
             modal=True,
             title=ft.Text(f"Дети группы: {self.group['group_name']}"),
-            content=ft.Container(
-                content=ft.Column([
-                    ft.Container(content=checkboxes_column, height=250),
-                    ft.Container(content=pagination_row, height=50)
-                ], spacing=10),
-                width=400,
-                height=350
-            ),
+            content=ft.Column([age_filter, picker], spacing=5, tight=True),
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_children),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
-        
-        update_manage_list()
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
     
     def manage_teachers(self, e):
         """Управление воспитателями группы"""
-        all_teachers = self.db.get_all_teachers()
+        from components import SearchPicker
+        
         current_teachers = self.db.get_teachers_by_group(self.group_id)
-        current_teacher_ids = [t['teacher_id'] for t in current_teachers]
-        
-        teacher_checkboxes = []
-        for teacher in all_teachers:
-            is_selected = teacher['teacher_id'] in current_teacher_ids
-            checkbox = ft.Checkbox(
-                label=teacher.get('full_name', ''),
-                value=is_selected,
-                data=teacher['teacher_id']
-            )
-            teacher_checkboxes.append(checkbox)
+        picker = SearchPicker(
+            fetch_page=lambda term, offset, limit: self.db.search_teachers(term, limit=limit, offset=offset),
+            id_key='teacher_id',
+            label=lambda teacher: teacher.get('full_name', ''),
+            selected={t['teacher_id'] for t in current_teachers}
+        )
         
         def save_teachers(e):
-            for teacher_id in current_teacher_ids:
-                self.db.remove_group_teacher_relation(self.group_id, teacher_id)
-            
-            for checkbox in teacher_checkboxes:
-                if checkbox.value:
-                    self.db.add_group_teacher_relation(self.group_id, checkbox.data)
+            self.db.set_group_teachers(self.group_id, list(picker.selected))
             
             self._load_teachers()
             if self.on_refresh:
                 self.on_refresh()
-            self.page.update()
-            self.page.close(dialog)
+            request_update(self.page)
+            close_dialog(self.page, dialog)
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "group_detail.manage_teachers",
             modal=True,
             title=ft.Text(f"Воспитатели группы: {self.group['group_name']}"),
-            content=ft.Container(
-                content=ft.Column(teacher_checkboxes, scroll=ft.ScrollMode.AUTO),
-                width=400,
-                height=300
-            ),
+            content=picker,
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_teachers),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
-        
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
     
     def _load_children(self):
         """Загрузить список детей"""
@@ -295,7 +233,7 @@ class GroupDetailView(ft.Container):
         if self.children_page > 0:
             self.children_page -= 1
             self._load_children()
-            self.page.update()
+            request_update(self.page)
     
     def _next_children_page(self):
         """Следующая страница детей"""
@@ -304,7 +242,7 @@ class GroupDetailView(ft.Container):
         if self.children_page < total_pages - 1:
             self.children_page += 1
             self._load_children()
-            self.page.update()
+            request_update(self.page)
     
     def _load_teachers(self):
         """Загрузить список воспитателей"""
@@ -371,26 +309,8 @@ class GroupDetailView(ft.Container):
     
     def _calculate_age(self, birth_date_str):
         """Вычислить возраст"""
-        if not birth_date_str:
-            return "Не указан"
-        
-        try:
-            if '-' in birth_date_str and len(birth_date_str.split('-')[0]) == 4:
-                birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-            else:
-                birth_date_obj = datetime.strptime(birth_date_str, "%d-%m-%Y").date()
-            
-            today = date.today()
-            age = today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
-            
-            if age % 10 == 1 and age % 100 != 11:
-                return f"{age} год"
-            elif age % 10 in [2, 3, 4] and age % 100 not in [12, 13, 14]:
-                return f"{age} года"
-            else:
-                return f"{age} лет"
-        except:
-            return "Не указан"
+        age = calculate_age(birth_date_str)
+        return format_age(age) if age is not None else "Не указан"
 
     def show_edit_menu(self, e):
         """Показать меню редактирования"""
@@ -398,26 +318,27 @@ class GroupDetailView(ft.Container):
             ft.ListTile(
                 leading=ft.Icon(ft.Icons.INFO),
                 title=ft.Text("Редактировать информацию"),
-                on_click=lambda e: [self.page.close(menu_dialog), self.edit_group_info()]
+                on_click=lambda e: [close_dialog(self.page, menu_dialog), self.edit_group_info()]
             ),
             ft.ListTile(
                 leading=ft.Icon(ft.Icons.CHILD_CARE),
                 title=ft.Text("Управление детьми"),
-                on_click=lambda e: [self.page.close(menu_dialog), self.manage_children(e)]
+                on_click=lambda e: [close_dialog(self.page, menu_dialog), self.manage_children(e)]
             ),
             ft.ListTile(
                 leading=ft.Icon(ft.Icons.PERSON),
                 title=ft.Text("Управление воспитателями"),
-                on_click=lambda e: [self.page.close(menu_dialog), self.manage_teachers(e)]
+                on_click=lambda e: [close_dialog(self.page, menu_dialog), self.manage_teachers(e)]
             ),
             ft.ListTile(
                 leading=ft.Icon(ft.Icons.DOOR_FRONT_DOOR),
                 title=ft.Text("Назначить шкафчики"),
-                on_click=lambda e: [self.page.close(menu_dialog), self.manage_lockers()]
+                on_click=lambda e: [close_dialog(self.page, menu_dialog), self.manage_lockers()]
             )
         ]
         
-        menu_dialog = ft.AlertDialog(
+        menu_dialog = show_dialog(
+            self.page, "group_detail.show_edit_menu",
             modal=True,
             title=ft.Text("Редактирование группы"),
             content=ft.Container(
@@ -425,13 +346,9 @@ class GroupDetailView(ft.Container):
                 width=400
             ),
             actions=[
-                ft.TextButton("Закрыть", on_click=lambda e: self.page.close(menu_dialog))
+                ft.TextButton("Закрыть", on_click=lambda e: close_dialog(self.page, menu_dialog))
             ]
         )
-        
-        self.page.overlay.append(menu_dialog)
-        menu_dialog.open = True
-        self.page.update()
     
     def edit_group_info(self):
         """Редактировать информацию о группе"""
@@ -443,7 +360,8 @@ class GroupDetailView(ft.Container):
             options=[ft.dropdown.Option(k, v) for k, v in AGE_CATEGORIES.items()]
         )
         
-        edit_dialog = ft.AlertDialog(
+        edit_dialog = show_dialog(
+            self.page, "group_detail.edit_group_info",
             modal=True,
             title=ft.Text("Редактировать группу"),
             content=ft.Container(
@@ -455,13 +373,9 @@ class GroupDetailView(ft.Container):
             ),
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=lambda e: self.save_group_changes(edit_dialog, group_name_field, age_category_dropdown)),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(edit_dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, edit_dialog))
             ]
         )
-        
-        self.page.overlay.append(edit_dialog)
-        edit_dialog.open = True
-        self.page.update()
     
     def save_group_changes(self, dialog, group_name_field, age_category_dropdown):
         """Сохранить изменения группы"""
@@ -485,50 +399,48 @@ class GroupDetailView(ft.Container):
         if self.on_refresh:
             self.on_refresh()
         
-        self.page.close(dialog)
-        self.page.update()
+        close_dialog(self.page, dialog)
+        request_update(self.page)
 
     def manage_lockers(self):
         """Управление шкафчиками детей"""
         from settings.locker_symbols import LOCKER_SYMBOLS
         
-        children = self.db.get_children_by_group(self.group_id)
-        if not children:
+        index = self.db.get_locker_index(self.group_id)
+        if not index.children:
             return
         
-        used_symbols = self.db.get_used_locker_symbols_in_group(self.group_id)
-        
         locker_page = [0]
         items_per_page = 7
-        symbol_dropdowns = {}
+        lockers_column = ft.Column([], scroll=ft.ScrollMode.AUTO, height=300)
+        pagination_row = ft.Row([], alignment=ft.MainAxisAlignment.CENTER, height=50)
         
-        for child in children:
-            current_symbol = child.get('locker_symbol')
-            available = {k: v for k, v in LOCKER_SYMBOLS.items() 
-                        if k not in used_symbols or k == current_symbol}
-            
+        def on_symbol_change(e):
+            if not index.assign(e.control.data, e.control.value or None):
+                e.control.value = index.assignments.get(e.control.data) or ""
+            update_locker_list()
+            dialog.update()
+        
+        def create_dropdown(child):
+            """Выпадающий список только для видимой строки: свободные символы и текущий"""
+            child_id = child['child_id']
             options = [ft.dropdown.Option("", "Не назначен")]
-            options.extend([ft.dropdown.Option(k, f"{k} {v}") for k, v in available.items()])
-            
-            dropdown = ft.Dropdown(
+            options.extend(ft.dropdown.Option(k, f"{k} {LOCKER_SYMBOLS[k]}") for k in index.options_for(child_id))
+            return ft.Dropdown(
                 label=f"{child['last_name']} {child['first_name']}",
-                value=current_symbol or "",
+                value=index.assignments.get(child_id) or "",
                 options=options,
                 width=300,
-                data=child['child_id']
+                data=child_id,
+                on_change=on_symbol_change
             )
-            symbol_dropdowns[child['child_id']] = dropdown
-        
-        locker_rows = list(symbol_dropdowns.values())
-        lockers_column = ft.Column([], scroll=ft.ScrollMode.AUTO, height=300)
-        pagination_row = ft.Row([], alignment=ft.MainAxisAlignment.CENTER, height=50)
         
         def update_locker_list():
-            total_pages = (len(locker_rows) + items_per_page - 1) // items_per_page
+            total_pages = (len(index.children) + items_per_page - 1) // items_per_page
             start_idx = locker_page[0] * items_per_page
-            end_idx = min(start_idx + items_per_page, len(locker_rows))
+            end_idx = min(start_idx + items_per_page, len(index.children))
             
-            lockers_column.controls = locker_rows[start_idx:end_idx]
+            lockers_column.controls = [create_dropdown(child) for child in index.children[start_idx:end_idx]]
             
             if total_pages > 1:
                 pagination_row.controls = [
@@ -554,24 +466,32 @@ class GroupDetailView(ft.Container):
                 dialog.update()
         
         def next_locker_page():
-            total_pages = (len(locker_rows) + items_per_page - 1) // items_per_page
+            total_pages = (len(index.children) + items_per_page - 1) // items_per_page
             if locker_page[0] < total_pages - 1:
                 locker_page[0] += 1
                 update_locker_list()
                 dialog.update()
         
+        def auto_assign(e):
+            index.auto_assign()
+            update_locker_list()
+            dialog.update()
+        
         def save_lockers(e):
-            for child_id, dropdown in symbol_dropdowns.items():
-                symbol = dropdown.value if dropdown.value else None
-                self.db.update_child(child_id, locker_symbol=symbol)
+            try:
+                self.db.save_locker_assignments(self.group_id, index.changes())
+            except ValueError as ex:
+                self.show_error(str(ex))
+                return
             
             self._load_children()
             if self.on_refresh:
                 self.on_refresh()
-            self.page.close(dialog)
-            self.page.update()
+            close_dialog(self.page, dialog)
+            request_update(self.page)
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "group_detail.manage_lockers",
             modal=True,
             title=ft.Text(f"Назначить шкафчики: {self.group['group_name']}"),
             content=ft.Container(
@@ -583,12 +503,20 @@ class GroupDetailView(ft.Container):
                 height=400
             ),
             actions=[
+                ft.TextButton("Распределить свободные", icon=ft.Icons.AUTO_FIX_HIGH, on_click=auto_assign),
                 ft.ElevatedButton("Сохранить", on_click=save_lockers),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
         
         update_locker_list()
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
+    
+    def show_error(self, message: str):
+        """Показать ошибку"""
+        if self.page:
+            self.page.snack_bar = ft.SnackBar(
+                content=ft.Text(message),
+                bgcolor=ft.Colors.ERROR
+            )
+            self.page.snack_bar.open = True
+            request_update(self.page)
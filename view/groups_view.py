@@ -3,11 +3,13 @@
 """
 import flet as ft
 from typing import Callable
-from components import InfoCard
-from dialogs import show_confirm_dialog
+from components import InfoCard, RecycledList
+from dialogs import show_confirm_dialog, show_dialog, close_dialog
 from settings.config import AGE_CATEGORIES
+from settings.models import calculate_age
 from pages_styles.styles import AppStyles
 from settings.logger import app_logger
+from page_updates import request_update
 
 
 class GroupsView(ft.Container):
@@ -19,6 +21,7 @@ class GroupsView(ft.Container):
         self.on_refresh = on_refresh
         self.page = page
         self.selected_group = None
+        self.info_dialog = None
         self.current_page = 0
         self.items_per_page = 8
         self.user_group_id = user_group_id  # Группа пользователя для фильтрации
@@ -84,7 +87,13 @@ class GroupsView(ft.Container):
         )
         
         # Список групп
-        self.groups_list = ft.ListView(expand=True, spacing=10, padding=20)
+        self.groups_list = RecycledList(
+            describe=self._describe_group,
+            on_open=lambda group: self.view_group_details(group['group_id']),
+            on_delete=lambda group: self.delete_group(str(group['group_id'])),
+            title_weight=ft.FontWeight.BOLD,
+            expand=True, spacing=10, padding=20
+        )
         
         # Пагинация
         self.pagination_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD)
@@ -107,10 +116,11 @@ class GroupsView(ft.Container):
         """Показать информацию о воспитателе"""
         try:
             teacher = self.db.get_teacher_by_id(teacher_id)
-            if not teacher:
+            if not teacher or not self.page:
                 return
             
-            dialog = ft.AlertDialog(
+            self.info_dialog = show_dialog(
+                self.page, "groups.show_teacher_info",
                 title=ft.Text("Информация о воспитателе"),
                 content=ft.Column([
                     ft.Text(f"ФИО: {teacher.get('last_name', '')} {teacher.get('first_name', '')} {teacher.get('middle_name', '') or ''}"),
@@ -123,20 +133,14 @@ class GroupsView(ft.Container):
                     ft.TextButton("Закрыть", on_click=lambda e: self.close_dialog())
                 ]
             )
-            
-            if self.page:
-                self.page.overlay.append(dialog)
-                dialog.open = True
-                self.page.update()
                 
         except Exception as ex:
             print(f"Ошибка получения информации о воспитателе: {ex}")
     
     def close_dialog(self):
         """Закрыть диалог"""
-        if self.page and self.page.overlay:
-            self.page.overlay.clear()
-            self.page.update()
+        if self.page and self.info_dialog:
+            close_dialog(self.page, self.info_dialog)
     
     def load_groups(self):
         """Загрузка списка групп"""
@@ -147,7 +151,7 @@ class GroupsView(ft.Container):
         self.all_groups = groups
         self.update_pagination()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def update_pagination(self):
         """Обновить пагинацию"""
@@ -161,7 +165,7 @@ class GroupsView(ft.Container):
         end_idx = min(start_idx + self.items_per_page, total_items)
         
         current_items = self.all_groups[start_idx:end_idx]
-        self.groups_list.controls = [self._create_group_item(group) for group in current_items]
+        self.groups_list.show(current_items)
         
         self.pagination_text.value = f"{self.current_page + 1}/{total_pages}" if total_items > 0 else "0/0"
         self.prev_button.disabled = self.current_page == 0
@@ -173,7 +177,7 @@ class GroupsView(ft.Container):
             self.current_page -= 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def next_page(self, e):
         """Следующая страница"""
@@ -182,10 +186,10 @@ class GroupsView(ft.Container):
             self.current_page += 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
-    def _create_group_item(self, group):
-        """Создать элемент списка для группы"""
+    def _describe_group(self, group):
+        """Текст строки списка для группы"""
         teachers = self.db.get_teachers_by_group(group['group_id'])
         teacher_names = ", ".join([t.get('full_name', '') for t in teachers]) if teachers else "Не назначены"
         
@@ -194,16 +198,10 @@ class GroupsView(ft.Container):
         except Exception:
             children_count = group.get('children_count', 0)
         
-        return ft.ListTile(
-            title=ft.Text(group['group_name'], weight=ft.FontWeight.BOLD),
-            subtitle=ft.Text(f"{AGE_CATEGORIES.get(group['age_category'], group['age_category'])} | {teacher_names} | Детей: {children_count}"),
-            on_click=lambda _, gid=group['group_id']: self.view_group_details(gid),
-            trailing=ft.IconButton(
-                icon=ft.Icons.DELETE,
-                tooltip="Удалить",
-                on_click=lambda e, gid=group['group_id']: self.delete_group(str(gid))
-            )
-        )
+        return {
+            'title': group['group_name'],
+            'subtitle': f"{AGE_CATEGORIES.get(group['age_category'], group['age_category'])} | {teacher_names} | Детей: {children_count}"
+        }
     
     def show_add_form(self, e):
         """Показать форму добавления"""
@@ -214,7 +212,7 @@ class GroupsView(ft.Container):
         self._load_teachers_for_form()
         self._load_children_for_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def edit_group(self, group_id: str):
         """Редактировать группу"""
@@ -229,7 +227,7 @@ class GroupsView(ft.Container):
             self.form_container.content.controls[0].value = "Редактировать группу"
             self.form_container.visible = True
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def delete_group(self, group_id: str):
         """Удалить группу"""
@@ -279,7 +277,7 @@ class GroupsView(ft.Container):
         
         if not is_valid:
             if self.page:
-                self.page.update()
+                request_update(self.page)
         
         return is_valid
     
@@ -321,7 +319,7 @@ class GroupsView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             if self.page:
-                self.page.update()
+                request_update(self.page)
             
         except Exception as ex:
             self.show_error(f"Ошибка при сохранении: {str(ex)}")
@@ -331,7 +329,7 @@ class GroupsView(ft.Container):
         self.form_container.visible = False
         self.clear_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def clear_form(self):
         """Очистить форму"""
@@ -368,20 +366,7 @@ class GroupsView(ft.Container):
         selected_teacher_ids = {
             cb.data for cb in self.teachers_list_view.controls if cb.value
         }
-        
-        # Получаем текущий список воспитателей в группе
-        current_teachers_in_group = self.db.get_teachers_by_group(group_id)
-        current_teacher_ids = {t['teacher_id'] for t in current_teachers_in_group}
-
-        # Воспитатели, которых нужно добавить
-        to_add = selected_teacher_ids - current_teacher_ids
-        for teacher_id in to_add:
-            self.db.add_group_teacher_relation(group_id, teacher_id)
-
-        # Воспитатели, которых нужно убрать
-        to_remove = current_teacher_ids - selected_teacher_ids
-        for teacher_id in to_remove:
-            self.db.remove_group_teacher_relation(group_id, teacher_id)
+        self.db.set_group_teachers(group_id, selected_teacher_ids)
 
     def load_teachers(self):
         """Загрузка списка воспитателей для выпадающего списка"""
@@ -394,12 +379,10 @@ class GroupsView(ft.Container):
         self.teacher_dropdown.options.insert(0, ft.DropdownOption(key="0", text="Не назначен"))
         
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def _load_children_for_form(self, group_id: int | None = None):
         """Загружает список детей в форму для выбора."""
-        from datetime import datetime, date
-        
         self.children_list_view.controls.clear()
         all_children = self.db.get_all_children()
         
@@ -421,18 +404,9 @@ class GroupsView(ft.Container):
             full_name = f"{last_name} {first_name} {middle_name}".strip()
             
             # Вычисляем возраст
-            try:
-                birth_date_str = child['birth_date']
-                if '-' in birth_date_str and len(birth_date_str.split('-')[0]) == 4:
-                    birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-                else:
-                    birth_date_obj = datetime.strptime(birth_date_str, "%d-%m-%Y").date()
-                
-                today = date.today()
-                age = today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
+            age = calculate_age(child['birth_date'])
+            if age is not None:
                 full_name += f" ({age} лет)"
-            except:
-                pass
             
             # Добавляем информацию о группе, если ребенок в другой группе
             if is_in_other_group:
@@ -457,15 +431,12 @@ class GroupsView(ft.Container):
         current_children_in_group = self.db.get_children_by_group(group_id)
         current_child_ids = {c['child_id'] for c in current_children_in_group}
 
-        # Дети, которых нужно добавить
-        to_add = selected_child_ids - current_child_ids
-        for child_id in to_add:
-            self._assign_child(child_id, group_id)
-
-        # Дети, которых нужно убрать
-        to_remove = current_child_ids - selected_child_ids
-        for child_id in to_remove:
-            self._assign_child(child_id, None) # Открепляем от группы
+        # Добавляем и открепляем детей одной транзакцией
+        self.db.update_group_membership(
+            group_id,
+            added_ids=selected_child_ids - current_child_ids,
+            removed_ids=current_child_ids - selected_child_ids
+        )
 
     def show_error(self, message: str):
         """Показать ошибку"""
@@ -475,7 +446,7 @@ class GroupsView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def add_child_to_group(self, child):
         """
@@ -515,16 +486,15 @@ class GroupsView(ft.Container):
                 selected = group_dropdown.value
                 group_id = None if not selected or selected == "0" else int(selected)
                 self._assign_child(child_id, group_id)
-                dialog.open = False
-                self.page.update()
+                close_dialog(self.page, dialog)
             except Exception as ex:
                 self.show_error(f"Ошибка при назначении ребёнка: {str(ex)}")
 
         def on_cancel(e):
-            dialog.open = False
-            self.page.update()
+            close_dialog(self.page, dialog)
 
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "groups.add_child_to_group",
             title=ft.Text("Назначить ребёнка в группу"),
             content=ft.Column([ft.Text(f"ID ребёнка: {child_id}"), group_dropdown], spacing=10),
             actions=[
@@ -535,10 +505,6 @@ class GroupsView(ft.Container):
             modal=True
         )
 
-        self.page.dialog = dialog
-        dialog.open = True
-        self.page.update()
-
     def _assign_child(self, child_id: int, group_id: int | None):
         """
         Выполнить изменение группы для ребёнка в БД.
@@ -587,14 +553,14 @@ class GroupsView(ft.Container):
         if self.on_refresh:
             self.on_refresh()
         if self.page:
-            self.page.update()
+            request_update(self.page)
 
     def view_group_details(self, group_id: int):
         """Открыть детальное представление группы"""
         from view.group_detail_view import GroupDetailView
         
         def close_detail():
-            self.page.close(dialog)
+            close_dialog(self.page, dialog)
             self.load_groups()
             if self.on_refresh:
                 self.on_refresh()
@@ -607,16 +573,13 @@ class GroupsView(ft.Container):
             on_refresh=self.on_refresh
         )
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "groups.view_group_details",
             modal=True,
             content=ft.Container(content=detail_view, width=900),
             actions=[],
             content_padding=0
         )
-        
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
     
     def refresh(self):
         """Обновить данные"""
@@ -2,10 +2,11 @@
 Домашняя страница приложения
 """
 import flet as ft
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import Callable
 from components import InfoCard
 from settings.config import PRIMARY_COLOR
+from page_updates import request_update
 
 
 class HomeView(ft.Container):
@@ -34,6 +35,19 @@ class HomeView(ft.Container):
         # Статистические карточки
         self.stats_row = ft.Row([], wrap=True, spacing=20)
         
+        # Сводка по группам
+        self.groups_table = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Группа")),
+                ft.DataColumn(ft.Text("Детей"), numeric=True),
+                ft.DataColumn(ft.Text("Мальчики"), numeric=True),
+                ft.DataColumn(ft.Text("Девочки"), numeric=True),
+                ft.DataColumn(ft.Text("Присутствуют"), numeric=True),
+                ft.DataColumn(ft.Text("Пропуски за 30 дней"), numeric=True)
+            ],
+            rows=[]
+        )
+        
         # Быстрые действия
         quick_actions = ft.Container(
             content=ft.Column([
@@ -80,28 +94,37 @@ class HomeView(ft.Container):
             welcome_section,
             self.stats_row,
             ft.Container(height=20),
-            quick_actions
+            quick_actions,
+            ft.Container(height=20),
+            ft.Text("Группы", size=20, weight=ft.FontWeight.BOLD),
+            self.groups_table
         ], spacing=10, expand=True, scroll=ft.ScrollMode.AUTO)
         
-        # Загружаем статистику
-        self.load_statistics()
+        # Статистика загружается через load_home()/load_statistics() после показа страницы
     
     def load_statistics(self):
         """Загрузка статистики"""
         try:
-            # Получаем статистику
-            total_children = len(self.db.get_all_children())
-            total_groups = len(self.db.get_all_groups())
+            # Получаем статистику из сводных таблиц
+            groups = self.db.get_all_groups()
+            composition = self.db.get_group_composition()
+            total_children = sum(group['headcount'] for group in composition.values())
+            total_groups = len(groups)
             total_teachers = len(self.db.get_all_teachers())
-            total_parents = len(self.db.get_all_parents())
             
             # Посещаемость сегодня
-            today = date.today().strftime("%Y-%m-%d")
-            attendance_today = 0
-            for group in self.db.get_all_groups():
-                if group.get('group_id'):
-                    attendance_data = self.db.get_attendance_by_group_and_date(group['group_id'], today)
-                    attendance_today += len([child for child in attendance_data if child.get('status') == 'Присутствует'])
+            today = date.today()
+            attendance_today = self.db.get_present_count(today.isoformat())
+            
+            # Пропуски (все отметки, кроме «Присутствует») по группам: сегодня и за 30 дней
+            missed_today = self._missed_by_group(today, today)
+            missed = self._missed_by_group(today - timedelta(days=30), today)
+            
+            self.groups_table.rows = [
+                self._create_group_row(group, composition.get(group['group_id'], {}),
+                                       missed_today.get(group['group_id'], 0), missed.get(group['group_id'], 0))
+                for group in groups
+            ]
             
             # Создаем карточки статистики
             cards = [
@@ -114,13 +137,33 @@ class HomeView(ft.Container):
             self.stats_row.controls = cards
             
             if self.page:
-                self.page.update()
+                request_update(self.page)
                 
         except Exception as ex:
             print(f"Ошибка при загрузке статистики: {ex}")
             import traceback
             traceback.print_exc()
     
+    def _missed_by_group(self, start, end):
+        """Число отметок об отсутствии по группам за период"""
+        missed = {}
+        for row in self.db.get_attendance_rollup(start.isoformat(), end.isoformat(), by=('group_id', 'status')):
+            if row['status'] != 'Присутствует':
+                missed[row['group_id']] = missed.get(row['group_id'], 0) + row['count']
+        return missed
+    
+    def _create_group_row(self, group, composition, missed_today, missed):
+        """Строка сводки по группе"""
+        present = composition.get('headcount', 0) - missed_today
+        return ft.DataRow(cells=[
+            ft.DataCell(ft.Text(group['group_name'])),
+            ft.DataCell(ft.Text(str(composition.get('headcount', 0)))),
+            ft.DataCell(ft.Text(str(composition.get('boys', 0)))),
+            ft.DataCell(ft.Text(str(composition.get('girls', 0)))),
+            ft.DataCell(ft.Text(str(present))),
+            ft.DataCell(ft.Text(str(missed)))
+        ])
+    
     def navigate_to(self, view_name):
         """Навигация к другому представлению"""
         if self.page and hasattr(self.page, 'drawer'):
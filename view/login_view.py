@@ -3,8 +3,8 @@
 """
 import flet as ft
 from typing import Callable
-import hashlib
 from settings.logger import app_logger
+from page_updates import request_update
 
 
 class LoginView(ft.Container):
@@ -67,11 +67,27 @@ class LoginView(ft.Container):
         if not username or not password:
             self.error_text.value = "Заполните все поля"
             if self.page:
-                self.page.update()
+                request_update(self.page)
             return
         
-        # Проверка через базу данных
-        user = self.db.authenticate_user(username, password)
+        # Хеширование пароля занимает заметное время — проверяем в рабочем потоке,
+        # чтобы интерфейс не замирал
+        self.error_text.value = ""
+        self.login_button.disabled = True
+        if self.page:
+            request_update(self.page)
+            # Соединение потока возвращается в пул после обработчика (release_handler_connections)
+            self.page.run_thread(self._authenticate, username, password)
+        else:
+            self._authenticate(username, password)
+    
+    def _authenticate(self, username: str, password: str):
+        """Проверить учетные данные и завершить вход (выполняется в рабочем потоке)"""
+        try:
+            user = self.db.authenticate_user(username, password)
+        finally:
+            self.login_button.disabled = False
+        
         if user:
             # Логируем вход
             app_logger.log('LOGIN', username, details=f"Role: {user['role']}")
@@ -88,4 +104,4 @@ class LoginView(ft.Container):
             app_logger.log('LOGIN_FAILED', username, level='WARNING')
             self.error_text.value = "Неверный логин или пароль"
             if self.page:
-                self.page.update()
\ No newline at end of file
+                request_update(self.page)
\ No newline at end of file
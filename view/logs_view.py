@@ -4,6 +4,9 @@
 import flet as ft
 from settings.logger import app_logger
 from pages_styles.styles import AppStyles
+from settings.async_db import LatestCall, run_async
+from components import LoadingBar
+from page_updates import request_update
 
 
 class LogsView(ft.Container):
@@ -12,6 +15,8 @@ class LogsView(ft.Container):
     def __init__(self, page=None):
         super().__init__()
         self.page = page
+        self.logs_request = LatestCall()  # Новый запрос логов (ввод в фильтре) отменяет устаревший
+        self.loading_bar = LoadingBar()
         
         # Загружаем сохраненное значение лимита
         saved_limit = page.client_storage.get("logs_limit") if page else None
@@ -87,12 +92,13 @@ class LogsView(ft.Container):
                 clear_button
             ], spacing=10, wrap=True),
             ft.Container(height=10),
+            self.loading_bar,
             ft.Container(content=self.logs_list, expand=True)
         ], spacing=10, expand=True)
         self.expand = True
     
-    def load_logs(self, e=None):
-        """Загрузить логи"""
+    async def load_logs(self, e=None):
+        """Загрузить логи (устаревший запрос отменяется новым)"""
         try:
             user = self.user_filter.value if self.user_filter.value and self.user_filter.value.strip() else None
             action_value = self.action_filter.value
@@ -102,7 +108,8 @@ class LogsView(ft.Container):
             print(f"DEBUG: user={user}, action={action}, limit={limit}")
             
             try:
-                logs = app_logger.get_logs(limit=limit, user=user, action=action)
+                with self.loading_bar:
+                    logs = await self.logs_request(app_logger.get_logs, limit=limit, user=user, action=action)
                 print(f"DEBUG: Got {len(logs)} logs")
             except Exception as ex:
                 print(f"DEBUG: Exception in get_logs: {ex}")
@@ -165,29 +172,30 @@ class LogsView(ft.Container):
             
             if self.page:
                 self.update()
-                self.page.update()
+                request_update(self.page)
         except Exception as ex:
             print(f"Error loading logs: {str(ex)}")
             if self.page:
                 self.show_error(f"Ошибка при загрузке логов: {str(ex)}")
     
-    def on_limit_change(self, e):
+    async def on_limit_change(self, e):
         """Сохранить выбранный лимит и применить фильтры"""
         if self.page:
             self.page.client_storage.set("logs_limit", self.limit_dropdown.value)
-        self.apply_filters(e)
+        await self.apply_filters(e)
     
-    def apply_filters(self, e):
+    async def apply_filters(self, e):
         """Применить фильтры"""
-        self.load_logs()
+        await self.load_logs()
     
-    def export_logs(self, e):
+    async def export_logs(self, e):
         """Экспорт логов в CSV"""
         try:
             import csv
             from datetime import datetime
             
-            logs = app_logger.get_logs(limit=int(self.limit_dropdown.value))
+            with self.loading_bar:
+                logs = await run_async(app_logger.get_logs, limit=int(self.limit_dropdown.value))
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"logs_export_{timestamp}.csv"
             
@@ -201,7 +209,7 @@ class LogsView(ft.Container):
             
             # Логируем экспорт
             username = self.page.client_storage.get("username") if self.page else None
-            app_logger.log('EXPORT', username, 'Logs', f'Exported {len(logs)} log entries')
+            await run_async(app_logger.log, 'EXPORT', username, 'Logs', f'Exported {len(logs)} log entries')
         except Exception as ex:
             self.show_error(f"Ошибка при экспорте: {str(ex)}")
     
@@ -213,7 +221,7 @@ class LogsView(ft.Container):
             try:
                 deleted = app_logger.clear_old_logs(days=90)
                 self.show_success(f"Удалено записей: {deleted}")
-                self.load_logs()
+                self.page.run_task(self.load_logs)
             except Exception as ex:
                 self.show_error(f"Ошибка при очистке: {str(ex)}")
         
@@ -233,7 +241,7 @@ class LogsView(ft.Container):
                 bgcolor=ft.Colors.GREEN
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def show_error(self, message: str):
         """Показать ошибку"""
@@ -243,4 +251,4 @@ class LogsView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
@@ -4,12 +4,15 @@
 import flet as ft
 from typing import Callable
 from pages_styles.styles import AppStyles
+from settings.models import format_date
+from page_updates import request_update
 
 
 class MedicalCardView(ft.Container):
     """Представление медицинской карты ребёнка"""
     
-    def __init__(self, db, child_id: int, child_name: str, on_close: Callable = None, page=None, embedded=False):
+    def __init__(self, db, child_id: int, child_name: str, on_close: Callable = None, page=None, embedded=False,
+                 record: dict = None):
         super().__init__()
         self.db = db
         self.child_id = child_id
@@ -106,8 +109,8 @@ class MedicalCardView(ft.Container):
             on_click=self.close_view
         )
         
-        # Загружаем данные
-        self.load_medical_record()
+        # Загружаем данные (если карта уже получена вызывающим кодом, повторный запрос не нужен)
+        self.load_medical_record(record)
         
         # Вкладки
         basic_info_tab = ft.Tab(
@@ -179,9 +182,10 @@ class MedicalCardView(ft.Container):
         e.control.value = formatted
         e.control.update()
     
-    def load_medical_record(self):
+    def load_medical_record(self, record: dict = None):
         """Загрузить медицинскую карту"""
-        record = self.db.get_medical_record(self.child_id)
+        if record is None:
+            record = self.db.get_medical_record(self.child_id)
         if record:
             self.blood_type_dropdown.value = record.get('blood_type')
             self.allergies_field.value = record.get('allergies') or ''
@@ -191,7 +195,7 @@ class MedicalCardView(ft.Container):
             self.weight_field.value = str(record.get('weight')) if record.get('weight') else ''
             self.doctor_notes_field.value = record.get('doctor_notes') or ''
             self.emergency_contact_field.value = record.get('emergency_contact') or ''
-            self.last_checkup_field.value = record.get('last_checkup') or ''
+            self.last_checkup_field.value = format_date(record.get('last_checkup'))
     
     def save_medical_record(self, e):
         """Сохранить медицинскую карту"""
@@ -246,7 +250,7 @@ class MedicalCardView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def show_success(self, message: str):
         """Показать успешное сообщение"""
@@ -256,4 +260,4 @@ class MedicalCardView(ft.Container):
                 bgcolor=ft.Colors.GREEN
             )
             self.page.snack_bar.open = True
-            self.page.update()
\ No newline at end of file
+            request_update(self.page)
\ No newline at end of file
@@ -2,6 +2,9 @@
 Детальное представление информации о родителе с вкладками
 """
 import flet as ft
+from settings.models import format_date
+from dialogs import show_dialog, close_dialog
+from page_updates import request_update
 
 
 class ParentDetailView(ft.Container):
@@ -123,7 +126,7 @@ class ParentDetailView(ft.Container):
                             ]),
                             ft.Divider(),
                             ft.Text(f"Группа: {child.get('group_name', 'Без группы')}", size=14),
-                            ft.Text(f"Дата рождения: {child.get('birth_date', 'Не указана')}", size=14)
+                            ft.Text(f"Дата рождения: {format_date(child.get('birth_date')) or 'Не указана'}", size=14)
                         ], spacing=10),
                         padding=15
                     )
@@ -152,7 +155,7 @@ class ParentDetailView(ft.Container):
         if self.children_page > 0:
             self.children_page -= 1
             self._load_children()
-            self.page.update()
+            request_update(self.page)
     
     def _next_children_page(self):
         """Следующая страница детей"""
@@ -161,73 +164,44 @@ class ParentDetailView(ft.Container):
         if self.children_page < total_pages - 1:
             self.children_page += 1
             self._load_children()
-            self.page.update()
+            request_update(self.page)
     
     def manage_children(self, e):
         """Управление детьми родителя"""
-        all_children = self.db.get_all_children()
-        current_children = self.db.get_children_by_parent(self.parent_id)
-        current_child_ids = [c['child_id'] for c in current_children]
-        
-        child_checkboxes = []
-        relationship_fields = {}
-        child_rows = []
+        from components import SearchPicker
         
-        for child in all_children:
-            is_selected = child['child_id'] in current_child_ids
-            current_relationship = next((c['relationship'] for c in current_children if c['child_id'] == child['child_id']), "")
-            
-            checkbox = ft.Checkbox(
-                label=f"{child.get('last_name', '')} {child.get('first_name', '')}",
-                value=is_selected,
-                data=child['child_id']
-            )
-            
-            relationship_field = ft.TextField(
-                label="Степень родства",
-                value=current_relationship,
-                width=150,
-                hint_text="Мама, Папа..."
-            )
-            
-            child_checkboxes.append(checkbox)
-            relationship_fields[child['child_id']] = relationship_field
-            child_rows.append(ft.Row([checkbox, relationship_field], spacing=10))
+        current_children = self.db.get_children_by_parent(self.parent_id)
+        picker = SearchPicker(
+            fetch_page=lambda term, offset, limit: self.db.search_children(term, limit=limit, offset=offset),
+            id_key='child_id',
+            label=lambda child: f"{child['last_name']} {child['first_name']}",
+            selected={c['child_id'] for c in current_children},
+            detail_label="Степень родства",
+            detail_hint="Мама, Папа...",
+            details={c['child_id']: c['relationship'] for c in current_children},
+            width=500,
+            height=400
+        )
         
         def save_relations(e):
-            for child_id in current_child_ids:
-                self.db.remove_parent_child_relation(self.parent_id, child_id)
-            
-            for checkbox in child_checkboxes:
-                if checkbox.value:
-                    relationship = relationship_fields[checkbox.data].value or "Родитель"
-                    self.db.add_parent_child_relation(self.parent_id, checkbox.data, relationship)
+            self.db.set_parent_children(self.parent_id, picker.get_selected_details(default="Родитель"))
             
             self._load_children()
-            bs.open = False
-            self.page.update()
+            close_dialog(self.page, bs)
         
         def cancel_manage(e):
-            bs.open = False
-            self.page.update()
+            close_dialog(self.page, bs)
         
-        bs = ft.AlertDialog(
+        bs = show_dialog(
+            self.page, "parent_detail.manage_children",
             modal=True,
             title=ft.Text(f"Дети: {self.parent_data['last_name']} {self.parent_data['first_name']}"),
-            content=ft.Container(
-                content=ft.Column(child_rows, scroll=ft.ScrollMode.AUTO),
-                width=500,
-                height=400
-            ),
+            content=picker,
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_relations),
                 ft.TextButton("Отмена", on_click=cancel_manage)
-            ],
-            open=True
+            ]
         )
-        
-        self.page.overlay.append(bs)
-        self.page.update()
     
     def edit_parent(self, e):
         """Редактировать родителя"""
@@ -332,14 +306,13 @@ class ParentDetailView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             
-            bs.open = False
-            self.page.update()
+            close_dialog(self.page, bs)
         
         def cancel_edit(e):
-            bs.open = False
-            self.page.update()
+            close_dialog(self.page, bs)
         
-        bs = ft.AlertDialog(
+        bs = show_dialog(
+            self.page, "parent_detail.edit_parent",
             modal=True,
             title=ft.Text("Редактировать родителя"),
             content=ft.Container(
@@ -357,12 +330,8 @@ class ParentDetailView(ft.Container):
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_changes),
                 ft.TextButton("Отмена", on_click=cancel_edit)
-            ],
-            open=True
+            ]
         )
-        
-        self.page.overlay.append(bs)
-        self.page.update()
     
     def _info_row(self, label: str, value: str):
         """Создать строку с информацией"""
@@ -3,11 +3,12 @@
 """
 import flet as ft
 from typing import Callable
-from components import SearchBar
-from dialogs import show_confirm_dialog
+from components import SearchBar, RecycledList
+from dialogs import show_confirm_dialog, show_dialog, close_dialog
 from settings.config import PRIMARY_COLOR
 from pages_styles.styles import AppStyles
 from settings.logger import app_logger
+from page_updates import request_update
 
 
 class ParentsView(ft.Container):
@@ -115,7 +116,14 @@ class ParentsView(ft.Container):
         self.search_bar = SearchBar(on_search=self.on_search, placeholder="Поиск родителей...")
         
         # Список родителей
-        self.parents_list = ft.ListView(expand=True, spacing=10, padding=20)
+        is_admin = page.client_storage.get("user_role") == "admin" if page else True
+        self.parents_list = RecycledList(
+            describe=self._describe_parent,
+            on_open=lambda parent: self.show_parent_detail(parent['parent_id']),
+            on_delete=(lambda parent: self.delete_parent(str(parent['parent_id']))) if is_admin else None,
+            leading_icon=ft.Icons.PERSON,
+            expand=True, spacing=10, padding=20
+        )
         
         # Пагинация
         self.pagination_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD)
@@ -170,7 +178,7 @@ class ParentsView(ft.Container):
         self.all_parents = parents
         self.update_pagination()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def update_pagination(self):
         """Обновить пагинацию"""
@@ -184,9 +192,7 @@ class ParentsView(ft.Container):
         end_idx = min(start_idx + self.items_per_page, total_items)
         
         current_items = self.all_parents[start_idx:end_idx]
-        self.parents_list.controls.clear()
-        for parent in current_items:
-            self.parents_list.controls.append(self._create_parent_item(parent))
+        self.parents_list.show(current_items)
         
         self.pagination_text.value = f"{self.current_page + 1}/{total_pages}" if total_items > 0 else "0/0"
         self.prev_button.disabled = self.current_page == 0
@@ -198,7 +204,7 @@ class ParentsView(ft.Container):
             self.current_page -= 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def next_page(self, e):
         """Следующая страница"""
@@ -207,28 +213,14 @@ class ParentsView(ft.Container):
             self.current_page += 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
-    def _create_parent_item(self, parent):
-        """Создать элемент списка для родителя"""
-        is_admin = self.page.client_storage.get("user_role") == "admin" if self.page else True
-        
-        if is_admin:
-            trailing = ft.IconButton(
-                icon=ft.Icons.DELETE,
-                tooltip="Удалить",
-                on_click=lambda _, pid=parent['parent_id']: self.delete_parent(str(pid))
-            )
-        else:
-            trailing = None
-        
-        return ft.ListTile(
-            leading=ft.Icon(ft.Icons.PERSON),
-            title=ft.Text(parent.get('full_name', '')),
-            subtitle=ft.Text(f"Тел: {parent.get('phone', 'Не указан')} | Email: {parent.get('email', 'Не указан')}"),
-            on_click=lambda _, pid=parent['parent_id']: self.show_parent_detail(pid),
-            trailing=trailing
-        )
+    def _describe_parent(self, parent):
+        """Текст строки списка для родителя"""
+        return {
+            'title': parent.get('full_name', ''),
+            'subtitle': f"Тел: {parent.get('phone', 'Не указан')} | Email: {parent.get('email', 'Не указан')}"
+        }
     
     def show_add_form(self, e):
         """Показать форму добавления"""
@@ -237,7 +229,7 @@ class ParentsView(ft.Container):
         self.form_title.value = "Добавить родителя"
         self.form_container.visible = True
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def edit_parent(self, parent_id: str):
         """Редактировать родителя"""
@@ -269,7 +261,7 @@ class ParentsView(ft.Container):
             self.form_title.value = "Редактировать родителя"
             self.form_container.visible = True
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def delete_parent(self, parent_id: str):
         """Удалить родителя"""
@@ -377,7 +369,7 @@ class ParentsView(ft.Container):
             is_valid = False
         
         if not is_valid and self.page:
-            self.page.update()
+            request_update(self.page)
         
         return is_valid
     
@@ -432,7 +424,7 @@ class ParentsView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             if self.page:
-                self.page.update()
+                request_update(self.page)
             
         except Exception as ex:
             self.show_error(f"Ошибка при сохранении: {str(ex)}")
@@ -442,7 +434,7 @@ class ParentsView(ft.Container):
         self.form_container.visible = False
         self.clear_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def clear_form(self):
         """Очистить форму"""
@@ -460,7 +452,7 @@ class ParentsView(ft.Container):
         from view.parent_detail_view import ParentDetailView
         
         def close_detail():
-            self.page.close(dialog)
+            close_dialog(self.page, dialog)
         
         def refresh_data():
             self.load_parents(self.search_query)
@@ -475,19 +467,16 @@ class ParentsView(ft.Container):
             on_refresh=refresh_data
         )
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "parents.show_parent_detail",
             modal=True,
             content=ft.Container(
                 content=detail_view,
                 width=900,
                 height=700
             ),
-            actions=[],
-            open=True
+            actions=[]
         )
-        
-        self.page.overlay.append(dialog)
-        self.page.update()
     
     def show_error(self, message: str):
         """Показать ошибку"""
@@ -497,7 +486,7 @@ class ParentsView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def show_success(self, message: str):
         """Показать успешное сообщение"""
@@ -507,6 +496,6 @@ class ParentsView(ft.Container):
                 bgcolor=ft.Colors.GREEN
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
 
 
@@ -3,11 +3,12 @@
 """
 import flet as ft
 from typing import Callable
-from settings.config import PRIMARY_COLOR
+from settings.config import PRIMARY_COLOR, DATABASE_NAME
 import shutil
 import os
 from datetime import datetime
 from settings.logger import app_logger
+from page_updates import request_update
 
 
 class SettingsView(ft.Container):
@@ -82,12 +83,12 @@ class SettingsView(ft.Container):
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                 ft.Container(height=10),
                 ft.Row([
-                    ft.Icon(ft.Icons.DELETE_SWEEP_OUTLINED, size=24),
+                    ft.Icon(ft.Icons.ARCHIVE_OUTLINED, size=24),
                     ft.Column([
-                        ft.Text("Очистка данных", size=16),
-                        ft.Text("Удалить старые записи посещаемости", size=12, color=ft.Colors.GREY_600)
+                        ft.Text("Архив посещаемости", size=16),
+                        ft.Text("Перенести закрытые учебные годы в архив", size=12, color=ft.Colors.GREY_600)
                     ], expand=True),
-                    ft.ElevatedButton("Очистить", icon=ft.Icons.DELETE, on_click=self.clear_old_data)
+                    ft.ElevatedButton("В архив", icon=ft.Icons.ARCHIVE, on_click=self.clear_old_data)
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
             ], spacing=10),
             padding=20,
@@ -130,8 +131,9 @@ class SettingsView(ft.Container):
         """Создать резервную копию базы данных"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = f"kindergarten_backup_{timestamp}.db"
-            shutil.copy2("kindergarten.db", backup_path)
+            # Копии хранятся рядом с базой: там их находит очистка по сроку хранения
+            backup_path = os.path.join(os.path.dirname(DATABASE_NAME), f"kindergarten_backup_{timestamp}.db")
+            shutil.copy2(DATABASE_NAME, backup_path)
             
             username = self.page.client_storage.get("username") if self.page else None
             app_logger.log('BACKUP', username, 'Database', f'Created backup: {backup_path}')
@@ -167,30 +169,35 @@ class SettingsView(ft.Container):
             self.show_error(f"Ошибка при экспорте: {str(ex)}")
     
     def clear_old_data(self, e):
-        """Очистка старых данных"""
+        """Перенос закрытых учебных лет посещаемости в архив (журнал и отчеты их по-прежнему видят)"""
         from dialogs import show_confirm_dialog
+        from settings.attendance_archive import academic_year_label
+        
+        years = self.db.get_closed_years()
+        if not years:
+            self.show_success("Закрытых учебных лет в рабочей таблице нет")
+            return
+        labels = ", ".join(academic_year_label(year) for year in years)
         
         def on_yes(e):
             try:
-                # Удаляем записи посещаемости старше 1 года
-                from database import Attendance
-                from datetime import timedelta
-                old_date = datetime.now() - timedelta(days=365)
-                deleted = Attendance.delete().where(Attendance.date < old_date.strftime("%Y-%m-%d")).execute()
+                moved = self.db.archive_attendance()
+                total = sum(moved.values())
                 
                 username = self.page.client_storage.get("username") if self.page else None
-                app_logger.log('CLEAR_DATA', username, 'Attendance', f'Deleted {deleted} old records')
+                app_logger.log('ARCHIVE_DATA', username, 'Attendance', f'Archived {total} records: {labels}')
                 
-                self.show_success(f"Удалено записей: {deleted}")
+                self.show_success(f"Перенесено в архив записей: {total}")
             except Exception as ex:
                 username = self.page.client_storage.get("username") if self.page else None
-                app_logger.log('CLEAR_DATA_FAILED', username, 'Attendance', str(ex), 'ERROR')
-                self.show_error(f"Ошибка при очистке: {str(ex)}")
+                app_logger.log('ARCHIVE_DATA_FAILED', username, 'Attendance', str(ex), 'ERROR')
+                self.show_error(f"Ошибка при переносе в архив: {str(ex)}")
         
         show_confirm_dialog(
             self.page,
-            title="Очистка данных",
-            content="Вы уверены, что хотите удалить записи посещаемости старше 1 года?",
+            title="Архив посещаемости",
+            content=f"Перенести в архив отметки учебных лет: {labels}? "
+                    f"Изменять отметки за эти годы будет нельзя.",
             on_yes=on_yes,
             adaptive=True
         )
@@ -203,7 +210,7 @@ class SettingsView(ft.Container):
                 bgcolor=ft.Colors.GREEN
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def show_error(self, message: str):
         """Показать ошибку"""
@@ -213,7 +220,7 @@ class SettingsView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def load_settings(self):
         """Загрузка настроек (заглушка для совместимости)"""
@@ -2,7 +2,9 @@
 Детальное представление информации о воспитателе с вкладками
 """
 import flet as ft
-from datetime import datetime, date
+from settings.models import calculate_age, format_age, format_date, validate_date
+from dialogs import show_dialog, close_dialog
+from page_updates import request_update
 
 
 class TeacherDetailView(ft.Container):
@@ -54,25 +56,13 @@ class TeacherDetailView(ft.Container):
     def _create_info_tab(self):
         """Создать вкладку с общей информацией"""
         # Вычисляем возраст
-        age_text = "Не указан"
-        if self.teacher.get('birth_date'):
-            try:
-                birth_date_str = self.teacher['birth_date']
-                if '-' in birth_date_str and len(birth_date_str.split('-')[0]) == 4:
-                    birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d").date()
-                else:
-                    birth_date_obj = datetime.strptime(birth_date_str, "%d-%m-%Y").date()
-                
-                today = date.today()
-                age = today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
-                age_text = f"{age} лет"
-            except:
-                pass
+        age = calculate_age(self.teacher.get('birth_date'))
+        age_text = format_age(age) if age is not None else "Не указан"
         
         return ft.Container(
             content=ft.Column([
                 self._info_row("ФИО", f"{self.teacher['last_name']} {self.teacher['first_name']} {self.teacher.get('middle_name', '')}"),
-                self._info_row("Дата рождения", self.teacher.get('birth_date', 'Не указана')),
+                self._info_row("Дата рождения", format_date(self.teacher.get('birth_date')) or 'Не указана'),
                 self._info_row("Возраст", age_text),
                 self._info_row("Телефон", self.teacher.get('phone', 'Не указан')),
                 self._info_row("Email", self.teacher.get('email', 'Не указан')),
@@ -166,7 +156,7 @@ class TeacherDetailView(ft.Container):
         
         phone_field = ft.TextField(label="Телефон", value=phone_number, width=150)
         email_field = ft.TextField(label="Email", value=self.teacher.get('email', ''), width=300)
-        birth_date_field = ft.TextField(label="Дата рождения", value=self.teacher.get('birth_date', ''), width=300, hint_text="дд-мм-гггг")
+        birth_date_field = ft.TextField(label="Дата рождения", value=format_date(self.teacher.get('birth_date')), width=300, hint_text="дд-мм-гггг")
         address_field = ft.TextField(label="Адрес", value=self.teacher.get('address', ''), width=300, multiline=True, max_lines=2)
         education_field = ft.TextField(label="Образование", value=self.teacher.get('education', ''), width=300, multiline=True, max_lines=3)
         experience_field = ft.TextField(label="Стаж работы (лет)", value=str(self.teacher.get('experience', '')), width=300)
@@ -175,6 +165,12 @@ class TeacherDetailView(ft.Container):
             if not last_name_field.value or not first_name_field.value:
                 return
             
+            birth_date_field.error_text = None
+            if birth_date_field.value and not validate_date(birth_date_field.value):
+                birth_date_field.error_text = "Неверная дата"
+                request_update(self.page)
+                return
+            
             full_phone = None
             if phone_field.value and phone_field.value.strip():
                 full_phone = country_code_dropdown.value + phone_field.value.replace('-', '')
@@ -204,10 +200,11 @@ class TeacherDetailView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             
-            self.page.update()
-            self.page.close(dialog)
+            request_update(self.page)
+            close_dialog(self.page, dialog)
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "teacher_detail.edit_teacher",
             modal=True,
             title=ft.Text("Редактировать воспитателя"),
             content=ft.Container(
@@ -227,13 +224,9 @@ class TeacherDetailView(ft.Container):
             ),
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_changes),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
-        
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
     
     def _info_row(self, label: str, value: str):
         """Создать строку с информацией"""
@@ -3,11 +3,13 @@
 """
 import flet as ft
 from typing import Callable
-from components import SearchBar
-from dialogs import show_confirm_dialog
+from components import SearchBar, RecycledList
+from dialogs import show_confirm_dialog, show_dialog, close_dialog
 from settings.config import PRIMARY_COLOR
+from settings.models import format_date
 from pages_styles.styles import AppStyles
 from settings.logger import app_logger
+from page_updates import request_update
 
 
 class TeachersView(ft.Container):
@@ -92,7 +94,13 @@ class TeachersView(ft.Container):
         self.search_bar = SearchBar(on_search=self.on_search, placeholder="Поиск воспитателей...")
         
         # Список воспитателей
-        self.teachers_list = ft.ListView(expand=True, spacing=10, padding=20)
+        self.teachers_list = RecycledList(
+            describe=self._describe_teacher,
+            on_open=lambda teacher: self.show_teacher_detail(teacher['teacher_id']),
+            on_delete=(lambda teacher: self.delete_teacher(str(teacher['teacher_id']))) if self.is_admin else None,
+            title_weight=ft.FontWeight.BOLD,
+            expand=True, spacing=10, padding=20
+        )
         
         # Пагинация
         self.pagination_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD)
@@ -130,7 +138,7 @@ class TeachersView(ft.Container):
         self.all_teachers = teachers
         self.update_pagination()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def update_pagination(self):
         """Обновить пагинацию"""
@@ -144,7 +152,7 @@ class TeachersView(ft.Container):
         end_idx = min(start_idx + self.items_per_page, total_items)
         
         current_items = self.all_teachers[start_idx:end_idx]
-        self.teachers_list.controls = [self._create_teacher_item(teacher) for teacher in current_items]
+        self.teachers_list.show(current_items)
         
         self.pagination_text.value = f"{self.current_page + 1}/{total_pages}" if total_items > 0 else "0/0"
         self.prev_button.disabled = self.current_page == 0
@@ -156,7 +164,7 @@ class TeachersView(ft.Container):
             self.current_page -= 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def next_page(self, e):
         """Следующая страница"""
@@ -165,28 +173,17 @@ class TeachersView(ft.Container):
             self.current_page += 1
             self.update_pagination()
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
-    def _create_teacher_item(self, teacher):
-        """Создать элемент списка для воспитателя"""
+    def _describe_teacher(self, teacher):
+        """Текст строки списка для воспитателя"""
         phone_text = teacher.get('phone') if teacher.get('phone') else "Не указан"
         email_text = teacher.get('email') if teacher.get('email') else "Не указан"
         
-        if self.is_admin:
-            trailing = ft.IconButton(
-                icon=ft.Icons.DELETE,
-                tooltip="Удалить",
-                on_click=lambda _, tid=teacher['teacher_id']: self.delete_teacher(str(tid))
-            )
-        else:
-            trailing = None
-        
-        return ft.ListTile(
-            title=ft.Text(teacher.get('full_name', ''), weight=ft.FontWeight.BOLD),
-            subtitle=ft.Text(f"Тел: {phone_text} | Email: {email_text}"),
-            on_click=lambda _, tid=teacher['teacher_id']: self.show_teacher_detail(tid),
-            trailing=trailing
-        )
+        return {
+            'title': teacher.get('full_name', ''),
+            'subtitle': f"Тел: {phone_text} | Email: {email_text}"
+        }
     
     def show_add_form(self, e):
         """Показать форму добавления"""
@@ -195,7 +192,7 @@ class TeachersView(ft.Container):
         self.form_title.value = "Добавить воспитателя"
         self.form_container.visible = True
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def edit_teacher(self, teacher_id: str):
         """Редактировать воспитателя"""
@@ -222,7 +219,7 @@ class TeachersView(ft.Container):
                 self.phone_field.value = phone
             
             self.email_field.value = teacher['email'] or ''
-            self.birth_date_field.value = teacher.get('birth_date') or ''
+            self.birth_date_field.value = format_date(teacher.get('birth_date'))
             self.address_field.value = teacher.get('address') or ''
             self.education_field.value = teacher.get('education') or ''
             self.experience_field.value = str(teacher.get('experience') or '')
@@ -230,7 +227,7 @@ class TeachersView(ft.Container):
             self.form_title.value = "Редактировать воспитателя"
             self.form_container.visible = True
             if self.page:
-                self.page.update()
+                request_update(self.page)
     
     def delete_teacher(self, teacher_id: str):
         """Удалить воспитателя"""
@@ -366,7 +363,7 @@ class TeachersView(ft.Container):
             is_valid = False
         
         if not is_valid and self.page:
-            self.page.update()
+            request_update(self.page)
         
         return is_valid
     
@@ -427,7 +424,7 @@ class TeachersView(ft.Container):
             if self.on_refresh:
                 self.on_refresh()
             if self.page:
-                self.page.update()
+                request_update(self.page)
             
         except Exception as ex:
             self.show_error(f"Ошибка при сохранении: {str(ex)}")
@@ -437,7 +434,7 @@ class TeachersView(ft.Container):
         self.form_container.visible = False
         self.clear_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def clear_form(self):
         """Очистить форму"""
@@ -458,7 +455,7 @@ class TeachersView(ft.Container):
         from view.teacher_detail_view import TeacherDetailView
         
         def close_detail():
-            self.page.close(dialog)
+            close_dialog(self.page, dialog)
         
         def refresh_data():
             self.load_teachers(self.search_query)
@@ -473,19 +470,16 @@ class TeachersView(ft.Container):
             on_refresh=refresh_data
         )
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "teachers.show_teacher_detail",
             modal=True,
             content=ft.Container(
                 content=detail_view,
                 width=900,
                 height=700
             ),
-            actions=[],
-            open=True
+            actions=[]
         )
-        
-        self.page.overlay.append(dialog)
-        self.page.update()
     
     def show_error(self, message: str):
         """Показать ошибку"""
@@ -495,7 +489,7 @@ class TeachersView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def show_success(self, message: str):
         """Показать успешное сообщение"""
@@ -505,5 +499,5 @@ class TeachersView(ft.Container):
                 bgcolor=ft.Colors.GREEN
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
 
@@ -3,9 +3,11 @@
 """
 import flet as ft
 from typing import Callable
-import hashlib
+from settings.credentials import password_hasher
 from pages_styles.styles import AppStyles
 from settings.logger import app_logger
+from dialogs import show_dialog, close_dialog
+from page_updates import request_update
 
 
 class UsersView(ft.Container):
@@ -119,7 +121,7 @@ class UsersView(ft.Container):
         users = self.db.get_all_users()
         self.users_list.controls = [self._create_user_item(user) for user in users]
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def load_groups(self):
         """Загрузка списка групп"""
@@ -173,7 +175,7 @@ class UsersView(ft.Container):
             cb.value = True
         self.form_container.visible = True
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def edit_user(self, user):
         """Редактировать пользователя"""
@@ -187,19 +189,19 @@ class UsersView(ft.Container):
         self.group_dropdown.value = str(user['group_id']) if user.get('group_id') else "0"
         
         # Загружаем права доступа
-        user_perms = self.db.get_user_permissions(user['user_id'])
+        context = self.db.get_user_context(user['user_id'])
+        user_perms = context.permissions if context else {}
         for page_key, cb in self.permissions_checkboxes.items():
             cb.value = user_perms.get(page_key, True)
         
         self.form_container.content.controls[0].value = f"Редактировать пользователя: {user['username']}"
         self.form_container.visible = True
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def change_password(self, user_id: int):
         """Изменить пароль пользователя"""
         from database import User
-        import threading
         user = User.get_by_id(user_id)
         
         new_password_field = ft.TextField(
@@ -214,29 +216,20 @@ class UsersView(ft.Container):
                 self.show_error("Пароль должен содержать минимум 3 символа")
                 return
             
-            password_hash = hashlib.sha256(new_password_field.value.encode()).hexdigest()
-            user.password = password_hash
-            user.save()
+            self.db.set_user_password(user.user_id, new_password_field.value)
             
-            self.page.close(dialog)
+            close_dialog(self.page, dialog)
             self.show_success(f"Пароль для пользователя {user.username} успешно изменен")
         
-        dialog = ft.AlertDialog(
+        dialog = show_dialog(
+            self.page, "users.change_password",
             title=ft.Text(f"Изменить пароль: {user.username}"),
             content=new_password_field,
             actions=[
                 ft.ElevatedButton("Сохранить", on_click=save_new_password),
-                ft.TextButton("Отмена", on_click=lambda e: self.page.close(dialog))
+                ft.TextButton("Отмена", on_click=lambda e: close_dialog(self.page, dialog))
             ]
         )
-        
-        self.page.overlay.append(dialog)
-        
-        def open_dialog():
-            dialog.open = True
-            self.page.update()
-        
-        threading.Timer(0.1, open_dialog).start()
     
     def delete_user(self, user_id: int):
         """Удалить пользователя"""
@@ -248,7 +241,7 @@ class UsersView(ft.Container):
         def on_yes(e):
             try:
                 username_to_delete = user.username
-                user.delete_instance()
+                self.db.delete_user(user.user_id)
                 
                 current_username = self.page.client_storage.get("username") if self.page else None
                 app_logger.log('DELETE', current_username, 'User', f"Deleted user: {username_to_delete}")
@@ -282,7 +275,7 @@ class UsersView(ft.Container):
             is_valid = False
         
         if not is_valid and self.page:
-            self.page.update()
+            request_update(self.page)
         
         return is_valid
     
@@ -297,7 +290,7 @@ class UsersView(ft.Container):
             return
         
         try:
-            from database import User
+            from database import User, write_executor
             
             username = self.username_field.value.strip()
             role = self.role_dropdown.value
@@ -321,30 +314,33 @@ class UsersView(ft.Container):
                 user = User.get_by_id(self.selected_user['user_id'])
                 user.username = username
                 user.role = role
-                user.group = group_id
-                user.save()
+                write_executor.run(user.save, only=[User.username, User.role])
                 user_id = user.user_id
+                # Группа меняется через set_user_group: он сбрасывает кеш контекста пользователя
+                self.db.set_user_group(user_id, group_id)
                 app_logger.log('UPDATE', current_username, 'User', f"Updated user: {username}")
                 self.show_success("Пользователь успешно обновлен")
             else:
                 # Создание
                 print(f"DEBUG: Creating new user")
-                password_hash = hashlib.sha256(self.password_field.value.encode()).hexdigest()
-                user = User.create(username=username, password=password_hash, role=role, group=group_id)
+                password = password_hasher.hash(self.password_field.value)
+                user = write_executor.run(User.create, username=username, password=password,
+                                          role=role, group=group_id)
                 user_id = user.user_id
                 app_logger.log('CREATE', current_username, 'User', f"Created user: {username} with role: {role}")
                 self.show_success("Пользователь успешно создан")
             
-            # Сохраняем права доступа
-            for page_key, cb in self.permissions_checkboxes.items():
-                self.db.set_user_permission(user_id, page_key, cb.value)
+            # Сохраняем права доступа одним запросом (сбрасывает кеш контекста пользователя)
+            self.db.set_user_permissions(user_id, {
+                page_key: cb.value for page_key, cb in self.permissions_checkboxes.items()
+            })
             
             self.form_container.visible = False
             self.load_users()
             if self.on_refresh:
                 self.on_refresh()
             if self.page:
-                self.page.update()
+                request_update(self.page)
             
         except Exception as ex:
             print(f"DEBUG: Error saving user: {ex}")
@@ -357,7 +353,7 @@ class UsersView(ft.Container):
         self.form_container.visible = False
         self.clear_form()
         if self.page:
-            self.page.update()
+            request_update(self.page)
     
     def clear_form(self):
         """Очистить форму"""
@@ -379,7 +375,7 @@ class UsersView(ft.Container):
                 bgcolor=ft.Colors.ERROR
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)
     
     def show_success(self, message: str):
         """Показать успешное сообщение"""
@@ -389,4 +385,4 @@ class UsersView(ft.Container):
                 bgcolor=ft.Colors.GREEN
             )
             self.page.snack_bar.open = True
-            self.page.update()
+            request_update(self.page)